@@ -0,0 +1,58 @@
+"""Benchmark of the backtest on a synthetic season of 380 matches with snapshots every 10 minutes in the week before
+kickoff, in which arbitrages on several markets per match show up and persist over several snapshots.
+
+Run with `python benchmarks/bench_backtest.py`.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.backtester import (BestYieldPolicy, ProportionalPolicy, TopNPolicy, backtest,
+                                                    summarize_backtest)
+
+
+def _synthetic_season(n_matches=380, instances_per_match=20, detections_per_instance=50, seed=0):
+    """Draws 2-way and 3-way arbitrages at 40 bookmakers, detected repeatedly before kickoff with drifting prices."""
+    rng = np.random.default_rng(seed)
+    kickoffs = pd.Timestamp("2023-08-11 19:00", tz="UTC") + pd.to_timedelta(
+        np.sort(rng.integers(0, 280 * 24 * 6, n_matches)) * 10, unit="min")
+    n_instances = n_matches * instances_per_match
+    match = np.repeat(np.arange(n_matches), instances_per_match)
+    n_outcomes = rng.choice([2, 3], n_instances)
+
+    detection_instance = np.repeat(np.arange(n_instances), detections_per_instance)
+    minutes_before = rng.integers(10, 7 * 24 * 60, len(detection_instance)) // 10 * 10
+    placed_at = kickoffs[match[detection_instance]] - pd.to_timedelta(minutes_before, unit="min")
+    leg_detection = np.repeat(np.arange(len(detection_instance)), n_outcomes[detection_instance])
+    leg_instance = detection_instance[leg_detection]
+    probabilities = rng.dirichlet([3, 3, 3], len(detection_instance))
+    margin = rng.uniform(0.97, 1.0, len(detection_instance))
+    outcome = np.arange(len(leg_detection)) - np.repeat(np.cumsum(np.r_[0, n_outcomes[detection_instance]])[:-1],
+                                                        n_outcomes[detection_instance])
+    leg_probabilities = probabilities[leg_detection, outcome]
+    leg_probabilities /= np.bincount(leg_detection, leg_probabilities)[leg_detection]
+    return pd.DataFrame({
+        'match_id': match[leg_instance],
+        'market': 'market',
+        'line': leg_instance % instances_per_match,
+        'placed_at': placed_at[leg_detection],
+        'settles_at': kickoffs[match[leg_instance]] + pd.Timedelta(hours=2),
+        'bookmaker': rng.integers(0, 40, len(leg_detection)),
+        'price': 1 / (leg_probabilities * margin[leg_detection]),
+    })
+
+
+def main():
+    legs = _synthetic_season()
+    print(f"{legs['placed_at'].nunique()} snapshots, {len(legs)} legs")
+    for policy in (BestYieldPolicy(), TopNPolicy(5), ProportionalPolicy(0.5)):
+        start = time.perf_counter()
+        result = backtest(legs, policy, bankroll=10_000)
+        elapsed = time.perf_counter() - start
+        summary = summarize_backtest(result, 10_000)
+        print(f"{type(policy).__name__}: {elapsed:.2f} s, {summary['bets']} bets, yield {summary['yield']:.1f}%, "
+              f"max locked {summary['max_locked']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
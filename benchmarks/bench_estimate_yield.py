@@ -0,0 +1,65 @@
+"""Benchmark of the yield selection and compounding, comparing the former groupby-apply and row loop on 20k
+opportunities and timing the vectorized version on 5 million opportunities and on 1000 strategies at once.
+
+Run with `python benchmarks/bench_estimate_yield.py`.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.task_estimate_yield import compound_yields, highest_yield_per_time
+
+
+def _legacy_highest_yield(df, initial_investment):
+    """The former implementation, selecting per group with apply and compounding row by row."""
+    df_filtered = df.groupby('commence_time', group_keys=False).apply(
+        lambda group: group.loc[group['yield'].idxmax()]).reset_index(drop=True)
+    current_investment = initial_investment
+    df_filtered['investment_growth'] = 0.0
+    for i, row in df_filtered.iterrows():
+        current_investment *= 1 + (row['yield'] / 100)
+        df_filtered.at[i, 'investment_growth'] = current_investment
+    return df_filtered
+
+
+def _vectorized_highest_yield(df, initial_investment):
+    df_filtered = highest_yield_per_time(df)
+    df_filtered['investment_growth'] = compound_yields(df_filtered['yield'].to_numpy(), initial_investment)
+    return df_filtered
+
+
+def _synthetic_opportunities(n_opportunities, seed=0):
+    """Draws yields of 0 to 1 percent for opportunities spread over kickoff times, about four per kickoff."""
+    rng = np.random.default_rng(seed)
+    kickoffs = pd.Timestamp("2020-08-01") + pd.to_timedelta(
+        np.sort(rng.integers(0, n_opportunities // 4, n_opportunities)) * 15, unit="min")
+    return pd.DataFrame({'commence_time': kickoffs, 'yield': rng.uniform(0, 0.01, n_opportunities)})
+
+
+def main():
+    n_opportunities = 20_000
+    df = _synthetic_opportunities(n_opportunities)
+    start = time.perf_counter()
+    legacy = _legacy_highest_yield(df, 100)
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    vectorized = _vectorized_highest_yield(df, 100)
+    vectorized_time = time.perf_counter() - start
+    pd.testing.assert_frame_equal(vectorized, legacy)
+    print(f"{n_opportunities} opportunities: legacy {legacy_time:.2f} s, vectorized {vectorized_time * 1e3:.1f} ms, "
+          f"speed-up {legacy_time / vectorized_time:.0f}x")
+
+    n_opportunities = 5_000_000
+    df = _synthetic_opportunities(n_opportunities)
+    start = time.perf_counter()
+    vectorized = _vectorized_highest_yield(df, 100)
+    print(f"{n_opportunities} opportunities, {len(vectorized)} kickoffs: {time.perf_counter() - start:.2f} s")
+
+    yields = np.random.default_rng(1).uniform(0, 0.01, (10_000, 1000))
+    start = time.perf_counter()
+    compound_yields(yields, np.linspace(10, 1000, 1000))
+    print(f"10000 rounds of 1000 strategies: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
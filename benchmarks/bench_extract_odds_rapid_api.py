@@ -0,0 +1,57 @@
+"""Benchmark of the Rapid API wide-to-long reshaping as the number of bookmaker entries grows.
+
+Run with `python benchmarks/bench_extract_odds_rapid_api.py`.
+"""
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.data_management.task_retrieve_odds_rapid_api import ODDS_COLUMNS, reshape_rapid_api_long
+
+
+def _legacy_reshape(df, n_entries):
+    """The former loop, concatenating the columns of one entry per iteration."""
+    final_df = pd.DataFrame(columns=ODDS_COLUMNS)
+    for i in range(n_entries):
+        columns_to_extract = [f'{i}.{field}' for field in ODDS_COLUMNS]
+        extracted_df = df[columns_to_extract].copy()
+        extracted_df.columns = ODDS_COLUMNS
+        final_df = pd.concat([final_df, extracted_df], ignore_index=True)
+    return final_df
+
+
+def _synthetic_wide_table(n_rows, n_entries, extra_fields=58, seed=0):
+    """Builds a wide table shaped like the Rapid API dump, with 64 fields per entry."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(n_entries):
+        data[f'{i}.away_team'] = [f'Team A{row}' for row in range(n_rows)]
+        data[f'{i}.home_team'] = [f'Team H{row}' for row in range(n_rows)]
+        for field in ('away', 'home', 'draw'):
+            data[f'{i}.{field}'] = rng.uniform(1.1, 10, n_rows)
+        data[f'{i}.bookie'] = [f'bookie{i}'] * n_rows
+        for extra in range(extra_fields):
+            data[f'{i}.market_{extra}'] = rng.uniform(1.1, 10, n_rows)
+    return pd.DataFrame(data)
+
+
+def main():
+    warnings.simplefilter('ignore', FutureWarning)
+    print(f"{'entries':>8} {'legacy [s]':>11} {'single-pass [s]':>16} {'speed-up':>9}")
+    for n_entries in (168, 500, 1000, 2000, 4000):
+        df = _synthetic_wide_table(n_rows=15, n_entries=n_entries)
+
+        start = time.perf_counter()
+        _legacy_reshape(df, n_entries)
+        legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reshape_rapid_api_long(df, ODDS_COLUMNS)
+        single_pass = time.perf_counter() - start
+
+        print(f"{n_entries:>8} {legacy:>11.3f} {single_pass:>16.3f} {legacy / single_pass:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark of flattening The Odds API bookmakers payload as the number of events grows.
+
+The columnar parser is timed on the saved CSV column, which has to be decoded like in the per-row path, and on the
+raw JSON response, which is already decoded.
+
+Run with `python benchmarks/bench_extract_odds_the_odds_api.py`.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.data_management.task_retrieve_odds_the_odds_api import (
+    extract_odds_the_odds_api,
+    extract_quotes_the_odds_api,
+    h2h_odds_table,
+)
+
+
+def _legacy_extract(df_odds):
+    """The former path, building one small DataFrame per event and concatenating them."""
+    all_games_odds = []
+    for index, row in df_odds.iterrows():
+        all_games_odds.append(
+            extract_odds_the_odds_api(row['bookmakers'], row['home_team'], row['away_team'], row['commence_time'])
+        )
+    return pd.concat(all_games_odds, ignore_index=True)
+
+
+def _synthetic_events(n_events, n_bookmakers=10, seed=0):
+    """Builds events shaped like the saved odds endpoint response, with h2h and totals markets."""
+    rng = np.random.default_rng(seed)
+    events = []
+    for event in range(n_events):
+        home_team, away_team = f'Team H{event}', f'Team A{event}'
+        bookmakers = []
+        for bookmaker in range(n_bookmakers):
+            prices = rng.uniform(1.1, 10, 5).round(2)
+            bookmakers.append({
+                'title': f'Bookmaker{bookmaker}',
+                'last_update': '2024-03-01T10:00:00Z',
+                'markets': [
+                    {'key': 'h2h', 'outcomes': [
+                        {'name': home_team, 'price': prices[0]},
+                        {'name': away_team, 'price': prices[1]},
+                        {'name': 'Draw', 'price': prices[2]},
+                    ]},
+                    {'key': 'totals', 'outcomes': [
+                        {'name': 'Over', 'price': prices[3], 'point': 2.5},
+                        {'name': 'Under', 'price': prices[4], 'point': 2.5},
+                    ]},
+                ],
+            })
+        events.append({'id': f'e{event}', 'sport_key': 'soccer_epl', 'commence_time': '2024-03-03T14:00:00Z',
+                       'home_team': home_team, 'away_team': away_team, 'bookmakers': bookmakers})
+    return events
+
+
+def main():
+    print(f"{'events':>8} {'legacy [s]':>11} {'columnar [s]':>13} {'speed-up':>9} {'raw JSON [s]':>13} {'speed-up':>9}")
+    for n_events in (1000, 10000, 20000):
+        events = _synthetic_events(n_events)
+        df_odds = pd.DataFrame(events)
+        df_odds['bookmakers'] = df_odds['bookmakers'].astype(str)
+
+        start = time.perf_counter()
+        _legacy_extract(df_odds)
+        legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        h2h_odds_table(extract_quotes_the_odds_api(df_odds))
+        columnar = time.perf_counter() - start
+
+        start = time.perf_counter()
+        h2h_odds_table(extract_quotes_the_odds_api(events))
+        raw_json = time.perf_counter() - start
+
+        print(f"{n_events:>8} {legacy:>11.3f} {columnar:>13.3f} {legacy / columnar:>8.1f}x {raw_json:>13.3f} "
+              f"{legacy / raw_json:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark of the best-odds selection over the merged odds table, at 10k events and 40 bookmakers per event.
+
+Run with `python benchmarks/bench_find_best_odds.py`.
+"""
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.data_management.task_seperate_best_odds import find_best_odds
+
+
+def _legacy_find_best_odds(df_path):
+    """The former loop, calling idxmax three times per match group."""
+    df = pd.read_pickle(df_path)
+    data_to_append = []
+    for (home_team, away_team), group in df.groupby(['home_team', 'away_team']):
+        best_home = group.loc[group['home_win_odds'].idxmax()]
+        best_draw = group.loc[group['draw_odds'].idxmax()]
+        best_away = group.loc[group['away_win_odds'].idxmax()]
+        data_to_append.append({
+            'home_team': home_team,
+            'away_team': away_team,
+            'commence_time': group['commence_time'].iloc[0],
+            'best_odds_home': best_home['home_win_odds'],
+            'best_odds_draw': best_draw['draw_odds'],
+            'best_odds_away': best_away['away_win_odds'],
+            'bookie_home': best_home['bookmaker'],
+            'bookie_draw': best_draw['bookmaker'],
+            'bookie_away': best_away['bookmaker'],
+        })
+    return pd.DataFrame(data_to_append)
+
+
+def _synthetic_merged_table(n_events, n_bookmakers, seed=0):
+    """Builds a merged odds table with one row per event and bookmaker, with prices rounded so that ties occur."""
+    rng = np.random.default_rng(seed)
+    n_rows = n_events * n_bookmakers
+    events = rng.permutation(np.repeat(np.arange(n_events), n_bookmakers))
+    return pd.DataFrame({
+        'bookmaker': [f'bookmaker{i}' for i in rng.integers(0, n_bookmakers, n_rows)],
+        'home_team': [f'Team H{event}' for event in events],
+        'away_team': [f'Team A{event}' for event in events],
+        'commence_time': '2024-03-03T14:00:00Z',
+        'home_win_odds': rng.uniform(1.1, 4, n_rows).round(1),
+        'draw_odds': rng.uniform(2.5, 5, n_rows).round(1),
+        'away_win_odds': rng.uniform(1.1, 10, n_rows).round(1),
+    })
+
+
+def main():
+    n_events, n_bookmakers = 10000, 40
+    with tempfile.TemporaryDirectory() as directory:
+        df_path = Path(directory) / "all_odds_merged.pkl"
+        _synthetic_merged_table(n_events, n_bookmakers).to_pickle(df_path)
+
+        start = time.perf_counter()
+        legacy = _legacy_find_best_odds(df_path)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = find_best_odds(df_path)
+        vectorized_time = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(vectorized, legacy)
+    print(f"{n_events} events x {n_bookmakers} bookmakers: legacy {legacy_time:.2f} s, "
+          f"vectorized {vectorized_time:.2f} s, speed-up {legacy_time / vectorized_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
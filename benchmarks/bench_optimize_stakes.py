@@ -0,0 +1,33 @@
+"""Benchmark of the stake optimizer on 10k 3-way opportunities with stakes in units of 1, caps and commissions.
+
+Run with `python benchmarks/bench_optimize_stakes.py`.
+"""
+import time
+
+import numpy as np
+from arbitrage_analysis.analysis.stake_optimizer import optimize_stakes
+
+
+def _synthetic_opportunities(n_opportunities, n_outcomes, seed=0):
+    """Draws arbitrage prices with margins of 1 to 10 percent, caps of some bookmakers and exchange commissions."""
+    rng = np.random.default_rng(seed)
+    probabilities = rng.dirichlet(np.full(n_outcomes, 3.0), n_opportunities)
+    prices = 1 / (probabilities * rng.uniform(0.9, 0.99, (n_opportunities, 1)))
+    caps = rng.choice([np.inf, 25, 50], (n_opportunities, n_outcomes), p=[0.8, 0.1, 0.1])
+    commissions = rng.choice([0, 0.05], (n_opportunities, n_outcomes), p=[0.9, 0.1])
+    return prices, caps, commissions
+
+
+def main():
+    n_opportunities = 10_000
+    prices, caps, commissions = _synthetic_opportunities(n_opportunities, 3)
+    for total_investment in (100, 1000):
+        start = time.perf_counter()
+        result = optimize_stakes(prices, total_investment, 1.0, max_stakes=caps, commissions=commissions)
+        elapsed = time.perf_counter() - start
+        print(f"{n_opportunities} opportunities, total investment {total_investment}: {elapsed:.2f} s, "
+              f"{result['profitable'].mean():.1%} profitable, mean profit {result['profit'].mean():.2f}")
+
+
+if __name__ == "__main__":
+    main()
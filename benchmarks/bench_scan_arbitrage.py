@@ -0,0 +1,81 @@
+"""Benchmark of the arbitrage scan, comparing the former row-wise stakes on 20k matches and timing the scanner on
+5 million 3-way and 2-way market instances.
+
+Run with `python benchmarks/bench_scan_arbitrage.py`.
+"""
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.arbitrage_scanner import scan_arbitrage
+from arbitrage_analysis.analysis.task_calculate_arbitrage import identify_arbitrage_opportunities
+
+
+def _legacy_stakes(row, total_investment):
+    """The former row-wise stakes, proportional to the implied probabilities."""
+    total_imp_prob = row['total_imp_prob']
+    row['stake_home'] = (1 / row['best_odds_home'] / total_imp_prob) * total_investment
+    row['stake_draw'] = (1 / row['best_odds_draw'] / total_imp_prob) * total_investment
+    row['stake_away'] = (1 / row['best_odds_away'] / total_imp_prob) * total_investment
+    return row
+
+
+def _legacy_identify_arbitrage_opportunities(df):
+    """The former implementation, calculating the stakes with a row-wise apply."""
+    df = df.copy()
+    df['imp_prob_home'] = 1 / df['best_odds_home']
+    df['imp_prob_draw'] = 1 / df['best_odds_draw']
+    df['imp_prob_away'] = 1 / df['best_odds_away']
+    df['total_imp_prob'] = df['imp_prob_home'] + df['imp_prob_draw'] + df['imp_prob_away']
+    arb_opportunities = df[df['total_imp_prob'] < 1].copy()
+    arb_opportunities['arb_profit_margin'] = (1 - arb_opportunities['total_imp_prob']) * 100
+    arb_opportunities = arb_opportunities.apply(lambda row: _legacy_stakes(row, 100), axis=1)
+    arb_opportunities['payout_home'] = arb_opportunities['stake_home'] * arb_opportunities['best_odds_home']
+    arb_opportunities['payout_draw'] = arb_opportunities['stake_draw'] * arb_opportunities['best_odds_draw']
+    arb_opportunities['payout_away'] = arb_opportunities['stake_away'] * arb_opportunities['best_odds_away']
+    return arb_opportunities
+
+
+def _synthetic_prices(n_instances, n_outcomes, seed=0):
+    """Draws fair odds with a small random margin, so that a share of the instances are arbitrages."""
+    rng = np.random.default_rng(seed)
+    probabilities = rng.dirichlet(np.full(n_outcomes, 3.0), n_instances)
+    return 1 / (probabilities * rng.uniform(0.98, 1.08, (n_instances, 1)))
+
+
+def main():
+    n_matches = 20_000
+    best_odds = pd.DataFrame(_synthetic_prices(n_matches, 3), columns=['best_odds_home', 'best_odds_draw',
+                                                                        'best_odds_away'])
+    with tempfile.TemporaryDirectory() as directory:
+        df_path, output_path = Path(directory) / "best_odds.pkl", Path(directory) / "arbitrage.pkl"
+        best_odds.to_pickle(df_path)
+
+        start = time.perf_counter()
+        legacy = _legacy_identify_arbitrage_opportunities(best_odds)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        identify_arbitrage_opportunities(df_path, 100, output_path)
+        vectorized_time = time.perf_counter() - start
+        vectorized = pd.read_pickle(output_path)
+
+    pd.testing.assert_frame_equal(vectorized, legacy)
+    print(f"{n_matches} matches: legacy {legacy_time:.2f} s, vectorized {vectorized_time:.3f} s, "
+          f"speed-up {legacy_time / vectorized_time:.0f}x")
+
+    n_instances = 5_000_000
+    for n_outcomes in (3, 2):
+        prices = _synthetic_prices(n_instances, n_outcomes)
+        start = time.perf_counter()
+        scan = scan_arbitrage(prices, 100)
+        scan_time = time.perf_counter() - start
+        print(f"{n_instances} {n_outcomes}-way instances: {scan_time:.2f} s, "
+              f"{n_instances / scan_time / 1e6:.1f} million instances per second, "
+              f"{int((scan['total_imp_prob'] < 1).sum())} arbitrages")
+
+
+if __name__ == "__main__":
+    main()
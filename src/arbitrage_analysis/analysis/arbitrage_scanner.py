@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.cross_market import max_min_payout
+
+# Columns identifying a market instance, i.e. one market at one line of one match
+INSTANCE_KEY = ['match_id', 'market', 'line']
+
+# Outcomes of the markets whose outcomes exclude each other and together cover every result, in the column order of
+# the price matrix. Double chance legs overlap and correct score lists only some scores, so both are left out.
+MARKET_OUTCOMES = {
+    'h2h': ['home', 'draw', 'away'],
+    'first_half': ['home', 'draw', 'away'],
+    'handicap': ['home', 'draw', 'away'],
+    'first_goal': ['home', 'none', 'away'],
+    'last_goal': ['home', 'none', 'away'],
+    'asian_handicap': ['home', 'away'],
+    'draw_no_bet': ['home', 'away'],
+    'totals': ['over', 'under'],
+    'btts': ['yes', 'no'],
+    'odd_even': ['odd', 'even'],
+}
+
+# 2-way markets with a line, which refund the stakes in full on whole lines and in half on quarter lines, by the sign
+# that turns the line into the threshold the first outcome has to exceed: the goals for totals and the goal margin of
+# the home team for Asian handicaps. Draw no bet settles like the Asian handicap 0.
+LINE_MARKETS = {'totals': 1.0, 'asian_handicap': -1.0, 'draw_no_bet': -1.0}
+
+
+def scan_arbitrage(prices, total_investment=1.0):
+    """
+    Computes the implied probabilities, margins and proportional stakes of many market instances at once.
+
+    Every row of `prices` holds the best prices of the outcomes of one market instance. The stakes are proportional to
+    the implied probabilities, so that every outcome pays out the same amount. A missing price leaves the instance
+    without a total implied probability, as an incomplete market cannot be covered.
+
+    Args:
+        prices (np.ndarray): Decimal odds of shape (instances, outcomes), NaN where an outcome is not quoted.
+        total_investment (float, optional): Amount spread over the outcomes of every instance. Defaults to 1.
+
+    Returns:
+        dict: Arrays 'imp_prob' and 'stakes' of the shape of `prices`, and 'total_imp_prob', below 1 for an
+            arbitrage opportunity, 'arb_profit_margin' in percent and 'payout' with one value per instance.
+    """
+    prices = np.asarray(prices, dtype=float)
+    imp_prob = 1 / prices
+    total_imp_prob = imp_prob.sum(axis=1)
+    return {
+        'imp_prob': imp_prob,
+        'total_imp_prob': total_imp_prob,
+        'arb_profit_margin': (1 - total_imp_prob) * 100,
+        'stakes': imp_prob / total_imp_prob[:, None] * total_investment,
+        'payout': total_investment / total_imp_prob,
+    }
+
+
+def settlement_payoffs(prices, thresholds):
+    """
+    Computes the payoffs of unit stakes on the two outcomes of market instances with a line.
+
+    The results are the first outcome winning outright, the result at the whole number next to the threshold, and the
+    second outcome winning outright. On a whole line the middle result refunds both stakes. On a quarter line the bet
+    is split over the two neighbouring lines, so that the middle result wins or loses half of each stake and refunds
+    the other half. On a half line the middle result is the first one.
+
+    Args:
+        prices (np.ndarray): Decimal odds of shape (instances, 2).
+        thresholds (np.ndarray): Threshold the first outcome has to exceed by instance, as returned by
+            `line_thresholds`.
+
+    Returns:
+        np.ndarray: Payoffs of shape (instances, results, legs), as returned by `payoff_matrices`.
+    """
+    prices = np.asarray(prices, dtype=float)
+    quarters = np.round(np.asarray(thresholds, dtype=float) % 1 * 4) % 4
+    first, second = prices[:, 0], prices[:, 1]
+
+    middle = np.select(
+        [quarters[:, None] == 0, quarters[:, None] == 1, quarters[:, None] == 3],
+        [np.ones_like(prices), np.stack([np.full_like(first, 0.5), (1 + second) / 2], axis=1),
+         np.stack([(1 + first) / 2, np.full_like(second, 0.5)], axis=1)],
+        np.stack([first, np.zeros_like(second)], axis=1))
+    payoffs = np.zeros((len(prices), 3, 2))
+    payoffs[:, 0, 0] = first
+    payoffs[:, 1] = middle
+    payoffs[:, 2, 1] = second
+    return payoffs
+
+
+def line_thresholds(market, lines):
+    """
+    Turns the lines of a market in `LINE_MARKETS` into the thresholds its first outcome has to exceed.
+
+    Args:
+        market (str): The market, e.g. 'asian_handicap'.
+        lines (array-like): Lines of the instances, NaN for draw no bet.
+
+    Returns:
+        np.ndarray: The thresholds.
+    """
+    return LINE_MARKETS[market] * np.nan_to_num(np.asarray(lines, dtype=float)) + 0.0
+
+
+def scan_line_market(prices, thresholds, total_investment=1.0):
+    """
+    Scans 2-way market instances with a line like `scan_arbitrage`, settling whole and quarter lines.
+
+    A push on a whole line refunds the stakes, so no stakes make a profit there. On a quarter line the half won or
+    lost on the middle result lowers the guaranteed payout below the one of proportional stakes, and the stakes
+    maximizing the minimum payout are found with `max_min_payout`. Half lines cannot push and keep the proportional
+    stakes. 'total_imp_prob' is the total stake per unit of guaranteed payout, which for half lines is the sum of the
+    implied probabilities.
+
+    Args:
+        prices (np.ndarray): Decimal odds of shape (instances, 2), NaN where an outcome is not quoted.
+        thresholds (np.ndarray): Threshold the first outcome has to exceed by instance.
+        total_investment (float, optional): Amount spread over the outcomes of every instance. Defaults to 1.
+
+    Returns:
+        dict: The arrays of `scan_arbitrage`.
+    """
+    prices = np.asarray(prices, dtype=float)
+    scan = scan_arbitrage(prices, total_investment)
+    pushes = np.round(np.asarray(thresholds, dtype=float) % 1 * 4) % 4 != 2
+    rows = np.flatnonzero(pushes & ~np.isnan(scan['total_imp_prob']))
+    if len(rows):
+        payout, stakes = max_min_payout(settlement_payoffs(prices[rows], np.asarray(thresholds)[rows]))
+        scan['total_imp_prob'][rows] = 1 / payout
+        scan['arb_profit_margin'][rows] = (1 - 1 / payout) * 100
+        scan['stakes'][rows] = stakes * total_investment
+        scan['payout'][rows] = payout * total_investment
+    return scan
+
+
+def scan_instances(instances, prices, market, total_investment=1.0):
+    """
+    Scans the instances of one market with `scan_line_market` if it is in `LINE_MARKETS`, else with `scan_arbitrage`.
+
+    Args:
+        instances (pd.DataFrame): Instances as returned by `price_matrix`.
+        prices (np.ndarray): Prices as returned by `price_matrix`.
+        market (str): The market.
+        total_investment (float, optional): Amount spread over the outcomes of every instance. Defaults to 1.
+
+    Returns:
+        dict: The arrays of `scan_arbitrage`.
+    """
+    if market in LINE_MARKETS:
+        return scan_line_market(prices, line_thresholds(market, instances['line']), total_investment)
+    return scan_arbitrage(prices, total_investment)
+
+
+def price_matrix(best, market, outcomes):
+    """
+    Arranges the best prices of one market into a matrix with one row per market instance and one column per outcome.
+
+    Args:
+        best (pd.DataFrame): Best prices as returned by `best_prices`, with the columns of `INSTANCE_KEY`, 'outcome',
+            'bookmaker' and 'price'.
+        market (str): The market, e.g. 'totals'.
+        outcomes (list of str): Outcomes of the market in column order.
+
+    Returns:
+        tuple: The instances as a DataFrame with the columns of `INSTANCE_KEY` in sorted order, the prices of shape
+            (instances, outcomes) with NaN for outcomes not quoted, and the bookmakers of the same shape.
+    """
+    subset = best[best['market'] == market]
+    positions = pd.Index(outcomes).get_indexer(subset['outcome'].astype(object))
+    subset, positions = subset[positions >= 0], positions[positions >= 0]
+
+    codes = subset.groupby(['match_id', 'line'], sort=True, dropna=False, observed=True).ngroup().to_numpy()
+    n_instances = codes.max() + 1 if len(codes) else 0
+    _, first = np.unique(codes, return_index=True)
+    instances = subset[INSTANCE_KEY].iloc[first].reset_index(drop=True)
+
+    prices = np.full((n_instances, len(outcomes)), np.nan)
+    prices[codes, positions] = subset['price'].to_numpy(dtype=float)
+    bookmakers = np.full((n_instances, len(outcomes)), None, dtype=object)
+    bookmakers[codes, positions] = subset['bookmaker'].astype(object).to_numpy()
+    return instances, prices, bookmakers
+
+
+def scan_markets(best, total_investment, markets=MARKET_OUTCOMES):
+    """
+    Finds the arbitrage opportunities among the best prices of all markets, 2-way or N-way. Pushes on the lines of
+    `LINE_MARKETS` are settled by `scan_line_market`, so the stakes of quarter lines are not proportional.
+
+    Args:
+        best (pd.DataFrame): Best prices as returned by `best_prices`.
+        total_investment (float): Amount spread over the outcomes of every opportunity.
+        markets (dict, optional): Outcomes by market of the markets to scan. Defaults to `MARKET_OUTCOMES`.
+
+    Returns:
+        pd.DataFrame: One row per leg of every opportunity, with the columns of `INSTANCE_KEY`, 'outcome',
+            'bookmaker', 'price', 'total_imp_prob', 'arb_profit_margin', 'stake' and 'payout'.
+    """
+    legs = []
+    for market, outcomes in markets.items():
+        instances, prices, bookmakers = price_matrix(best, market, outcomes)
+        scan = scan_instances(instances, prices, market, total_investment)
+        is_arbitrage = scan['total_imp_prob'] < 1
+
+        n_outcomes = len(outcomes)
+        rows = np.repeat(np.flatnonzero(is_arbitrage), n_outcomes)
+        leg = instances.iloc[rows].reset_index(drop=True)
+        leg['outcome'] = np.tile(outcomes, int(is_arbitrage.sum()))
+        leg['bookmaker'] = bookmakers[is_arbitrage].ravel()
+        leg['price'] = prices[is_arbitrage].ravel()
+        leg['total_imp_prob'] = np.repeat(scan['total_imp_prob'][is_arbitrage], n_outcomes)
+        leg['arb_profit_margin'] = np.repeat(scan['arb_profit_margin'][is_arbitrage], n_outcomes)
+        leg['stake'] = scan['stakes'][is_arbitrage].ravel()
+        leg['payout'] = np.repeat(scan['payout'][is_arbitrage], n_outcomes)
+        legs.append(leg)
+
+    columns = INSTANCE_KEY + ['outcome', 'bookmaker', 'price', 'total_imp_prob', 'arb_profit_margin', 'stake',
+                              'payout']
+    if not legs:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(legs, ignore_index=True)[columns]
@@ -0,0 +1,258 @@
+import heapq
+import itertools
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.arbitrage_scanner import INSTANCE_KEY
+
+# Time from kickoff until a bet on a match is settled and its payout can be staked again
+MATCH_DURATION = pd.Timedelta(hours=2)
+
+# Kinds of events in the queue of the backtest, settlements first so that payouts can be staked at the same time
+SETTLEMENT, PLACEMENT = 0, 1
+
+
+class BestYieldPolicy:
+    """
+    Stakes as much as possible on the opportunity with the highest margin among those detected at the same time.
+
+    Args:
+        max_stake (float, optional): Maximum total stake on an opportunity. Unlimited by default.
+    """
+
+    def __init__(self, max_stake=np.inf):
+        self.max_stake = max_stake
+
+    def __call__(self, margins, capacity, free_capital):
+        requested = np.zeros(len(margins))
+        best = np.argmax(margins)
+        requested[best] = min(capacity[best], self.max_stake)
+        return requested
+
+
+class TopNPolicy:
+    """
+    Stakes as much as possible on each of the n opportunities with the highest margins among those detected at the
+    same time, best first.
+
+    Args:
+        n (int): Number of opportunities staked on.
+        max_stake (float, optional): Maximum total stake on an opportunity. Unlimited by default.
+    """
+
+    def __init__(self, n, max_stake=np.inf):
+        self.n = n
+        self.max_stake = max_stake
+
+    def __call__(self, margins, capacity, free_capital):
+        requested = np.zeros(len(margins))
+        best = np.argsort(-margins, kind='stable')[:self.n]
+        requested[best] = np.minimum(capacity[best], self.max_stake)
+        return requested
+
+
+class ProportionalPolicy:
+    """
+    Splits a fraction of the free capital among all opportunities detected at the same time in proportion to their
+    margins.
+
+    Args:
+        fraction (float, optional): Share of the free capital staked at a time. Defaults to 1.
+    """
+
+    def __init__(self, fraction=1.0):
+        self.fraction = fraction
+
+    def __call__(self, margins, capacity, free_capital):
+        return np.minimum(capacity, self.fraction * free_capital * margins / margins.sum())
+
+
+def opportunity_legs(arbitrage_opportunities, match_duration=MATCH_DURATION):
+    """
+    Converts the arbitrage opportunities of the 1X2 market into the legs replayed by `backtest`.
+
+    An opportunity is placed once the last of its quotes was updated and settled `match_duration` after kickoff.
+
+    Args:
+        arbitrage_opportunities (pd.DataFrame): Opportunities as returned by `identify_arbitrage_opportunities`.
+        match_duration (pd.Timedelta, optional): Time from kickoff until settlement. Defaults to `MATCH_DURATION`.
+
+    Returns:
+        pd.DataFrame: One row per leg with the columns of `INSTANCE_KEY`, 'placed_at', 'settles_at', 'outcome',
+            'bookmaker' and 'price'.
+    """
+    df = arbitrage_opportunities
+    commence_time = pd.to_datetime(df['commence_time'], utc=True)
+    last_updates = [pd.to_datetime(df[f'last_update_{outcome}'], utc=True) for outcome in ('home', 'draw', 'away')]
+    opportunities = pd.DataFrame({
+        'match_id': (df['home_team'] + ' vs ' + df['away_team'] + ' ' + commence_time.dt.strftime('%Y-%m-%dT%H:%M')),
+        'market': 'h2h',
+        'line': np.nan,
+        'placed_at': pd.concat(last_updates, axis=1).max(axis=1).fillna(commence_time),
+        'settles_at': commence_time + match_duration,
+    })
+    legs = [opportunities.assign(outcome=outcome, bookmaker=df[f'bookie_{outcome}'].to_numpy(),
+                                 price=df[f'best_odds_{outcome}'].to_numpy())
+            for outcome in ('home', 'draw', 'away')]
+    return pd.concat(legs).sort_index(kind='stable').reset_index(drop=True)
+
+
+def backtest(legs, policy=None, bankroll=1000, key=INSTANCE_KEY, min_stake=1.0, seed=0):
+    """
+    Replays arbitrage opportunities in time order, locking the stakes at their bookmakers until settlement.
+
+    Every detection of an opportunity, the legs sharing `key` and 'placed_at', is a candidate when it is placed.
+    The policy decides how much to stake on each of the candidates detected at the same time, best margins first,
+    and no more than the free capital at the bookmakers of the legs allows. The stakes of the legs are proportional
+    to their implied probabilities, so that every outcome pays the same. A market instance is staked on once, so
+    repeated detections of it in later snapshots are skipped. At settlement the stakes are unlocked and the payout is
+    credited to the bookmaker of the winning leg, taken from a 'won' column if the legs have one and otherwise drawn
+    with the implied probabilities of the legs.
+
+    Placements and settlements are processed from one event queue, and the state is kept in plain lists, so that a
+    season of snapshots replays in a few seconds.
+
+    Args:
+        legs (pd.DataFrame): One row per leg with the columns of `key`, 'placed_at', 'settles_at', 'bookmaker' and
+            'price', and optionally 'won'.
+        policy (callable, optional): Called with the margins, the largest total stakes the free capital allows and
+            the total free capital of the candidates detected at the same time, as NumPy arrays and a float, and
+            returning the total stake requested for each. Defaults to `BestYieldPolicy()`.
+        bankroll (float or dict, optional): Capital split evenly among the bookmakers of the legs, or the capital
+            by bookmaker. Defaults to 1000.
+        key (list, optional): Columns identifying a market instance. Defaults to `INSTANCE_KEY`.
+        min_stake (float, optional): Smallest total stake placed on an opportunity. Defaults to 1.
+        seed (int, optional): Seed of the draws of the winning legs. Defaults to 0.
+
+    Returns:
+        dict: 'bets', one row per placed opportunity with the columns of `key`, 'placed_at', 'settles_at', 'stake',
+            'payout', 'profit' and 'margin', 'capital', one row per settlement and per time bets were placed with
+            the columns 'time', 'event', 'free' and 'locked', and 'balances', the final free capital by bookmaker.
+    """
+    policy = BestYieldPolicy() if policy is None else policy
+    legs = legs.sort_values('placed_at', kind='stable')
+    detection = legs.groupby(key + ['placed_at'], dropna=False, sort=False, observed=True).ngroup().to_numpy()
+    order = np.argsort(detection, kind='stable')
+    legs, detection = legs.iloc[order].reset_index(drop=True), detection[order]
+    bookmaker_codes, bookmakers = pd.factorize(legs['bookmaker'], sort=True)
+    instance = legs.groupby(key, dropna=False, sort=False, observed=True).ngroup().to_numpy()
+
+    # Per leg its share of the total stake, and per detection and bookmaker the summed share of its legs
+    imp_prob = 1 / legs['price'].to_numpy(dtype=float)
+    starts = np.flatnonzero(np.r_[True, detection[1:] != detection[:-1]])
+    ends = np.r_[starts[1:], len(legs)]
+    counts = ends - starts
+    total_imp_prob = np.add.reduceat(imp_prob, starts)
+    share = imp_prob / np.repeat(total_imp_prob, counts)
+    bookmaker_share = pd.Series(share).groupby([detection, bookmaker_codes]).transform('sum').to_numpy()
+    if 'won' in legs:
+        won = legs['won'].to_numpy(dtype=bool)
+    else:
+        # A leg wins if the draw of its detection falls into its interval of the cumulative shares
+        cumulative = np.cumsum(share)
+        upper = cumulative - np.repeat(cumulative[starts] - share[starts], counts)
+        lower = upper - share
+        upper[ends - 1] = np.inf
+        draws = np.repeat(np.random.default_rng(seed).random(len(starts)), counts)
+        won = (lower <= draws) & (draws < upper)
+
+    if isinstance(bankroll, dict):
+        free = [float(bankroll.get(bookmaker, 0.0)) for bookmaker in bookmakers]
+    else:
+        free = [bankroll / max(len(bookmakers), 1)] * len(bookmakers)
+    locked = [0.0] * len(bookmakers)
+
+    leg_ranges = [range(start, end) for start, end in zip(starts.tolist(), ends.tolist())]
+    leg_bookmakers, leg_shares, leg_bookmaker_shares = (bookmaker_codes.tolist(), share.tolist(),
+                                                       bookmaker_share.tolist())
+    leg_prices, leg_won = legs['price'].to_numpy(dtype=float).tolist(), won.tolist()
+    detection_instances = instance[starts]
+    margins = 1 - total_imp_prob
+    # Times as integer nanoseconds, which the queue compares much faster than timestamps
+    placed_at = legs['placed_at'].to_numpy(dtype='datetime64[ns]')[starts].view(np.int64)
+    settles_at = legs['settles_at'].to_numpy(dtype='datetime64[ns]')[starts].view(np.int64).tolist()
+
+    def capacity(d):
+        return min(free[leg_bookmakers[i]] / leg_bookmaker_shares[i] for i in leg_ranges[d])
+
+    # The queue holds one placement event per detection time and a settlement event per placed opportunity
+    sequence = itertools.count()
+    batch_starts = np.flatnonzero(np.r_[True, placed_at[1:] != placed_at[:-1]])
+    queue = [(time, PLACEMENT, next(sequence), (start, end))
+             for time, start, end in zip(placed_at[batch_starts].tolist(), batch_starts.tolist(),
+                                         np.r_[batch_starts[1:], len(starts)].tolist())]
+    heapq.heapify(queue)
+    staked = np.zeros(instance.max() + 1 if len(instance) else 0, dtype=bool)
+    bets, capital = [], []
+    while queue:
+        time, kind, _, payload = heapq.heappop(queue)
+        if kind == SETTLEMENT:
+            d, stake = payload
+            for i in leg_ranges[d]:
+                locked[leg_bookmakers[i]] -= stake * leg_shares[i]
+                if leg_won[i]:
+                    free[leg_bookmakers[i]] += stake * leg_shares[i] * leg_prices[i]
+            capital.append((time, 'settlement', sum(free), sum(locked)))
+            continue
+
+        # Capacity of all detections of the batch at once, from the free capital at the bookmakers of their legs
+        first, last = payload
+        candidates = first + np.flatnonzero(~staked[detection_instances[first:last]])
+        if not len(candidates):
+            continue
+        lo, hi = starts[first], ends[last - 1]
+        leg_capacity = np.asarray(free)[bookmaker_codes[lo:hi]] / bookmaker_share[lo:hi]
+        batch_capacity = np.minimum.reduceat(leg_capacity, starts[first:last] - lo)[candidates - first]
+        requested = np.asarray(policy(margins[candidates], batch_capacity, sum(free)))
+        chosen = np.flatnonzero(requested >= min_stake)
+        chosen = chosen[np.argsort(-margins[candidates[chosen]], kind='stable')]
+        n_bets = len(bets)
+        for d, request in zip(candidates[chosen].tolist(), requested[chosen].tolist()):
+            stake = min(request, capacity(d))
+            if not stake >= min_stake:
+                continue
+            for i in leg_ranges[d]:
+                free[leg_bookmakers[i]] -= stake * leg_shares[i]
+                locked[leg_bookmakers[i]] += stake * leg_shares[i]
+            staked[detection_instances[d]] = True
+            bets.append((d, stake))
+            heapq.heappush(queue, (settles_at[d], SETTLEMENT, next(sequence), (d, stake)))
+        if len(bets) > n_bets:
+            capital.append((time, 'placement', sum(free), sum(locked)))
+
+    placed = np.array([d for d, _ in bets], dtype=int)
+    stakes = np.array([stake for _, stake in bets], dtype=float)
+    bets = legs.loc[starts[placed], key + ['placed_at', 'settles_at']].reset_index(drop=True)
+    bets['stake'] = stakes
+    bets['payout'] = stakes / total_imp_prob[placed]
+    bets['profit'] = bets['payout'] - bets['stake']
+    bets['margin'] = margins[placed] * 100
+    capital = pd.DataFrame(capital, columns=['time', 'event', 'free', 'locked'])
+    capital['time'] = pd.to_datetime(capital['time'], unit='ns', utc=legs['placed_at'].dt.tz is not None)
+    return {
+        'bets': bets,
+        'capital': capital,
+        'balances': pd.Series(free, index=pd.Index(bookmakers, name='bookmaker'), name='free'),
+    }
+
+
+def summarize_backtest(result, bankroll):
+    """
+    Summarizes a backtest.
+
+    Args:
+        result (dict): The result of `backtest`.
+        bankroll (float): The total initial capital.
+
+    Returns:
+        dict: 'bets', the number placed, 'staked', the total staked, 'final_capital', 'yield', the return on the
+            bankroll in percent, and 'max_locked', the largest capital locked at a time.
+    """
+    final_capital = result['balances'].sum()
+    return {
+        'bets': len(result['bets']),
+        'staked': result['bets']['stake'].sum(),
+        'final_capital': final_capital,
+        'yield': (final_capital / bankroll - 1) * 100,
+        'max_locked': result['capital']['locked'].max() if len(result['capital']) else 0.0,
+    }
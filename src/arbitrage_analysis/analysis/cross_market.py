@@ -0,0 +1,208 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.data_management.task_seperate_best_odds import best_prices
+
+# Full-time results a combination of bets has to cover
+RESULTS = ['home', 'draw', 'away']
+
+# Settlement of the bets on the full-time result, one letter per result in the order of `RESULTS`: 'W' wins, 'P'
+# refunds the stake and 'L' loses. Asian handicap lines are the goal start of the home team, the away team getting
+# the opposite one, so that e.g. the away side of line -0.5 settles like double chance X2.
+OUTCOME_COVERAGE = {
+    ('h2h', None, 'home'): 'WLL',
+    ('h2h', None, 'draw'): 'LWL',
+    ('h2h', None, 'away'): 'LLW',
+    ('double_chance', None, '1X'): 'WWL',
+    ('double_chance', None, '12'): 'WLW',
+    ('double_chance', None, 'X2'): 'LWW',
+    ('draw_no_bet', None, 'home'): 'WPL',
+    ('draw_no_bet', None, 'away'): 'LPW',
+    ('asian_handicap', 0.0, 'home'): 'WPL',
+    ('asian_handicap', 0.0, 'away'): 'LPW',
+    ('asian_handicap', -0.5, 'home'): 'WLL',
+    ('asian_handicap', -0.5, 'away'): 'LWW',
+    ('asian_handicap', 0.5, 'home'): 'WWL',
+    ('asian_handicap', 0.5, 'away'): 'LLW',
+}
+
+# Tolerance for stakes and payouts of the equalizing solutions
+TOLERANCE = 1e-9
+
+
+def coverage_table(coverage=OUTCOME_COVERAGE):
+    """
+    Turns the outcome coverage into a table with one row per bet.
+
+    Args:
+        coverage (dict, optional): Settlement by (market, line, outcome). Defaults to `OUTCOME_COVERAGE`.
+
+    Returns:
+        pd.DataFrame: The columns 'market', 'line' (NaN for markets without one), 'outcome' and 'pattern'.
+    """
+    return pd.DataFrame(
+        [(market, np.nan if line is None else float(line), outcome, pattern)
+         for (market, line, outcome), pattern in coverage.items()],
+        columns=['market', 'line', 'outcome', 'pattern'])
+
+
+def covering_combinations(patterns, n_results=len(RESULTS)):
+    """
+    Enumerates the combinations of settlement patterns that can form a surebet.
+
+    Every result has to be won by a leg, as a result that is only refunded pays back less than the total stake. Bets
+    settling alike are interchangeable, so each pattern enters a combination once, and as the maximum of the minimum
+    payout is attained with at most as many legs as there are results, larger combinations are not enumerated.
+
+    Args:
+        patterns (list of str): Distinct settlement patterns, e.g. 'WPL'.
+        n_results (int, optional): Number of results. Defaults to the length of `RESULTS`.
+
+    Returns:
+        list of tuple: The combinations as tuples of patterns.
+    """
+    combinations = []
+    for n_legs in range(2, n_results + 1):
+        for combination in itertools.combinations(sorted(patterns), n_legs):
+            if all(any(pattern[result] == 'W' for pattern in combination) for result in range(n_results)):
+                combinations.append(combination)
+    return combinations
+
+
+def payoff_matrices(prices, combination):
+    """
+    Computes the payoff of a unit stake on every leg for every result.
+
+    Args:
+        prices (np.ndarray): Prices of shape (events, legs).
+        combination (tuple of str): Settlement patterns of the legs.
+
+    Returns:
+        np.ndarray: Payoffs of shape (events, results, legs).
+    """
+    wins = np.array([[letter == 'W' for letter in pattern] for pattern in combination]).T
+    pushes = np.array([[letter == 'P' for letter in pattern] for pattern in combination]).T
+    return np.where(wins, prices[:, None, :], 0.0) + pushes
+
+
+def max_min_payout(payoffs):
+    """
+    Finds the stakes of a total stake of 1 that maximize the minimum payout over the results, for many events at once.
+
+    A solution equalizes the payouts of as many results as there are legs. All choices of these binding results are
+    solved as batches of linear systems, and the best solution with non-negative stakes and no result below the
+    equalized payout is kept.
+
+    Args:
+        payoffs (np.ndarray): Payoffs of unit stakes of shape (events, results, legs).
+
+    Returns:
+        tuple: The minimum payouts per unit staked of shape (events,), NaN where no stakes are valid, and the stakes
+            of shape (events, legs).
+    """
+    n_events, n_results, n_legs = payoffs.shape
+    best_payout = np.full(n_events, np.nan)
+    best_stakes = np.full((n_events, n_legs), np.nan)
+
+    for binding in itertools.combinations(range(n_results), n_legs):
+        # Solve payoffs[binding] @ stakes - payout = 0 and sum(stakes) = 1 for the stakes and the payout
+        system = np.zeros((n_events, n_legs + 1, n_legs + 1))
+        system[:, :n_legs, :n_legs] = payoffs[:, binding, :]
+        system[:, :n_legs, n_legs] = -1
+        system[:, n_legs, :n_legs] = 1
+        singular = np.abs(np.linalg.det(system)) < TOLERANCE
+        system[singular] = np.eye(n_legs + 1)
+        right_hand_side = np.zeros((n_events, n_legs + 1, 1))
+        right_hand_side[:, n_legs] = 1
+        solution = np.linalg.solve(system, right_hand_side)[..., 0]
+
+        stakes = np.clip(solution[:, :n_legs], 0, None)
+        payout = np.einsum('erl,el->er', payoffs, stakes).min(axis=1)
+        valid = ~singular & (solution[:, :n_legs] >= -TOLERANCE).all(axis=1)
+        valid &= payout >= solution[:, n_legs] - TOLERANCE
+        better = valid & ~(payout <= best_payout)
+        best_payout[better] = payout[better]
+        best_stakes[better] = stakes[better]
+    return best_payout, best_stakes
+
+
+def find_cross_market_arbitrage(best, total_investment, coverage=OUTCOME_COVERAGE):
+    """
+    Finds surebets combining bets of different markets on the full-time result, e.g. double chance 1X with an away
+    win or draw no bet home with a draw and an away win.
+
+    Bets settling alike, such as draw no bet and the Asian handicap 0, are reduced to the best price among them, so
+    the number of combinations does not grow with the number of markets and bookmakers. Combinations in which a leg
+    pays no more than another leg for every result are dominated by the combination without it and are skipped before
+    solving. Every combination is then evaluated for all events in one batch, and the best one of each event is kept.
+
+    Args:
+        best (pd.DataFrame): Best prices as returned by `best_prices`.
+        total_investment (float): Amount spread over the legs of every opportunity.
+        coverage (dict, optional): Settlement by (market, line, outcome). Defaults to `OUTCOME_COVERAGE`.
+
+    Returns:
+        pd.DataFrame: One row per leg of the best surebet of every event that has one, with the columns 'match_id',
+            'combination', 'market', 'line', 'outcome', 'bookmaker', 'price', 'total_imp_prob', 'arb_profit_margin',
+            'stake' and 'payout', the guaranteed minimum payout.
+    """
+    columns = ['match_id', 'combination', 'market', 'line', 'outcome', 'bookmaker', 'price', 'total_imp_prob',
+               'arb_profit_margin', 'stake', 'payout']
+
+    # Attach the settlement pattern to the bets, a line of -0.0 matching the line 0
+    bets = best.astype({'market': object, 'outcome': object}).assign(line=best['line'].astype(float) + 0.0)
+    bets = bets.merge(coverage_table(coverage), on=['market', 'line', 'outcome'])
+    bets = best_prices(bets, key=['match_id', 'pattern'])
+    if bets.empty:
+        return pd.DataFrame(columns=columns)
+
+    patterns = sorted(bets['pattern'].unique())
+    events = bets['match_id'].unique()
+    event_codes = pd.Index(events).get_indexer(bets['match_id'])
+    pattern_codes = pd.Index(patterns).get_indexer(bets['pattern'])
+    prices = np.full((len(events), len(patterns)), np.nan)
+    prices[event_codes, pattern_codes] = bets['price'].to_numpy(dtype=float)
+    rows = np.full((len(events), len(patterns)), -1)
+    rows[event_codes, pattern_codes] = np.arange(len(bets))
+
+    best_payout = np.full(len(events), np.nan)
+    best_combination = np.full(len(events), -1)
+    best_stakes = np.full((len(events), len(RESULTS)), np.nan)
+    combinations = covering_combinations(patterns)
+    for number, combination in enumerate(combinations):
+        legs = pd.Index(patterns).get_indexer(combination)
+        quoted = ~np.isnan(prices[:, legs]).any(axis=1)
+        payoffs = payoff_matrices(prices[quoted][:, legs], combination)
+
+        # A leg paying no more than another leg for every result adds nothing to the smaller combination
+        dominated = np.zeros(len(payoffs), dtype=bool)
+        for leg, other in itertools.permutations(range(len(legs)), 2):
+            dominated |= (payoffs[:, :, leg] <= payoffs[:, :, other]).all(axis=1)
+        candidates = np.flatnonzero(quoted)[~dominated]
+
+        payout, stakes = max_min_payout(payoffs[~dominated])
+        # Keep the smaller combination unless the larger one pays noticeably more
+        better = ~(payout <= best_payout[candidates] + TOLERANCE) & ~np.isnan(payout)
+        best_payout[candidates[better]] = payout[better]
+        best_combination[candidates[better]] = number
+        best_stakes[candidates[better]] = np.nan
+        best_stakes[candidates[better], :len(legs)] = stakes[better]
+
+    legs = []
+    for event in np.flatnonzero(best_payout > 1 + TOLERANCE):
+        combination = combinations[best_combination[event]]
+        leg = bets.iloc[rows[event, pd.Index(patterns).get_indexer(combination)]]
+        leg = leg.assign(combination=' + '.join(f"{market} {outcome}" if line != line else
+                                                f"{market} {line:+g} {outcome}"
+                                                for market, line, outcome in zip(leg['market'], leg['line'],
+                                                                                 leg['outcome'])),
+                         total_imp_prob=1 / best_payout[event],
+                         arb_profit_margin=(1 - 1 / best_payout[event]) * 100,
+                         stake=best_stakes[event, :len(combination)] * total_investment,
+                         payout=best_payout[event] * total_investment)
+        legs.append(leg)
+
+    if not legs:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(legs, ignore_index=True)[columns]
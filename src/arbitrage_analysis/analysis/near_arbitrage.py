@@ -0,0 +1,198 @@
+import heapq
+import itertools
+import math
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.arbitrage_scanner import MARKET_OUTCOMES, price_matrix, scan_instances
+from arbitrage_analysis.data_management.task_retrieve_odds_rapid_api import MAX_PRICE
+from arbitrage_analysis.data_management.task_seperate_best_odds import best_prices
+
+# Largest total implied probability of the market instances kept as near-arbitrage, i.e. a margin within 0.5%
+MAX_NEAR_ARB_TOTAL = 1.005
+
+# Markets in which two bets on different lines can both win, with the outcomes paired into a middle. A middle pairs
+# a lower over line with a higher under line, or a home handicap with an away handicap leaving a margin to both.
+MIDDLE_MARKETS = {'totals': ('over', 'under'), 'asian_handicap': ('home', 'away')}
+
+# Columns of the middles, with '_a' for the bet on the first outcome of a pair and '_b' for the one on the second
+MIDDLE_COLUMNS = ['match_id', 'market', 'line_a', 'outcome_a', 'bookmaker_a', 'price_a', 'line_b', 'outcome_b',
+                  'bookmaker_b', 'price_b', 'width', 'total_imp_prob']
+
+
+class TopK:
+    """
+    Bounded collection of the k items with the smallest scores.
+
+    The items are kept in a heap whose root is the worst item kept, so that an item is admitted or rejected in
+    O(log k) time and memory stays constant however many items are pushed.
+
+    Args:
+        k (int): Number of items kept.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    @property
+    def threshold(self):
+        """Score an item has to beat to be admitted, infinite until k items are kept."""
+        return -self._heap[0][0] if len(self._heap) >= self.k else math.inf
+
+    def push(self, score, item):
+        # Among equal scores the earlier item stays
+        entry = (-score, -next(self._sequence), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def push_many(self, scores, items):
+        """
+        Pushes many items, of which only the k best and those beating the current threshold are considered.
+
+        Args:
+            scores (np.ndarray): Scores of the items.
+            items (callable): Returns the item at a position of `scores`, so that only admitted items are built.
+        """
+        candidates = np.flatnonzero(scores < self.threshold)
+        if len(candidates) > self.k:
+            candidates = candidates[np.argpartition(scores[candidates], self.k - 1)[:self.k]]
+        for position in candidates[np.argsort(scores[candidates], kind='stable')]:
+            self.push(float(scores[position]), items(position))
+
+    def items(self):
+        """Returns the (score, item) pairs kept, best first."""
+        return [(-score, item) for score, _, item in sorted(self._heap, reverse=True)]
+
+
+def find_middles(best, markets=MIDDLE_MARKETS):
+    """
+    Pairs the best prices of different lines of a market into middles, where one range of results wins both bets.
+
+    A bet on over L wins in full from L + 0.5 goals, and on under L up to L - 0.5 goals, so over L1 and under L2
+    both win for the goal counts between them. Likewise the home side of an Asian handicap line h wins in full for a
+    home margin of at least 0.5 - h, and the away side of line h for a margin of at most -h - 0.5.
+
+    Args:
+        best (pd.DataFrame): Best prices as returned by `best_prices`.
+        markets (dict, optional): Paired outcomes by market. Defaults to `MIDDLE_MARKETS`.
+
+    Returns:
+        pd.DataFrame: One row per middle with the columns of `MIDDLE_COLUMNS`, 'width' being the number of goal
+            counts or margins winning both bets, and 'total_imp_prob', which with proportional stakes pays
+            1 / 'total_imp_prob' per unit staked outside the middle and twice that inside.
+    """
+    middles = []
+    for market, (first, second) in markets.items():
+        quotes = best[best['market'] == market]
+        legs = ['match_id', 'line', 'outcome', 'bookmaker', 'price']
+        pairs = pd.merge(quotes.loc[quotes['outcome'] == first, legs], quotes.loc[quotes['outcome'] == second, legs],
+                         on='match_id', suffixes=('_a', '_b'))
+        line_a, line_b = pairs['line_a'].to_numpy(dtype=float), pairs['line_b'].to_numpy(dtype=float)
+        if market == 'totals':
+            low, high = line_a + 0.5, line_b - 0.5
+        else:
+            low, high = 0.5 - line_a, -line_b - 0.5
+        pairs['width'] = (np.floor(high) - np.ceil(low) + 1).astype(int)
+        pairs['total_imp_prob'] = 1 / pairs['price_a'].astype(float) + 1 / pairs['price_b'].astype(float)
+        middles.append(pairs[pairs['width'] > 0].assign(market=market))
+
+    middles = [frame for frame in middles if not frame.empty]
+    if not middles:
+        return pd.DataFrame(columns=MIDDLE_COLUMNS)
+    return pd.concat(middles, ignore_index=True)[MIDDLE_COLUMNS]
+
+
+class NearArbitrageScanner:
+    """
+    Streaming scanner keeping the market instances closest to arbitrage and the cheapest middles across all events
+    and markets.
+
+    Quotes are added in chunks of whole events. The best prices of each chunk are scanned at once, and only the k
+    best near-arbitrages, with a total implied probability up to `max_total`, and the k best middles are kept in
+    `TopK` heaps, so memory stays constant however many quotes pass through. Prices above `max_price` are left out
+    before the best prices are selected, as a single scraping glitch would otherwise top the ranking.
+
+    Args:
+        k (int, optional): Number of near-arbitrages and of middles kept. Defaults to 100.
+        max_total (float, optional): Largest total implied probability of a near-arbitrage. Defaults to
+            `MAX_NEAR_ARB_TOTAL`.
+        markets (dict, optional): Outcomes by market of the markets scanned. Defaults to `MARKET_OUTCOMES`.
+        max_price (float, optional): Highest price taken into account. Defaults to `MAX_PRICE`, the bound of the
+            Rapid API extractor.
+    """
+
+    def __init__(self, k=100, max_total=MAX_NEAR_ARB_TOTAL, markets=MARKET_OUTCOMES, max_price=MAX_PRICE):
+        self.max_total = max_total
+        self.markets = markets
+        self.max_price = max_price
+        self._near_arbitrage = TopK(k)
+        self._middles = TopK(k)
+
+    def add(self, quotes):
+        """
+        Scans a chunk of quotes.
+
+        Args:
+            quotes (pd.DataFrame): Long quote table holding all quotes of the events it contains, as returned by
+                `extract_markets_rapid_api` or `event_chunks`.
+        """
+        best = best_prices(quotes[quotes['price'].to_numpy(dtype=float) <= self.max_price])
+        for market, outcomes in self.markets.items():
+            instances, prices, bookmakers = price_matrix(best, market, outcomes)
+            total_imp_prob = scan_instances(instances, prices, market)['total_imp_prob']
+            scores = np.where(total_imp_prob <= self.max_total, total_imp_prob, np.inf)
+            self._near_arbitrage.push_many(scores, lambda row: (
+                instances['match_id'].iat[row], market, instances['line'].iat[row],
+                tuple(zip(outcomes, bookmakers[row], prices[row]))))
+
+        middles = find_middles(best)
+        self._middles.push_many(middles['total_imp_prob'].to_numpy(dtype=float),
+                                lambda row: tuple(middles.iloc[row]))
+
+    def near_arbitrage(self):
+        """
+        Returns the near-arbitrages kept, closest to arbitrage first.
+
+        Returns:
+            pd.DataFrame: One row per leg with the columns 'rank', 'match_id', 'market', 'line', 'outcome',
+                'bookmaker', 'price', 'total_imp_prob' and 'arb_profit_margin', negative for near-arbitrages.
+        """
+        rows = [(rank, match_id, market, line, outcome, bookmaker, price, total, (1 - total) * 100)
+                for rank, (total, (match_id, market, line, legs)) in enumerate(self._near_arbitrage.items())
+                for outcome, bookmaker, price in legs]
+        return pd.DataFrame(rows, columns=['rank', 'match_id', 'market', 'line', 'outcome', 'bookmaker', 'price',
+                                           'total_imp_prob', 'arb_profit_margin'])
+
+    def middles(self):
+        """
+        Returns the middles kept, cheapest first.
+
+        Returns:
+            pd.DataFrame: One row per middle with the columns of `find_middles`.
+        """
+        return pd.DataFrame([item for _, item in self._middles.items()], columns=MIDDLE_COLUMNS)
+
+
+def event_chunks(quotes, events_per_chunk=1000):
+    """
+    Splits a quote table into chunks holding all quotes of a number of events.
+
+    Args:
+        quotes (pd.DataFrame): Long quote table with a 'match_id' column.
+        events_per_chunk (int, optional): Number of events per chunk. Defaults to 1000.
+
+    Yields:
+        pd.DataFrame: The quotes of the events of a chunk.
+    """
+    chunk = quotes.groupby('match_id', sort=False, observed=True).ngroup().to_numpy() // events_per_chunk
+    order = np.argsort(chunk, kind='stable')
+    bounds = np.searchsorted(chunk[order], np.arange(chunk.max() + 2 if len(chunk) else 0))
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        yield quotes.iloc[order[start:end]]
@@ -0,0 +1,206 @@
+import heapq
+import itertools
+import math
+
+# Stale heap entries tolerated per live quote before a heap is rebuilt
+COMPACTION_FACTOR = 2
+
+
+def _line(line):
+    """Uses None for markets without a line, as NaN keys never compare equal."""
+    return None if line is None or line != line else float(line)
+
+
+class Quote:
+    """
+    Price of one bookmaker for one outcome. Quotes order by descending price and, for equal prices, by the order in
+    which they were quoted, so that the smallest quote is the best one.
+    """
+
+    __slots__ = ('bookmaker', 'price', 'last_update', 'sequence')
+
+    def __init__(self, bookmaker, price, last_update, sequence):
+        self.bookmaker = bookmaker
+        self.price = price
+        self.last_update = last_update
+        self.sequence = sequence
+
+    def __lt__(self, other):
+        return self.price > other.price or (self.price == other.price and self.sequence < other.sequence)
+
+    def __repr__(self):
+        return f"Quote({self.bookmaker!r}, {self.price}, {self.last_update!r})"
+
+
+class OutcomeBook:
+    """
+    Prices of all bookmakers for one outcome, kept in a heap with lazy deletion.
+
+    An update pushes a new quote and leaves the replaced one in the heap, where it is skipped once it reaches the
+    top, so upserts and removals take O(log n) time. The heap is rebuilt when stale entries outnumber the live quotes
+    `COMPACTION_FACTOR` times, which bounds its size.
+    """
+
+    __slots__ = ('_heap', '_quotes')
+
+    def __init__(self):
+        self._heap = []
+        self._quotes = {}
+
+    def __len__(self):
+        return len(self._quotes)
+
+    def upsert(self, quote):
+        self._quotes[quote.bookmaker] = quote
+        heapq.heappush(self._heap, quote)
+        self._compact()
+
+    def remove(self, bookmaker):
+        if self._quotes.pop(bookmaker, None) is not None:
+            self._compact()
+
+    def _is_live(self, quote):
+        return self._quotes.get(quote.bookmaker) is quote
+
+    def _compact(self):
+        if len(self._heap) > COMPACTION_FACTOR * len(self._quotes) + 8:
+            self._heap = list(self._quotes.values())
+            heapq.heapify(self._heap)
+
+    def best(self):
+        heap = self._heap
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def depth(self, k):
+        """Returns the k best quotes in O(n log k) time without changing the heap."""
+        return heapq.nsmallest(k, (quote for quote in self._heap if self._is_live(quote)))
+
+
+class OrderBook:
+    """
+    In-memory book of the live quotes of all bookmakers, giving the best price of every outcome after each change.
+
+    Quotes are kept per (event, market, line, outcome) in an `OutcomeBook`, so that a single quote is inserted,
+    updated or removed in O(log n) time for n bookmakers quoting the outcome, instead of recomputing the best odds of
+    the whole quote table. Besides the best price, the book gives the runner-up prices, to fall back on when the best
+    bookmaker rejects or limits a bet, and the sum of the implied probabilities of the best prices of a market, which
+    is below 1 for an arbitrage opportunity. Quotes are slot-based objects, and a quote takes about 160 bytes
+    including its heap and dict entries, so a million live quotes fit in about 160 MB.
+    """
+
+    def __init__(self):
+        self._markets = {}
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return sum(len(book) for outcomes in self._markets.values() for book in outcomes.values())
+
+    def upsert(self, event_id, market, line, outcome, bookmaker, price, last_update=None):
+        """
+        Inserts or updates the price of a bookmaker for an outcome.
+
+        Args:
+            event_id (str): The event.
+            market (str): The market, e.g. 'h2h' or 'totals'.
+            line (float or None): The line of the market, None or NaN for markets without one.
+            outcome (str): The outcome, e.g. 'home' or 'over'.
+            bookmaker (str): The bookmaker.
+            price (float): The decimal odds.
+            last_update (str or pd.Timestamp, optional): Time of the last update of the price.
+        """
+        outcomes = self._markets.setdefault((event_id, market, _line(line)), {})
+        book = outcomes.get(outcome)
+        if book is None:
+            book = outcomes[outcome] = OutcomeBook()
+        book.upsert(Quote(bookmaker, float(price), last_update, next(self._sequence)))
+
+    def remove(self, event_id, market, line, outcome, bookmaker):
+        """
+        Removes the price of a bookmaker for an outcome, if there is one.
+
+        Args:
+            event_id (str): The event.
+            market (str): The market.
+            line (float or None): The line of the market, None or NaN for markets without one.
+            outcome (str): The outcome.
+            bookmaker (str): The bookmaker.
+        """
+        key = (event_id, market, _line(line))
+        outcomes = self._markets.get(key, {})
+        book = outcomes.get(outcome)
+        if book is None:
+            return
+        book.remove(bookmaker)
+        if not book:
+            del outcomes[outcome]
+            if not outcomes:
+                del self._markets[key]
+
+    def apply_changes(self, changes):
+        """
+        Applies a change log as returned by `ingest_snapshot` or `diff_quote_snapshots`.
+
+        Args:
+            changes (pd.DataFrame): Changes with the columns 'match_id', 'bookmaker', 'market', 'line', 'outcome',
+                'price' and 'change', and optionally 'last_update'.
+        """
+        last_updates = changes['last_update'] if 'last_update' in changes else itertools.repeat(None)
+        for event_id, bookmaker, market, line, outcome, price, change, last_update in zip(
+                changes['match_id'], changes['bookmaker'], changes['market'], changes['line'], changes['outcome'],
+                changes['price'], changes['change'], last_updates):
+            if change == 'delete':
+                self.remove(event_id, market, line, outcome, bookmaker)
+            else:
+                self.upsert(event_id, market, line, outcome, bookmaker, price, last_update)
+
+    def best(self, event_id, market, line, outcome):
+        """
+        Returns the best quote of an outcome.
+
+        Returns:
+            Quote or None: The quote with the highest price, the earliest one among equal prices, or None if no
+                bookmaker quotes the outcome.
+        """
+        book = self._markets.get((event_id, market, _line(line)), {}).get(outcome)
+        return book.best() if book is not None else None
+
+    def depth(self, event_id, market, line, outcome, k=3):
+        """
+        Returns the k best quotes of an outcome, best first.
+
+        Returns:
+            list of Quote: Up to k quotes.
+        """
+        book = self._markets.get((event_id, market, _line(line)), {}).get(outcome)
+        return book.depth(k) if book is not None else []
+
+    def best_prices(self, event_id, market, line=None):
+        """
+        Returns the best quote of every outcome of a market.
+
+        Returns:
+            dict: Outcome -> best Quote.
+        """
+        outcomes = self._markets.get((event_id, market, _line(line)), {})
+        return {outcome: book.best() for outcome, book in outcomes.items()}
+
+    def implied_probability(self, event_id, market, line=None, n_outcomes=None):
+        """
+        Returns the sum of the implied probabilities of the best prices of a market.
+
+        Args:
+            event_id (str): The event.
+            market (str): The market.
+            line (float or None, optional): The line of the market. Defaults to None.
+            n_outcomes (int, optional): Number of outcomes of the market. If fewer outcomes are quoted, the sum is
+                NaN, as an incomplete market cannot be covered.
+
+        Returns:
+            float: The sum, below 1 for an arbitrage opportunity. NaN if no or too few outcomes are quoted.
+        """
+        best = self.best_prices(event_id, market, line)
+        if not best or (n_outcomes is not None and len(best) < n_outcomes):
+            return math.nan
+        return sum(1 / quote.price for quote in best.values())
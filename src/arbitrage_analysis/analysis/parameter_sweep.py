@@ -0,0 +1,179 @@
+import itertools
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.arbitrage_scanner import scan_arbitrage
+from arbitrage_analysis.analysis.task_calculate_arbitrage import BEST_ODDS_COLUMNS
+from arbitrage_analysis.analysis.task_estimate_yield import compound_yields
+from arbitrage_analysis.analysis.task_odds_kernel_density_estimate import odds_density
+from arbitrage_analysis.data_management.quote_age import quote_ages
+from arbitrage_analysis.data_management.task_seperate_best_odds import H2H_ODDS_COLUMNS, MATCH_KEY, select_best_odds
+
+# Number of points where the KDE of the odds is evaluated, as in the KDE task
+KDE_GRIDSIZE = 1000
+
+# Inputs of the sweep in a worker process, attached once by `_attach_inputs`, and the densities computed so far by
+# bandwidth, which the configurations of a worker share
+_inputs = None
+_densities = {}
+
+
+def parameter_grid(grid):
+    """
+    Expands a grid into all combinations of its values.
+
+    Args:
+        grid (dict): Values by parameter.
+
+    Returns:
+        list of dict: One dict of parameters per combination, the last parameter varying fastest.
+    """
+    return [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+
+def sweep_inputs(all_odds, max_quote_ages, as_of=None):
+    """
+    Extracts the arrays the configurations of a sweep are evaluated on.
+
+    The best odds are selected once per maximum quote age from the quotes not older than it, as in
+    `arbitrage_by_quote_age`, so that a stale quote gives way to the best fresh one instead of dropping its match.
+
+    Args:
+        all_odds (pd.DataFrame): Merged odds of all bookmakers as saved by `standardize_team_names_and_merge`, with
+            the columns 'home_win_odds', 'draw_odds' and 'away_win_odds', and optionally 'last_update'.
+        max_quote_ages (list of float or None): Maximum quote ages in seconds the sweep is run for, None for no
+            limit. Without update times every limit leaves no quote.
+        as_of (str or pd.Timestamp, optional): Time at which the quote ages are taken. Defaults to the latest update
+            time of `all_odds`, i.e. the moment the newest quote was captured.
+
+    Returns:
+        dict: 'odds', the best odds of shape (maximum quote ages, matches, 3), NaN for matches without fresh quotes,
+            'max_quote_ages' with NaN for no limit, 'rounds', the index of the commence time of every match among the
+            sorted commence times, and 'all_odds', the odds of all bookmakers for the KDE.
+    """
+    # Take the ages once against the same reference time for all limits
+    if 'last_update' in all_odds:
+        ages = quote_ages(all_odds['last_update'], as_of)
+    else:
+        ages = np.full(len(all_odds), np.nan)
+
+    matches = select_best_odds(all_odds)
+    key = [column for column in MATCH_KEY if column in matches]
+    odds = np.empty((len(max_quote_ages), len(matches), len(BEST_ODDS_COLUMNS)))
+    for position, max_age in enumerate(max_quote_ages):
+        best_odds = matches if max_age is None else select_best_odds(all_odds[ages <= max_age])
+        best_odds = matches[key].merge(best_odds[key + BEST_ODDS_COLUMNS], on=key, how='left')
+        odds[position] = best_odds[BEST_ODDS_COLUMNS].to_numpy(dtype=float)
+
+    rounds, _ = pd.factorize(pd.to_datetime(matches['commence_time'], utc=True), sort=True)
+    prices = all_odds[list(H2H_ODDS_COLUMNS.values())].to_numpy(dtype=float).ravel(order='F')
+    return {
+        'odds': odds,
+        'max_quote_ages': np.array([np.nan if max_age is None else max_age for max_age in max_quote_ages],
+                                   dtype=float),
+        'rounds': rounds.astype(np.int64),
+        'all_odds': prices[~np.isnan(prices)],
+    }
+
+
+def evaluate_parameters(inputs, total_investment, initial_investment, bandwidth, min_margin, max_quote_age,
+                        densities=None):
+    """
+    Evaluates one configuration of the analyses: the arbitrage opportunities with a margin of at least `min_margin`
+    among the best odds of the quotes not older than `max_quote_age`, the growth of the initial investment
+    reinvested in the opportunity of the highest yield of every commence time, and the KDE of all odds.
+
+    Args:
+        inputs (dict): Arrays as returned by `sweep_inputs`.
+        total_investment (float): Amount staked on every opportunity.
+        initial_investment (float): Amount compounded over the opportunities.
+        bandwidth (float): Bandwidth of the KDE.
+        min_margin (float): Smallest arbitrage profit margin in percent.
+        max_quote_age (float or None): Maximum age in seconds of the quotes, None for no limit. It has to be one of
+            the maximum quote ages of `inputs`.
+        densities (dict, optional): KDEs by bandwidth computed before, which are reused and extended.
+
+    Returns:
+        dict: 'opportunities', 'mean_margin', 'total_profit' with `total_investment` staked on each,
+            'final_investment', 'kde_mode', the odds of the highest density, and 'kde_at_arbitrage', the mean density
+            at the odds of the legs of the opportunities.
+
+    Raises:
+        ValueError: If `inputs` hold no best odds for `max_quote_age`.
+    """
+    limits = inputs['max_quote_ages']
+    positions = np.flatnonzero(np.isnan(limits) if max_quote_age is None else limits == max_quote_age)
+    if not len(positions):
+        raise ValueError(f"No best odds selected for a maximum quote age of {max_quote_age}")
+    odds = inputs['odds'][positions[0]]
+    scan = scan_arbitrage(odds, total_investment)
+    selected = (scan['total_imp_prob'] < 1) & (scan['arb_profit_margin'] >= min_margin)
+
+    # Highest yield per commence time, in the order of the commence times
+    profit = scan['payout'][selected] - total_investment
+    n_rounds = inputs['rounds'].max() + 1 if len(inputs['rounds']) else 0
+    yields = np.full(n_rounds, -np.inf)
+    np.maximum.at(yields, inputs['rounds'][selected], profit / total_investment * 100)
+    growth = compound_yields(yields[np.isfinite(yields)], initial_investment)
+
+    densities = {} if densities is None else densities
+    if bandwidth not in densities:
+        densities[bandwidth] = odds_density(inputs['all_odds'], bandwidth, KDE_GRIDSIZE)
+    grid, density = densities[bandwidth]
+    leg_odds = odds[selected].ravel()
+
+    return {
+        'opportunities': int(selected.sum()),
+        'mean_margin': scan['arb_profit_margin'][selected].mean() if selected.any() else np.nan,
+        'total_profit': profit.sum(),
+        'final_investment': growth[-1] if len(growth) else float(initial_investment),
+        'kde_mode': grid[np.argmax(density)],
+        'kde_at_arbitrage': np.interp(leg_odds, grid, density).mean() if len(leg_odds) else np.nan,
+    }
+
+
+def _attach_inputs(paths):
+    """Maps the shared input arrays into a worker process, read-only and without copying them."""
+    global _inputs
+    _inputs = {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+    _densities.clear()
+
+
+def _evaluate_shared(parameters):
+    return evaluate_parameters(_inputs, densities=_densities, **parameters)
+
+
+def run_sweep(inputs, grid, max_workers=None):
+    """
+    Evaluates every configuration of a parameter grid on the same inputs in a pool of processes.
+
+    The input arrays are written once to memory-mapped files, which every worker maps read-only when it starts, so
+    that only the parameters and the results pass between the processes. Each worker computes the KDE of a bandwidth
+    once for all its configurations.
+
+    Args:
+        inputs (dict): Arrays as returned by `sweep_inputs`.
+        grid (dict): Values by parameter of `evaluate_parameters`, e.g. `SWEEP_GRID`.
+        max_workers (int, optional): Number of processes. Defaults to the number of CPUs.
+
+    Returns:
+        pd.DataFrame: One row per configuration with the parameters and the results of `evaluate_parameters`.
+    """
+    configurations = parameter_grid(grid)
+    max_workers = max_workers or os.cpu_count() or 1
+    # Contiguous runs of configurations per task, within which a worker reuses the KDE of a bandwidth
+    chunksize = max(1, len(configurations) // (4 * max_workers))
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {}
+        for name, array in inputs.items():
+            paths[name] = Path(directory) / f"{name}.npy"
+            np.save(paths[name], np.ascontiguousarray(array))
+        with ProcessPoolExecutor(max_workers, initializer=_attach_inputs, initargs=(paths,)) as executor:
+            results = list(executor.map(_evaluate_shared, configurations, chunksize=chunksize))
+
+    return pd.DataFrame([{**parameters, **result} for parameters, result in zip(configurations, results)])
@@ -0,0 +1,238 @@
+import bisect
+import itertools
+import math
+import time
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.arbitrage_scanner import (LINE_MARKETS, MARKET_OUTCOMES, line_thresholds,
+                                                           scan_line_market)
+from arbitrage_analysis.analysis.order_book import OrderBook, _line
+
+# Upper bounds in nanoseconds of the latency histogram buckets, 20 per decade from 100 ns to 10 s, so that a
+# percentile read from the histogram is at most 12% above the exact one
+LATENCY_BUCKETS = np.logspace(2, 10, 161).tolist()
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies in logarithmic buckets, taking constant memory however many latencies are recorded.
+    """
+
+    def __init__(self):
+        self.counts = np.zeros(len(LATENCY_BUCKETS) + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, nanoseconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, nanoseconds)] += 1
+        self.count += 1
+        self.total += nanoseconds
+        self.max = max(self.max, nanoseconds)
+
+    def percentile(self, q):
+        """
+        Returns a percentile of the recorded latencies.
+
+        Args:
+            q (float): The percentile, between 0 and 100.
+
+        Returns:
+            float: The upper bound in nanoseconds of the bucket holding the percentile, at most the largest latency
+                recorded. NaN if nothing was recorded.
+        """
+        if not self.count:
+            return math.nan
+        bucket = int(np.searchsorted(np.cumsum(self.counts), q / 100 * self.count))
+        return min(LATENCY_BUCKETS[bucket], self.max) if bucket < len(LATENCY_BUCKETS) else self.max
+
+    def summary(self):
+        """
+        Summarizes the latencies.
+
+        Returns:
+            dict: 'count' and the 'mean', 'p50', 'p99' and 'max' latency in microseconds.
+        """
+        return {
+            'count': self.count,
+            'mean': self.total / self.count / 1e3 if self.count else math.nan,
+            'p50': self.percentile(50) / 1e3,
+            'p99': self.percentile(99) / 1e3,
+            'max': self.max / 1e3 if self.count else math.nan,
+        }
+
+
+class Opportunity:
+    """
+    Arbitrage opportunity on one market instance, i.e. the best quote of every outcome at the time it was detected.
+    """
+
+    __slots__ = ('match_id', 'market', 'line', 'legs', 'total_imp_prob', 'detected_at')
+
+    def __init__(self, match_id, market, line, legs, total_imp_prob, detected_at):
+        self.match_id = match_id
+        self.market = market
+        self.line = line
+        self.legs = legs
+        self.total_imp_prob = total_imp_prob
+        self.detected_at = detected_at
+
+    @property
+    def arb_profit_margin(self):
+        return (1 - self.total_imp_prob) * 100
+
+    def __repr__(self):
+        return (f"Opportunity({self.match_id!r}, {self.market!r}, {self.line!r}, "
+                f"margin={self.arb_profit_margin:.2f}%)")
+
+
+class ArbitrageEngine:
+    """
+    Detects arbitrage opportunities as quote updates arrive, instead of recomputing the best odds of all events.
+
+    Every update changes one quote in an `OrderBook`, after which only the market instance of the update is
+    re-evaluated: the implied probabilities of the best prices of its outcomes are summed, settling the pushes of
+    `LINE_MARKETS` with `scan_line_market`, and an opportunity is emitted as soon as the sum falls below 1. An open
+    opportunity is emitted again only when its best quotes change, and closed when the sum rises to 1 or above. The
+    time from receiving an update to the end of its evaluation is recorded in `latency`, and for updates raising an
+    alert in `alert_latency`.
+
+    Args:
+        markets (dict, optional): Outcomes by market of the markets to evaluate. Defaults to `MARKET_OUTCOMES`.
+            Updates of other markets are kept in the book only.
+        on_opportunity (callable, optional): Called with every emitted `Opportunity`.
+        clock (callable, optional): Monotonic clock in nanoseconds. Defaults to `time.perf_counter_ns`.
+    """
+
+    def __init__(self, markets=MARKET_OUTCOMES, on_opportunity=None, clock=time.perf_counter_ns):
+        self.book = OrderBook()
+        self.markets = markets
+        self.on_opportunity = on_opportunity
+        self.clock = clock
+        self.latency = LatencyHistogram()
+        self.alert_latency = LatencyHistogram()
+        self.open_opportunities = {}
+
+    def process(self, match_id, bookmaker, market, line, outcome, price, change='update', last_update=None,
+                received_at=None):
+        """
+        Applies one quote update and re-evaluates its market instance.
+
+        Args:
+            match_id (str): The event.
+            bookmaker (str): The bookmaker.
+            market (str): The market.
+            line (float or None): The line of the market, None or NaN for markets without one.
+            outcome (str): The outcome.
+            price (float): The decimal odds.
+            change (str, optional): 'insert', 'update' or 'delete'. Defaults to 'update'.
+            last_update (str or pd.Timestamp, optional): Time of the last update of the price.
+            received_at (int, optional): Time the update was received according to `clock`. Defaults to now.
+
+        Returns:
+            Opportunity or None: The opportunity emitted for this update, if any.
+        """
+        received_at = self.clock() if received_at is None else received_at
+        if change == 'delete':
+            self.book.remove(match_id, market, line, outcome, bookmaker)
+        else:
+            self.book.upsert(match_id, market, line, outcome, bookmaker, price, last_update)
+
+        opportunity = None
+        outcomes = self.markets.get(market)
+        if outcomes is not None:
+            opportunity = self._evaluate(match_id, market, line, outcomes, received_at)
+        self.latency.record(self.clock() - received_at)
+        return opportunity
+
+    def _evaluate(self, match_id, market, line, outcomes, received_at):
+        key = (match_id, market, _line(line))
+        best = self.book.best_prices(match_id, market, line)
+        quotes = [best.get(outcome) for outcome in outcomes]
+        total_imp_prob = math.nan if None in quotes else sum(1 / quote.price for quote in quotes)
+        if total_imp_prob < 1 and market in LINE_MARKETS:
+            # Pushes only lower the guaranteed payout, so they are settled once the sum is below 1
+            thresholds = line_thresholds(market, [math.nan if key[2] is None else key[2]])
+            scan = scan_line_market([[quote.price for quote in quotes]], thresholds)
+            total_imp_prob = float(scan['total_imp_prob'][0])
+
+        if not total_imp_prob < 1:
+            self.open_opportunities.pop(key, None)
+            return None
+
+        legs = tuple((outcome, quote.bookmaker, quote.price) for outcome, quote in zip(outcomes, quotes))
+        previous = self.open_opportunities.get(key)
+        if previous is not None and previous.legs == legs:
+            return None
+
+        opportunity = Opportunity(match_id, market, key[2], legs, total_imp_prob, self.clock())
+        self.open_opportunities[key] = opportunity
+        self.alert_latency.record(opportunity.detected_at - received_at)
+        if self.on_opportunity is not None:
+            self.on_opportunity(opportunity)
+        return opportunity
+
+    def process_changes(self, changes):
+        """
+        Applies a change log row by row, as returned by `ingest_snapshot` or `OddsHistoryStore.changes`.
+
+        Args:
+            changes (pd.DataFrame): Changes with the columns 'match_id', 'bookmaker', 'market', 'line', 'outcome',
+                'price' and 'change', and optionally 'last_update'.
+
+        Returns:
+            list of Opportunity: The opportunities emitted.
+        """
+        last_updates = changes['last_update'] if 'last_update' in changes else itertools.repeat(None)
+        emitted = []
+        for match_id, bookmaker, market, line, outcome, price, change, last_update in zip(
+                changes['match_id'], changes['bookmaker'], changes['market'], changes['line'], changes['outcome'],
+                changes['price'], changes['change'], last_updates):
+            opportunity = self.process(match_id, bookmaker, market, line, outcome, price, change, last_update)
+            if opportunity is not None:
+                emitted.append(opportunity)
+        return emitted
+
+
+def opportunities_table(opportunities):
+    """
+    Lists emitted opportunities with one row per leg.
+
+    Args:
+        opportunities (list of Opportunity): The opportunities.
+
+    Returns:
+        pd.DataFrame: The columns 'match_id', 'market', 'line', 'outcome', 'bookmaker', 'price', 'total_imp_prob'
+            and 'arb_profit_margin'.
+    """
+    return pd.DataFrame(
+        [(opportunity.match_id, opportunity.market, opportunity.line, outcome, bookmaker, price,
+          opportunity.total_imp_prob, opportunity.arb_profit_margin)
+         for opportunity in opportunities for outcome, bookmaker, price in opportunity.legs],
+        columns=['match_id', 'market', 'line', 'outcome', 'bookmaker', 'price', 'total_imp_prob',
+                 'arb_profit_margin'])
+
+
+def replay_changes(engine, changes):
+    """
+    Replays recorded quote changes through an engine in the order in which they were captured.
+
+    The latencies of all updates are recorded in the histograms of the engine.
+
+    Args:
+        engine (ArbitrageEngine): The engine.
+        changes (pd.DataFrame): A change log with a 'captured_at' column, e.g. the CSV written by `ingest_snapshot`
+            or the result of `OddsHistoryStore.changes`.
+
+    Returns:
+        pd.DataFrame: One row per snapshot with the columns 'captured_at', 'updates', 'opportunities', the number
+            emitted, and 'elapsed', the time in microseconds taken to process the snapshot.
+    """
+    rows = []
+    for captured_at, snapshot in changes.groupby('captured_at', sort=True):
+        start = engine.clock()
+        emitted = engine.process_changes(snapshot)
+        rows.append({'captured_at': captured_at, 'updates': len(snapshot), 'opportunities': len(emitted),
+                     'elapsed': (engine.clock() - start) / 1e3})
+    return pd.DataFrame(rows, columns=['captured_at', 'updates', 'opportunities', 'elapsed'])
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.arbitrage_scanner import (INSTANCE_KEY, LINE_MARKETS, MARKET_OUTCOMES,
+                                                           line_thresholds, settlement_payoffs)
+from arbitrage_analysis.analysis.cross_market import max_min_payout
+
+# Most stakes of the binding leg tried below its continuous optimum, in increments. Only opportunities with margins
+# of a few tenths of a percent need as many.
+MAX_INCREMENTS = 200
+
+# Tolerance against floating point error when rounding stakes to increments
+TOLERANCE = 1e-9
+
+
+def effective_odds(prices, commissions=0.0):
+    """
+    Computes the decimal odds left after a commission on the net winnings, as charged by betting exchanges.
+
+    Args:
+        prices (np.ndarray): Decimal odds.
+        commissions (float or np.ndarray, optional): Commission rates. Defaults to 0.
+
+    Returns:
+        np.ndarray: The payout per unit staked on a winning bet.
+    """
+    return 1 + (prices - 1) * (1 - commissions)
+
+
+def optimize_stakes(prices, total_investment, increment=1.0, max_stakes=None, commissions=None):
+    """
+    Allocates stakes in whole increments to the legs of many arbitrage opportunities at once, maximizing the profit
+    guaranteed by the minimum payout under per-bet stake caps and commissions.
+
+    Every leg of an opportunity wins for one outcome. Without rounding, the problem is a linear program whose optimum
+    pays the same amount for every outcome, as much as the total investment and the caps allow, so it needs no
+    solver. With rounding, the minimum payout comes from one binding leg, and every other leg best gets the smallest
+    stake paying at least as much, as more only costs. All binding legs and their stakes below the continuous optimum
+    are therefore evaluated in batches, down to where a lower payout cannot pay off any more, but at most
+    `MAX_INCREMENTS` increments.
+
+    Args:
+        prices (np.ndarray): Decimal odds of shape (opportunities, legs), NaN for missing legs of opportunities with
+            fewer outcomes.
+        total_investment (float): Maximum amount staked on every opportunity.
+        increment (float, optional): Smallest unit of a stake. Defaults to 1.
+        max_stakes (np.ndarray, optional): Maximum stake of every leg, of the shape of `prices`. Unlimited if None.
+        commissions (np.ndarray, optional): Commission rate on the net winnings of every leg, of the shape of
+            `prices`. None for no commission.
+
+    Returns:
+        dict: 'stakes' of the shape of `prices`, zero for missing legs and for opportunities without a guaranteed
+            profit, 'payout', the minimum payout, 'profit', the guaranteed profit, and 'profitable', a mask of the
+            opportunities with stakes.
+    """
+    prices = np.asarray(prices, dtype=float)
+    n_opportunities, n_legs = prices.shape
+    present = ~np.isnan(prices)
+    odds = effective_odds(np.where(present, prices, 1.0), 0.0 if commissions is None else commissions)
+    caps = np.full(prices.shape, np.inf) if max_stakes is None else np.where(present, max_stakes, np.inf)
+
+    # Equal payout of the continuous optimum, limited by the total investment and the caps
+    total_imp_prob = np.where(present, 1 / odds, 0).sum(axis=1)
+    level = np.minimum(total_investment / total_imp_prob, np.where(present, caps * odds, np.inf).min(axis=1))
+
+    # Lowering the payout by one increment of the binding leg loses about its payout times the margin, while the
+    # rounding of the other legs can save less than an increment each, and a few increments may be needed to meet the
+    # caps and the total investment after rounding up. This bounds how far below the optimum to search.
+    margin = 1 - total_imp_prob
+    best_stakes = np.zeros(prices.shape)
+    best_payout, best_profit = np.zeros(n_opportunities), np.zeros(n_opportunities)
+    for leg in range(n_legs):
+        with np.errstate(divide='ignore'):
+            window = ((n_legs - 1) / (odds[:, leg] * margin) + odds.max(axis=1) / odds[:, leg] + n_legs + 1)
+        window = np.where((margin > 0) & present[:, leg], np.minimum(np.ceil(window), MAX_INCREMENTS), 0)
+
+        # Search opportunities with similar windows together, in buckets of powers of two
+        buckets = np.ceil(np.log2(np.maximum(window, 1))).astype(int)
+        for bucket in np.unique(buckets[window > 0]):
+            rows = np.flatnonzero((buckets == bucket) & (window > 0))
+            stakes, payout, profit = _search_binding_leg(odds[rows], present[rows], caps[rows], level[rows], leg,
+                                                         int(window[rows].max()), total_investment, increment)
+            better = profit > best_profit[rows]
+            best_stakes[rows[better]] = stakes[better]
+            best_payout[rows[better]] = payout[better]
+            best_profit[rows[better]] = profit[better]
+
+    return {
+        'stakes': best_stakes,
+        'payout': best_payout,
+        'profit': best_profit,
+        'profitable': best_profit > 0,
+    }
+
+
+def _search_binding_leg(odds, present, caps, level, leg, window, total_investment, increment):
+    """
+    Evaluates the stakes of the binding leg from the largest one within the payout `level` down by `window`
+    increments, every other leg getting the smallest stake paying at least as much, and keeps the most profitable
+    feasible stakes of every opportunity.
+    """
+    counts = np.floor(level / odds[:, leg] / increment + TOLERANCE)[:, None] - np.arange(window)
+    payout = counts * increment * odds[:, leg, None]
+
+    # Shape (opportunities, counts, legs)
+    stakes = np.ceil(payout[:, :, None] / odds[:, None, :] / increment - TOLERANCE) * increment
+    stakes[:, :, leg] = counts * increment
+    stakes = np.where(present[:, None, :], stakes, 0)
+
+    total_stakes = stakes.sum(axis=2)
+    feasible = ((counts >= 1) & (stakes <= caps[:, None, :] + TOLERANCE).all(axis=2)
+                & (total_stakes <= total_investment + TOLERANCE))
+    profit = np.where(feasible, payout - total_stakes, -np.inf)
+
+    best = profit.argmax(axis=1)
+    rows = np.arange(len(odds))
+    return stakes[rows, best], payout[rows, best], profit[rows, best]
+
+
+def _settle_pushes(odds, thresholds, stakes, caps, total_investment, increment):
+    """
+    Settles the rounded stakes of 2-way opportunities on whole and quarter lines, whose pushes the binding legs of
+    `optimize_stakes` do not see. The rounded stakes are re-evaluated on all results, and the continuous stakes
+    maximizing the minimum payout, rounded down to increments within the caps, replace them where they pay more.
+    """
+    payoffs = settlement_payoffs(odds, thresholds)
+    _, unit_stakes = max_min_payout(payoffs)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.minimum(total_investment, np.where(unit_stakes > 0, caps / unit_stakes, np.inf).min(axis=1))
+    rounded = np.floor(np.nan_to_num(unit_stakes) * scale[:, None] / increment + TOLERANCE) * increment
+
+    candidates = np.stack([stakes, rounded])
+    payouts = np.einsum('erl,cel->cer', payoffs, candidates).min(axis=2)
+    profits = payouts - candidates.sum(axis=2)
+    better = (profits[1] > profits[0]).astype(int)
+    rows = np.arange(len(odds))
+    return candidates[better, rows], payouts[better, rows], profits[better, rows]
+
+
+def allocate_stakes(legs, total_investment, increment=1.0, max_stakes=None, commissions=None, key=INSTANCE_KEY):
+    """
+    Allocates rounded stakes to the legs of arbitrage opportunities, keeping the opportunities with a guaranteed
+    profit after the caps and commissions of their bookmakers.
+
+    Args:
+        legs (pd.DataFrame): One row per leg with the columns of `key`, 'bookmaker' and 'price', as returned by
+            `scan_markets`.
+        total_investment (float): Maximum amount staked on every opportunity.
+        increment (float, optional): Smallest unit of a stake. Defaults to 1.
+        max_stakes (dict, optional): Maximum stake of a bet by bookmaker. Bookmakers not listed are not limited.
+        commissions (dict, optional): Commission rate on the net winnings by bookmaker. Bookmakers not listed charge
+            none.
+        key (list of str, optional): Columns identifying an opportunity. Defaults to `INSTANCE_KEY`.
+
+    Returns:
+        pd.DataFrame: The legs of the profitable opportunities with the columns 'stake', 'payout', the minimum
+            payout of the opportunity, and 'profit', the profit it guarantees. Pushes on the whole and quarter lines
+            of `LINE_MARKETS` count towards the minimum payout.
+    """
+    opportunity = legs.groupby(key, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    position = legs.groupby(opportunity).cumcount().to_numpy()
+    # Legs of line markets go in the order of their outcomes, the threshold applying to the first one
+    second_outcomes = [MARKET_OUTCOMES[market][1] for market in LINE_MARKETS]
+    line_legs = legs['market'].astype(object).isin(list(LINE_MARKETS)).to_numpy()
+    position = np.where(line_legs, legs['outcome'].astype(object).isin(second_outcomes).to_numpy(), position)
+    shape = (opportunity.max() + 1 if len(legs) else 0, position.max() + 1 if len(legs) else 0)
+
+    def by_leg(values, fill):
+        matrix = np.full(shape, fill, dtype=float)
+        matrix[opportunity, position] = values
+        return matrix
+
+    bookmakers = legs['bookmaker'].astype(object)
+    prices = by_leg(legs['price'].to_numpy(dtype=float), np.nan)
+    caps = by_leg(bookmakers.map(max_stakes or {}).fillna(np.inf).to_numpy(dtype=float), np.inf)
+    rates = by_leg(bookmakers.map(commissions or {}).fillna(0).to_numpy(dtype=float), 0)
+    result = optimize_stakes(prices, total_investment, increment, max_stakes=caps, commissions=rates)
+
+    heads = legs.groupby(opportunity, sort=True).head(1)
+    for market in LINE_MARKETS:
+        thresholds = line_thresholds(market, heads['line'])
+        rows = np.flatnonzero((heads['market'] == market).to_numpy() & (np.round(thresholds % 1 * 4) % 4 != 2))
+        if len(rows):
+            stakes, payout, profit = _settle_pushes(
+                effective_odds(prices[rows, :2], rates[rows, :2]), thresholds[rows], result['stakes'][rows, :2],
+                caps[rows, :2], total_investment, increment)
+            result['stakes'][rows, :2], result['payout'][rows], result['profit'][rows] = stakes, payout, profit
+            result['profitable'][rows] = profit > 0
+
+    legs = legs.assign(stake=result['stakes'][opportunity, position], payout=result['payout'][opportunity],
+                       profit=result['profit'][opportunity])
+    return legs[result['profitable'][opportunity]].reset_index(drop=True)
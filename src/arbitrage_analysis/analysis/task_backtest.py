@@ -0,0 +1,28 @@
+import pandas as pd
+from arbitrage_analysis.analysis.backtester import (BestYieldPolicy, ProportionalPolicy, TopNPolicy, backtest,
+                                                    opportunity_legs, summarize_backtest)
+from arbitrage_analysis.config import BLD_data
+from arbitrage_analysis.storage import load_table, save_table, table_path
+
+backtest_produces = {
+    "bets": table_path("backtest_bets"),
+    "summary": BLD_data / "backtest_summary.csv",
+}
+
+
+def task_backtest_arbitrage_opportunities(
+        depends_on=table_path("arbitrage_opportunities"),
+        produces=backtest_produces,
+):
+    # Compare the selection policies with the stakes locked until the matches are settled
+    bankroll = 100
+    policies = {'best_yield': BestYieldPolicy(), 'top_3': TopNPolicy(3), 'proportional': ProportionalPolicy()}
+    legs = opportunity_legs(load_table(depends_on))
+
+    bets, summary = [], []
+    for name, policy in policies.items():
+        result = backtest(legs, policy, bankroll)
+        bets.append(result['bets'].assign(policy=name))
+        summary.append({'policy': name, **summarize_backtest(result, bankroll)})
+    save_table(pd.concat(bets, ignore_index=True), produces["bets"])
+    pd.DataFrame(summary).to_csv(produces["summary"], index=False)
@@ -1,5 +1,16 @@
 import pandas as pd
-from arbitrage_analysis.config import BLD_data
+from arbitrage_analysis.analysis.arbitrage_scanner import scan_arbitrage, scan_markets
+from arbitrage_analysis.analysis.cross_market import find_cross_market_arbitrage
+from arbitrage_analysis.analysis.stake_optimizer import allocate_stakes
+from arbitrage_analysis.config import (BLD_data, BOOKMAKER_COMMISSIONS, BOOKMAKER_MAX_STAKES, QUOTE_AGE_THRESHOLDS,
+                                       STAKE_INCREMENT, TOTAL_INVESTMENT)
+from arbitrage_analysis.data_management.quote_age import quote_ages
+from arbitrage_analysis.data_management.task_seperate_best_odds import select_best_odds
+from arbitrage_analysis.storage import load_table, save_table, table_path
+
+# Columns with the best odds of the three outcomes of a match
+BEST_ODDS_COLUMNS = ['best_odds_home', 'best_odds_draw', 'best_odds_away']
+
 
 def identify_arbitrage_opportunities(df_path, total_investment, output_path):
     """
@@ -8,60 +19,102 @@ def identify_arbitrage_opportunities(df_path, total_investment, output_path):
     This function processes a dataset of betting odds to identify arbitrage opportunities, calculates the optimal stakes for each outcome to ensure a profit regardless of the match result, and saves the resulting dataset with arbitrage opportunities and their respective stakes to a specified path.
 
     Args:
-        df_path (Path): Path to the DataFrame containing betting odds information.
+        df_path (Path): Path to the DataFrame containing betting odds information. Quotes too old to be still on offer
+            are left out before the best odds are selected, see `find_best_odds`.
         total_investment (float): Total investment amount allocated for arbitrage betting.
         output_path (Path): Destination path for saving the DataFrame with identified arbitrage opportunities and calculated stakes.
 
     Returns:
         None: The function does not return any value. The results are saved to `output_path`.
     """
-    df = pd.read_pickle(df_path)
-    
-    # Calculate implied probabilities and total implied probability
-    df['imp_prob_home'] = 1 / df['best_odds_home']
-    df['imp_prob_draw'] = 1 / df['best_odds_draw']
-    df['imp_prob_away'] = 1 / df['best_odds_away']
-    df['total_imp_prob'] = df['imp_prob_home'] + df['imp_prob_draw'] + df['imp_prob_away']
-    
-    # Identify arbitrage opportunities
-    arb_opportunities = df[df['total_imp_prob'] < 1].copy()
-    
-    # Calculate potential arbitrage profit margin
-    arb_opportunities['arb_profit_margin'] = (1 - arb_opportunities['total_imp_prob']) * 100
-    
-    # Apply function to calculate stakes
-    arb_opportunities = arb_opportunities.apply(lambda row: _calculate_stakes(row, total_investment), axis=1)
+    df = load_table(df_path)
     
+    # Scan all matches at once, the best odds of every match forming one row of the price matrix
+    odds = df[BEST_ODDS_COLUMNS].to_numpy(dtype=float)
+    scan = scan_arbitrage(odds, total_investment)
+    for outcome, column in enumerate(['imp_prob_home', 'imp_prob_draw', 'imp_prob_away']):
+        df[column] = scan['imp_prob'][:, outcome]
+    df['total_imp_prob'] = scan['total_imp_prob']
+    df['arb_profit_margin'] = scan['arb_profit_margin']
+    for outcome, column in enumerate(['stake_home', 'stake_draw', 'stake_away']):
+        df[column] = scan['stakes'][:, outcome]
+
     # Calculate expected payout for each bet
-    arb_opportunities['payout_home'] = arb_opportunities['stake_home'] * arb_opportunities['best_odds_home']
-    arb_opportunities['payout_draw'] = arb_opportunities['stake_draw'] * arb_opportunities['best_odds_draw']
-    arb_opportunities['payout_away'] = arb_opportunities['stake_away'] * arb_opportunities['best_odds_away']
+    df['payout_home'] = df['stake_home'] * df['best_odds_home']
+    df['payout_draw'] = df['stake_draw'] * df['best_odds_draw']
+    df['payout_away'] = df['stake_away'] * df['best_odds_away']
+
+    # Identify arbitrage opportunities
+    arb_opportunities = df[df['total_imp_prob'] < 1]
     
-    arb_opportunities.to_pickle(output_path)
+    save_table(arb_opportunities, output_path)
+
 
-def _calculate_stakes(row, total_investment):
+def arbitrage_by_quote_age(df, thresholds, as_of=None):
     """
-    Calculates the stakes for each possible outcome (home win, draw, away win) based on the total investment and the odds of each outcome.
+    Counts the arbitrage opportunities found in the merged odds when only quotes up to each maximum age are used.
 
-    This function computes the amount to be staked on each possible outcome of a single game, ensuring that the total investment is optimally distributed according to the implied probabilities derived from the odds. The aim is to guarantee a profit regardless of the game's outcome if an arbitrage opportunity is present.
+    The quotes are filtered before the best odds are selected, with the ages taken as in `find_best_odds`, so that the
+    count at a maximum age is the number of opportunities `identify_arbitrage_opportunities` finds at that age.
 
     Args:
-        row (pd.Series): A Pandas Series containing the odds and implied probabilities for a single match.
-        total_investment (float): The total amount to be invested in the identified arbitrage opportunity.
+        df (pd.DataFrame): Merged odds as saved by `standardize_team_names_and_merge`, with a 'last_update' column.
+        thresholds (list of float): Maximum quote ages in seconds.
+        as_of (str or pd.Timestamp, optional): Time at which the ages are taken. Defaults to the latest update time.
 
     Returns:
-        pd.Series: The input Series updated with the stake amounts calculated for each betting outcome.
+        pd.DataFrame: One row per threshold, and a first row without a limit, with the columns 'max_age' (seconds,
+            NaN for no limit), 'quotes', 'matches', 'opportunities' and 'removed', the opportunities lost compared
+            to using all quotes.
     """
-    total_imp_prob = row['total_imp_prob']
-    row['stake_home'] = (1 / row['best_odds_home'] / total_imp_prob) * total_investment
-    row['stake_draw'] = (1 / row['best_odds_draw'] / total_imp_prob) * total_investment
-    row['stake_away'] = (1 / row['best_odds_away'] / total_imp_prob) * total_investment
-    return row
+    # Take the ages once against the same reference time for all thresholds
+    ages = quote_ages(df['last_update'], as_of)
+
+    rows = []
+    for max_age in [None] + list(thresholds):
+        fresh = df if max_age is None else df[ages <= max_age]
+        best_odds = select_best_odds(fresh)
+        total_imp_prob = scan_arbitrage(best_odds[BEST_ODDS_COLUMNS].to_numpy(dtype=float))['total_imp_prob']
+        rows.append({'max_age': max_age, 'quotes': len(fresh), 'matches': len(best_odds),
+                     'opportunities': int((total_imp_prob < 1).sum())})
+    report = pd.DataFrame(rows).astype({'max_age': float})
+    report['removed'] = report['opportunities'].iloc[0] - report['opportunities']
+    return report
 
 
 def task_calculate_arbitrage_stakes(
-    depends_on = BLD_data / "best_odds_info.pkl",
-    produces= BLD_data / "arbitrage_opportunities.pkl"
+    depends_on = table_path("best_odds_info"),
+    produces= table_path("arbitrage_opportunities")
+    ):
+    identify_arbitrage_opportunities(depends_on, TOTAL_INVESTMENT, produces)
+
+
+def task_scan_arbitrage_all_markets(
+    depends_on = table_path("best_prices_all_markets"),
+    produces = table_path("arbitrage_all_markets")
+    ):
+    save_table(scan_markets(load_table(depends_on), TOTAL_INVESTMENT), produces)
+
+
+def task_allocate_stakes_all_markets(
+    depends_on = table_path("arbitrage_all_markets"),
+    produces = table_path("arbitrage_stakes_all_markets")
+    ):
+    legs = allocate_stakes(load_table(depends_on), TOTAL_INVESTMENT, STAKE_INCREMENT,
+                           max_stakes=BOOKMAKER_MAX_STAKES, commissions=BOOKMAKER_COMMISSIONS)
+    save_table(legs, produces)
+
+
+def task_find_cross_market_arbitrage(
+    depends_on = table_path("best_prices_all_markets"),
+    produces = table_path("cross_market_arbitrage")
+    ):
+    save_table(find_cross_market_arbitrage(load_table(depends_on), TOTAL_INVESTMENT), produces)
+
+
+def task_report_arbitrage_by_quote_age(
+    depends_on = table_path("all_odds_merged"),
+    produces = BLD_data / "arbitrage_by_quote_age.csv"
     ):
-    total_investment = 100
-    identify_arbitrage_opportunities(depends_on, total_investment, produces)
+    report = arbitrage_by_quote_age(load_table(depends_on), QUOTE_AGE_THRESHOLDS)
+    report.to_csv(produces, index=False)
@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
 from arbitrage_analysis.config import BLD_data, SRC
+from arbitrage_analysis.storage import load_table, save_table, table_path
 
 def calculate_and_filter_highest_yield(arbitrage_opportunity_path, filtered_arbitrage_path, initial_investment=100):
     """
@@ -7,15 +9,15 @@ def calculate_and_filter_highest_yield(arbitrage_opportunity_path, filtered_arbi
     It simulates reinvestment of payouts to calculate how the initial investment would grow over time based on the yields.
 
     Args:
-        arbitrage_opportunity_path (Path): Path to the pickle file containing the DataFrame of arbitrage opportunities.
-        filtered_arbitrage_path (Path): Path where the filtered DataFrame will be saved as a pickle file.
+        arbitrage_opportunity_path (Path): Path to the table of arbitrage opportunities.
+        filtered_arbitrage_path (Path): Path where the filtered DataFrame will be saved.
         initial_investment (float, optional): The amount of money to start investing with. Defaults to 100.
 
     Returns:
-        None: This function does not return a value. Instead, it saves the filtered DataFrame with the highest yield opportunities and their investment growth to a pickle file.
+        None: This function does not return a value. Instead, it saves the filtered DataFrame with the highest yield opportunities and their investment growth to `filtered_arbitrage_path`.
     """
     # Load the dataset
-    df = pd.read_pickle(arbitrage_opportunity_path)
+    df = load_table(arbitrage_opportunity_path)
 
     # Process data
     df['commence_time'] = pd.to_datetime(df['commence_time'])
@@ -24,75 +26,101 @@ def calculate_and_filter_highest_yield(arbitrage_opportunity_path, filtered_arbi
     df['profit'] = df['total_payout'] - df['total_staked']
     df['yield'] = (df['profit'] / df['total_staked']) * 100
 
-    df_filtered = df.groupby('commence_time', group_keys=False).apply(_filter_highest_yield).reset_index(drop=True)
-    
-    # Initialize investment
-    current_investment = initial_investment
-    df_filtered['investment_growth'] = 0  # Initialize the column
+    df_filtered = highest_yield_per_time(df)
 
     # Calculate compounded investment growth and append it to df_filtered
-    for i, row in df_filtered.iterrows():
-        current_investment *= 1 + (row['yield'] / 100)
-        df_filtered.at[i, 'investment_growth'] = current_investment
+    df_filtered['investment_growth'] = compound_yields(df_filtered['yield'].to_numpy(), initial_investment)
 
-    df_filtered.to_pickle(filtered_arbitrage_path)
+    save_table(df_filtered, filtered_arbitrage_path)
 
 
-def _filter_highest_yield(group):
+def highest_yield_per_time(df, by='commence_time'):
     """
-    Helper function to identify the opportunity with the highest yield within a group of arbitrage opportunities.
+    Selects the opportunity with the highest yield for each unique commence time, with one grouped idxmax instead of a
+    Python call per group.
 
     Args:
-        group (DataFrame): A subset of the arbitrage opportunities DataFrame, grouped by 'commence_time'.
-    
+        df (DataFrame): Arbitrage opportunities with a 'yield' column.
+        by (str, optional): Column whose unique values are one investment round each. Defaults to 'commence_time'.
+
+    Returns:
+        DataFrame: One row per unique value of `by`, in ascending order, holding the first opportunity of the highest
+            yield.
+    """
+    df = df.reset_index(drop=True)
+    return df.loc[df.groupby(by, sort=True)['yield'].idxmax()].reset_index(drop=True)
+
+
+def compound_growth(factors, initial_investment=100):
+    """
+    Compounds investments over a sequence of growth factors as a cumulative product.
+
+    Args:
+        factors (array-like): Growth factors in time order, 1-D for one sequence or 2-D with one column per strategy.
+        initial_investment (float or array-like, optional): The amount of money to start investing with, or one
+            amount per column. Several amounts for a 1-D sequence compound the same sequence once per amount.
+            Defaults to 100.
+
     Returns:
-        DataFrame: A single-row DataFrame corresponding to the opportunity with the highest yield in the group.
+        np.ndarray: The investment after each step, of shape (steps,) for a single sequence and amount, otherwise
+            (steps, columns).
     """
-    return group.loc[group['yield'].idxmax()]
+    factors = np.asarray(factors, dtype=float)
+    initial_investment = np.asarray(initial_investment, dtype=float)
+    if factors.ndim == 1 and initial_investment.ndim == 1:
+        factors = factors[:, None]
+    return np.cumprod(factors, axis=0) * initial_investment
+
+
+def compound_yields(yields, initial_investment=100):
+    """
+    Compounds investments over a sequence of yields, reinvesting the whole investment every time.
+
+    Args:
+        yields (array-like): Yields in percent, shaped as the factors of `compound_growth`.
+        initial_investment (float or array-like, optional): As in `compound_growth`. Defaults to 100.
+
+    Returns:
+        np.ndarray: The investment after each yield, shaped as in `compound_growth`.
+    """
+    return compound_growth(1 + np.asarray(yields, dtype=float) / 100, initial_investment)
+
 
 def ticker_growth_path(ticker_yield_path, benchmark_growth_path, initial_investment=100):
     """
     Simulates the growth of an initial investment over time, based on the average daily yield changes recorded for a specific ticker.
 
     Args:
-        ticker_yield_path (Path): Path to the pickle file containing a DataFrame with the average daily yield changes of a ticker.
-        benchmark_growth_path (Path): Path where the resulting DataFrame showing the investment growth over time will be saved as a pickle file.
+        ticker_yield_path (Path): Path to the table with the average daily yield changes of a ticker.
+        benchmark_growth_path (Path): Path where the resulting DataFrame showing the investment growth over time will be saved.
         initial_investment (float, optional): The amount of money to start investing with. Defaults to 100.
     
     Returns:
-        None: This function does not return a value. Instead, it saves a DataFrame representing the investment growth over time to a pickle file.
+        None: This function does not return a value. Instead, it saves a DataFrame representing the investment growth over time to `benchmark_growth_path`.
     
     Note:
         The function assumes the DataFrame contains a column 'Average Daily Change' representing the daily yield changes.
     """
     # Load the dataset
-    averages_df = pd.read_pickle(ticker_yield_path)
-
-    # Initialize the growth path with the initial investment value
-    growth_path = [initial_investment]
-
-    # Start calculation from the first day
-    for change in averages_df['Average Daily Change']:
-        new_value = growth_path[-1] * (change)
-        growth_path.append(new_value)
+    averages_df = load_table(ticker_yield_path)
 
-    # Shift the values one row higher
-    growth_path.pop(0)
+    # Compound the initial investment over the daily changes, the first value being the one after the first day
+    growth_path = compound_growth(averages_df['Average Daily Change'].to_numpy(), initial_investment)
 
     # Convert the growth path to a DataFrame
     growth_path_df = pd.DataFrame(growth_path, columns=['investment_growth_ticker'])
 
-    growth_path_df.to_pickle(benchmark_growth_path)
+    save_table(growth_path_df, benchmark_growth_path)
 
 
 depends_on_estimate_yield = {
-    "arbitrage_opportunity": BLD_data / "arbitrage_opportunities.pkl",
-    "ticker_yield_averages":   BLD_data / "yield_averages_BTC.pkl"
+    "arbitrage_opportunity": table_path("arbitrage_opportunities"),
+    "ticker_yield_averages":   table_path("yield_averages_BTC")
 }
 
 produces_estimate_yield = {
-    "filtered_arbitrage_opportunity": BLD_data / "filtered_arbitrage_opportunities.pkl",
-    "average_growth_BTC":   BLD_data / "benchmark_growth_path_BTC.pkl"
+    "filtered_arbitrage_opportunity": table_path("filtered_arbitrage_opportunities"),
+    "average_growth_BTC":   table_path("benchmark_growth_path_BTC")
 }
 
 def task_estimate_yield(
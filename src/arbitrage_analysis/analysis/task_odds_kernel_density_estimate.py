@@ -1,4 +1,5 @@
 from arbitrage_analysis.config import BLD_data, BLD_figures
+from arbitrage_analysis.storage import load_table, table_path
 import pandas as pd
 import numpy as np
 
@@ -8,7 +9,7 @@ def kernel_density_estimation(all_odds_path, bandwidth=0.5, gridsize=1000):
     The KDE is computed for combined home win, draw, and away win odds, and is normalized appropriately.
 
     Args:
-        all_odds_path (Path): Path to the pickle file containing the DataFrame of all odds (home win, draw, away win).
+        all_odds_path (Path): Path to the table of all odds (home win, draw, away win).
         bandwidth (float, optional): Bandwidth for the kernel, controlling the smoothness of the estimate. Defaults to 0.5.
         gridsize (int, optional): Number of points where the KDE is evaluated, determining the resolution. Defaults to 1000.
 
@@ -17,26 +18,41 @@ def kernel_density_estimation(all_odds_path, bandwidth=0.5, gridsize=1000):
               - grid (numpy.ndarray): Array of points at which the KDE is evaluated.
               - kde_vals (numpy.ndarray): Values of the KDE at the points in the grid.
     """
-    df_all_odds = pd.read_pickle(all_odds_path)
+    df_all_odds = load_table(all_odds_path, columns=['home_win_odds', 'draw_odds', 'away_win_odds'])
 
     # Combine all odds into a single series, removing any NaN values which might disrupt the KDE calculation
     all_odds = pd.concat([df_all_odds['home_win_odds'], df_all_odds['draw_odds'], df_all_odds['away_win_odds']]).dropna()
 
-    # Calculate KDE for the combined odds
+    return odds_density(all_odds.to_numpy(dtype=float), bandwidth, gridsize)
+
+def odds_density(all_odds, bandwidth=0.5, gridsize=1000, chunk_size=1000):
+    """
+    Calculates the kernel density estimate of odds on an even grid, summing the Gaussian kernels of a chunk of odds
+    at once.
+
+    Args:
+        all_odds (np.ndarray): The odds, without NaN values.
+        bandwidth (float, optional): Bandwidth for the kernel. Defaults to 0.5.
+        gridsize (int, optional): Number of points where the KDE is evaluated. Defaults to 1000.
+        chunk_size (int, optional): Number of odds whose kernels are evaluated together, bounding the memory used.
+            Defaults to 1000.
+
+    Returns:
+        tuple: A tuple (grid, kde_vals) as returned by `kernel_density_estimation`.
+    """
     grid = np.linspace(all_odds.min(), all_odds.max(), gridsize)
-   
     kde_vals = np.zeros(gridsize)
-   
     n = len(all_odds)
-   
-    for value in all_odds:
-        kernel = np.exp(-0.5 * ((grid - value) / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
-        kde_vals += kernel / (n * bandwidth)
-    
+
+    for start in range(0, n, chunk_size):
+        values = all_odds[start:start + chunk_size, None]
+        kernels = np.exp(-0.5 * ((grid - values) / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+        kde_vals += kernels.sum(axis=0) / (n * bandwidth)
+
     return grid, kde_vals
 
 def task_odds_kernel_density_estimate(
-    depends_on = BLD_data / 'all_odds_merged.pkl',
+    depends_on = table_path('all_odds_merged'),
     produces = BLD_data / 'odds_kde_with_arbitrage_opportunities.pkl'
     ):
     # Calculate KDE for the combined odds
@@ -0,0 +1,24 @@
+import pandas as pd
+from arbitrage_analysis.analysis.realtime_engine import ArbitrageEngine, opportunities_table, replay_changes
+from arbitrage_analysis.config import BLD_data
+
+replay_produces = {
+    "latency": BLD_data / "realtime_latency_rapid_api.csv",
+    "opportunities": BLD_data / "realtime_opportunities_rapid_api.csv",
+}
+
+
+def task_replay_quote_changes_rapid_api(
+        depends_on=BLD_data / "quote_changes_rapid_api.csv",
+        produces=replay_produces,
+):
+    # Replay the recorded quote changes through the live engine to measure its detection latency
+    changes = pd.read_csv(depends_on, dtype={'match_id': str, 'bookmaker': str, 'market': str, 'outcome': str})
+    emitted = []
+    engine = ArbitrageEngine(on_opportunity=emitted.append)
+    replay_changes(engine, changes)
+
+    latency = pd.DataFrame([{'latency': 'update', **engine.latency.summary()},
+                            {'latency': 'alert', **engine.alert_latency.summary()}])
+    latency.to_csv(produces["latency"], index=False)
+    opportunities_table(emitted).to_csv(produces["opportunities"], index=False)
@@ -0,0 +1,20 @@
+from arbitrage_analysis.analysis.near_arbitrage import NearArbitrageScanner, event_chunks
+from arbitrage_analysis.storage import load_table, save_table, table_path
+
+near_arbitrage_produces = {
+    "near_arbitrage": table_path("near_arbitrage_all_markets"),
+    "middles": table_path("middles_all_markets"),
+}
+
+
+def task_scan_near_arbitrage_all_markets(
+        depends_on=table_path("all_markets_rapid_api"),
+        produces=near_arbitrage_produces,
+):
+    # Stream the quotes event by event, keeping only the closest market instances to arbitrage and the cheapest middles
+    k = 100
+    scanner = NearArbitrageScanner(k)
+    for chunk in event_chunks(load_table(depends_on)):
+        scanner.add(chunk)
+    save_table(scanner.near_arbitrage(), produces["near_arbitrage"])
+    save_table(scanner.middles(), produces["middles"])
@@ -0,0 +1,13 @@
+from arbitrage_analysis.analysis.parameter_sweep import run_sweep, sweep_inputs
+from arbitrage_analysis.config import BLD_data, SWEEP_GRID
+from arbitrage_analysis.storage import load_table, table_path
+
+
+def task_sweep_parameters(
+        depends_on=table_path("all_odds_merged"),
+        produces=BLD_data / "parameter_sweep.csv",
+):
+    # Evaluate every configuration of the grid on the same odds, loaded once for all worker processes, the best odds
+    # being selected once per maximum quote age of the grid
+    inputs = sweep_inputs(load_table(depends_on), SWEEP_GRID['max_quote_age'])
+    run_sweep(inputs, SWEEP_GRID).to_csv(produces, index=False)
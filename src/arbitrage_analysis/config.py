@@ -8,6 +8,48 @@ BLD_data = BLD / "data"
 BLD_figures = BLD / "figures"
 BLD_tables = BLD / "tables"
 
+# Persistent cache of API responses shared by the retrieval scripts
+RESPONSE_CACHE = BLD / "cache" / "api_responses.sqlite"
+
+# Format of the intermediate tables in BLD_data: "parquet", "arrow" (Arrow IPC) or "pickle"
+STORAGE_FORMAT = "parquet"
+
+# Columns by which the intermediate tables are partitioned, as far as a table has them
+PARTITION_COLUMNS = ["sport_key", "commence_date"]
+
+# Append-only history of all quote changes, kept across runs like the response cache
+ODDS_HISTORY = BLD / "history" / "odds_history.sqlite"
+
+# Maximum age in seconds of the quotes combined into arbitrage, measured from the newest quote of a snapshot. A
+# snapshot of the Rapid API takes about an hour to scrape, so stricter limits leave out most of its quotes.
+MAX_QUOTE_AGE = 90 * 60
+
+# Maximum quote ages compared in the report of the arbitrage opportunities removed by stale quotes
+QUOTE_AGE_THRESHOLDS = [60, 5 * 60, 15 * 60, 30 * 60, 60 * 60, 90 * 60]
+
+# Amount staked in total on every arbitrage opportunity
+TOTAL_INVESTMENT = 100
+
+# Smallest unit of the stakes placed on arbitrage opportunities
+STAKE_INCREMENT = 1
+
+# Maximum stake of a bet by canonical bookmaker ID, for accounts that are limited. Bookmakers not listed are not
+# limited.
+BOOKMAKER_MAX_STAKES = {}
+
+# Commission on net winnings by canonical bookmaker ID, charged by betting exchanges
+BOOKMAKER_COMMISSIONS = {'betfair': 0.05}
+
+# Grid of the parameter sweep over the arbitrage, yield and KDE analyses, by parameter of `evaluate_parameters`.
+# A maximum quote age of None leaves the quotes unfiltered.
+SWEEP_GRID = {
+    'total_investment': [50, 100, 200, 500],
+    'initial_investment': [100, 1000],
+    'bandwidth': [0.25, 0.5, 1, 2],
+    'min_margin': [0, 0.5, 1],
+    'max_quote_age': [None, 15 * 60, MAX_QUOTE_AGE],
+}
+
 TEST_DIR = SRC.joinpath("..", "..", "tests").resolve()
 PAPER_DIR = SRC.joinpath("..", "..", "paper").resolve()
 
@@ -17,6 +59,17 @@ __all__ = [
     "BLD_data",
     "BLD_figures",
     "BLD_tables",
+    "RESPONSE_CACHE",
+    "ODDS_HISTORY",
+    "MAX_QUOTE_AGE",
+    "QUOTE_AGE_THRESHOLDS",
+    "TOTAL_INVESTMENT",
+    "STAKE_INCREMENT",
+    "BOOKMAKER_MAX_STAKES",
+    "BOOKMAKER_COMMISSIONS",
+    "SWEEP_GRID",
+    "STORAGE_FORMAT",
+    "PARTITION_COLUMNS",
     "TEST_DIR",
     "GROUPS",
 ]
\ No newline at end of file
@@ -0,0 +1,107 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Identifiers that normalization alone does not map to the canonical ID of a bookmaker, keyed by their normalized
+# form. They cover The Odds API titles and keys whose Rapid API code differs.
+BOOKMAKER_ALIASES = {
+    '888sport': 'sport888',
+    'betclic': 'betclic.fr',
+    'betfair_ex_eu': 'betfair',
+    'livescorebeteu': 'livescorebet',
+    'livescorebet_eu': 'livescorebet',
+    'onexbet': '1xbet',
+    'unibet_eu': 'unibet',
+}
+
+
+def normalize_bookmaker(identifier):
+    """
+    Reduces a bookmaker identifier of any provider to lowercase letters, digits, dots and underscores.
+
+    Args:
+        identifier (str): A title such as 'William Hill' or a code such as 'williamhill'.
+
+    Returns:
+        str: The normalized identifier, e.g. 'williamhill'.
+    """
+    return re.sub(r'[^a-z0-9._]', '', str(identifier).lower())
+
+
+class BookmakerRegistry:
+    """
+    Maps the bookmaker identifiers of all providers to one canonical ID per bookmaker.
+
+    The Odds API reports bookmakers by title ('Pinnacle', 'William Hill') and the Rapid API by code ('pinnacle',
+    'williamhill'). An identifier is normalized with `normalize_bookmaker`, and the normalized form is its canonical
+    ID unless an alias maps it to another one. Regional variants such as 'unibet.fr' stay separate bookmakers, as
+    their prices differ.
+
+    Args:
+        aliases (dict, optional): Normalized identifier -> canonical ID. Defaults to `BOOKMAKER_ALIASES`.
+    """
+
+    def __init__(self, aliases=BOOKMAKER_ALIASES):
+        self.aliases = dict(aliases)
+
+    def register(self, identifier, bookmaker_id):
+        """
+        Adds an alias of a bookmaker.
+
+        Args:
+            identifier (str): Identifier used by a provider.
+            bookmaker_id (str): Canonical ID of the bookmaker.
+        """
+        self.aliases[normalize_bookmaker(identifier)] = bookmaker_id
+
+    def canonical(self, identifier):
+        """
+        Returns the canonical ID of a bookmaker identifier.
+
+        Args:
+            identifier (str): Identifier used by a provider.
+
+        Returns:
+            str: The canonical ID.
+        """
+        normalized = normalize_bookmaker(identifier)
+        return self.aliases.get(normalized, normalized)
+
+    def canonicalize(self, identifiers):
+        """
+        Replaces a column of bookmaker identifiers by their canonical IDs, normalizing each distinct value once.
+
+        Args:
+            identifiers (pd.Series): The bookmaker identifiers.
+
+        Returns:
+            pd.Series: The canonical IDs.
+        """
+        mapping = {identifier: self.canonical(identifier) for identifier in pd.unique(identifiers.dropna())}
+        return identifiers.map(mapping)
+
+
+def keep_freshest_quotes(df, key, update_column='last_update'):
+    """
+    Collapses duplicate quotes to the most recently updated one.
+
+    Quotes without an update time count as older than all others, and among equally fresh duplicates the last one
+    is kept. The remaining rows keep their order.
+
+    Args:
+        df (pd.DataFrame): The quotes.
+        key (list of str): Columns identifying a quote, e.g. ['event_id', 'bookmaker', 'market', 'outcome'].
+        update_column (str, optional): Column holding the time of the last update. If the table lacks it, the last
+            of the duplicates is kept. Defaults to 'last_update'.
+
+    Returns:
+        pd.DataFrame: The quotes without duplicates.
+    """
+    order = np.arange(len(df))
+    if update_column in df:
+        # Missing times are stored as the smallest integer and therefore sort first
+        updated = pd.to_datetime(df[update_column], utc=True, errors='coerce').array.asi8
+        order = np.argsort(updated, kind='stable')
+    keep = ~df.iloc[order].duplicated(key, keep='last').to_numpy()
+    return df.iloc[np.sort(order[keep])]
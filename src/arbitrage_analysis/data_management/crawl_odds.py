@@ -0,0 +1,191 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from arbitrage_analysis.config import RESPONSE_CACHE, SRC
+from arbitrage_analysis.data_management.http_client import (
+    BudgetExhaustedError,
+    RequestBudget,
+    TokenBucket,
+    create_session,
+)
+from arbitrage_analysis.data_management.response_cache import ResponseCache
+from arbitrage_analysis.data_management.retrieve_data_rapid_api import (
+    RAPID_API_REQUESTS_PER_SECOND,
+    RAPID_API_URL,
+    get_matches_rapid_api,
+    get_odds_for_matchid_bookie_pairs,
+    matchid_bookie_pairs_from_matches,
+)
+from arbitrage_analysis.data_management.retrieve_data_the_odds_api import THE_ODDS_API_URL, get_odds_the_odds_api
+from dotenv import load_dotenv
+
+
+def load_sport_keys(sports_csv_path, include_outrights=False, active_only=True):
+    """
+    Reads the sport keys to crawl from a sports list saved by `get_sports_the_odds_api`.
+
+    Args:
+        sports_csv_path (Path): Path to the CSV file with the list of sports.
+        include_outrights (bool, optional): Whether to keep sports that only offer outright markets. Defaults to False.
+        active_only (bool, optional): Whether to keep only sports that are currently in season. Defaults to True.
+
+    Returns:
+        list: The selected sport keys.
+    """
+    df_sports = pd.read_csv(sports_csv_path)
+    if active_only:
+        df_sports = df_sports[df_sports['active']]
+    if not include_outrights:
+        df_sports = df_sports[~df_sports['has_outrights']]
+    return df_sports['key'].tolist()
+
+
+def _write_shards(shards, output_dir):
+    """
+    Writes one CSV file per shard into `output_dir` together with a manifest listing all shards.
+
+    Args:
+        shards (list of dicts): One dict per shard with the keys 'shard', 'data' and 'status'.
+        output_dir (Path): Directory of the sharded output.
+
+    Returns:
+        pd.DataFrame: The manifest with the columns 'shard', 'file', 'rows' and 'status'.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = []
+    for shard in shards:
+        file_name = None
+        if shard['data'] is not None and not shard['data'].empty:
+            file_name = f"{shard['shard']}.csv"
+            shard['data'].to_csv(output_dir / file_name, index=False)
+        rows = 0 if shard['data'] is None else len(shard['data'])
+        manifest.append({'shard': shard['shard'], 'file': file_name, 'rows': rows, 'status': shard['status']})
+
+    df_manifest = pd.DataFrame(manifest, columns=['shard', 'file', 'rows', 'status'])
+    df_manifest.to_csv(output_dir / "manifest.csv", index=False)
+    return df_manifest
+
+
+def crawl_the_odds_api(sport_keys, api_key, regions, markets, output_dir, max_workers=8, budget=None, session=None,
+                       max_retries=3, base_url=THE_ODDS_API_URL, cache=None):
+    """
+    Fetches the odds of every sport key in parallel and writes them as a sharded output with one shard per sport.
+
+    Args:
+        sport_keys (list of str): Sport keys to crawl.
+        api_key (str): The API key for authenticating requests to The Odds API.
+        regions (str): Comma-separated string of region codes for which to fetch odds.
+        markets (str): Comma-separated string of market types for which to fetch odds.
+        output_dir (Path): Directory where the shards and the manifest are written.
+        max_workers (int, optional): Maximum number of sports fetched at the same time. Defaults to 8.
+        budget (RequestBudget, optional): Global request budget shared by all fetches. Unlimited if None.
+        session (requests.Session, optional): Session to reuse. A pooled session is created if none is given.
+        max_retries (int, optional): Maximum number of retries per sport. Defaults to 3.
+        base_url (str, optional): Base URL of the API. Defaults to `THE_ODDS_API_URL`.
+        cache (ResponseCache, optional): Cache answering requests while the cached responses are fresh.
+
+    Returns:
+        pd.DataFrame: The manifest of the written shards with one row per sport key.
+    """
+    own_session = session is None
+    if own_session:
+        session = create_session(pool_size=max_workers)
+
+    def _crawl_sport(sport_key):
+        try:
+            odds_data = get_odds_the_odds_api(sport_key, api_key, regions, markets, session=session,
+                                              rate_limiter=budget, max_retries=max_retries, base_url=base_url,
+                                              cache=cache)
+        except BudgetExhaustedError:
+            return {'shard': sport_key, 'data': None, 'status': 'budget exhausted'}
+        if isinstance(odds_data, str):
+            return {'shard': sport_key, 'data': None, 'status': odds_data}
+        return {'shard': sport_key, 'data': pd.json_normalize(odds_data), 'status': 'ok'}
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            shards = list(executor.map(_crawl_sport, sport_keys))
+    finally:
+        if own_session:
+            session.close()
+
+    return _write_shards(shards, output_dir)
+
+
+def crawl_rapid_api(competitions, api_key, output_dir, max_workers=4, odds_workers=8, budget=None, session=None,
+                    max_retries=3, base_url=RAPID_API_URL, cache=None):
+    """
+    Discovers all matches of every competition and fetches their odds, writing one shard per competition.
+
+    Competitions are crawled in parallel, and the odds of the matches within a competition are fetched concurrently
+    as well. All requests share one session and one request budget.
+
+    Args:
+        competitions (list of tuples): (sport, country, competition) triples, e.g. ("soccer", "italy", "serie-a").
+        api_key (str): API key for RapidAPI.
+        output_dir (Path): Directory where the shards and the manifest are written.
+        max_workers (int, optional): Maximum number of competitions crawled at the same time. Defaults to 4.
+        odds_workers (int, optional): Maximum number of odds requests in flight per competition. Defaults to 8.
+        budget (RequestBudget, optional): Global request budget shared by all fetches. Unlimited if None.
+        session (requests.Session, optional): Session to reuse. A pooled session is created if none is given.
+        max_retries (int, optional): Maximum number of retries per request. Defaults to 3.
+        base_url (str, optional): Base URL of the API. Defaults to `RAPID_API_URL`.
+        cache (ResponseCache, optional): Cache answering requests while the cached responses are fresh.
+
+    Returns:
+        pd.DataFrame: The manifest of the written shards with one row per competition.
+    """
+    own_session = session is None
+    if own_session:
+        session = create_session(pool_size=max_workers * odds_workers)
+
+    def _crawl_competition(competition):
+        sport, country, name = competition
+        shard = f"{sport}_{country}_{name}"
+        try:
+            matches_data = get_matches_rapid_api(sport, country, name, api_key, session=session, rate_limiter=budget,
+                                                 max_retries=max_retries, base_url=base_url, cache=cache)
+        except BudgetExhaustedError:
+            return {'shard': shard, 'data': None, 'status': 'budget exhausted'}
+        if isinstance(matches_data, str):
+            return {'shard': shard, 'data': None, 'status': matches_data}
+
+        matchid_bookie_pairs = matchid_bookie_pairs_from_matches(pd.json_normalize(matches_data))
+        df_odds = get_odds_for_matchid_bookie_pairs(matchid_bookie_pairs, api_key, max_workers=odds_workers,
+                                                    requests_per_second=None, max_retries=max_retries,
+                                                    base_url=base_url, session=session, rate_limiter=budget,
+                                                    cache=cache)
+        status = 'ok' if len(df_odds) == len(matchid_bookie_pairs) else 'incomplete'
+        return {'shard': shard, 'data': df_odds, 'status': status}
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            shards = list(executor.map(_crawl_competition, competitions))
+    finally:
+        if own_session:
+            session.close()
+
+    return _write_shards(shards, output_dir)
+
+
+# As the retrival depends on API keys and the data changes frequently, this code should not run via pytask.
+if __name__ == "__main__":
+    load_dotenv()
+
+    # One budget per provider for the whole sweep
+    the_odds_api_budget = RequestBudget(max_requests=100)
+    rapid_api_budget = RequestBudget(max_requests=500, rate_limiter=TokenBucket(RAPID_API_REQUESTS_PER_SECOND))
+    cache = ResponseCache(RESPONSE_CACHE)
+
+    sport_keys = load_sport_keys(SRC / "data" / "df_sports_the_odds_api.csv")
+    crawl_the_odds_api(sport_keys, os.getenv('THEODDSAPI_API_KEY'), "eu", "h2h", SRC / "data" / "crawl_the_odds_api",
+                       budget=the_odds_api_budget, cache=cache)
+
+    competitions = [("soccer", "italy", "serie-a")]
+    crawl_rapid_api(competitions, os.getenv('RAPIDAPI_API_KEY'), SRC / "data" / "crawl_rapid_api",
+                    budget=rapid_api_budget, cache=cache)
+    cache.save_report(SRC / "data" / "cache_report_crawl.csv")
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+# Columns identifying the pairing of an event, holding team names resolved to the same canonical names
+PAIRING = ['home_team', 'away_team']
+
+# Largest difference between the kickoff times two providers report for the same event
+KICKOFF_TOLERANCE = pd.Timedelta(hours=2)
+
+
+def _kickoffs(df):
+    """Parses the 'commence_time' column of a table, NaT where it is missing or the column is absent."""
+    if 'commence_time' not in df:
+        return pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns, UTC]')
+    return pd.to_datetime(df['commence_time'], utc=True, errors='coerce')
+
+
+def make_event_ids(events):
+    """
+    Builds stable event IDs from the pairing and the kickoff of events, so that a rerun assigns the same IDs.
+
+    Args:
+        events (pd.DataFrame): Events with the columns 'home_team', 'away_team' and 'kickoff'.
+
+    Returns:
+        pd.Series: One 16 character hexadecimal ID per event, missing for events without a kickoff.
+    """
+    # The hash of pandas uses a fixed key, so the IDs do not change between processes
+    hashes = pd.util.hash_pandas_object(events[PAIRING + ['kickoff']], index=False).to_numpy()
+    ids = pd.Series([f'{value:016x}' for value in hashes], index=events.index, dtype=object)
+    return ids.where(events['kickoff'].notna().to_numpy(), np.nan)
+
+
+def _attach(df, kickoffs, events):
+    """Attaches the columns of the distinct events to every row of a quote table, keeping its index."""
+    rows = pd.merge(df[PAIRING].assign(kickoff=kickoffs), events, on=PAIRING + ['kickoff'], how='left')
+    return rows.drop(columns=PAIRING + ['kickoff']).set_index(df.index)
+
+
+def link_events(reference, other, tolerance=KICKOFF_TOLERANCE):
+    """
+    Links the events of one provider to the events of a reference provider by pairing and kickoff time.
+
+    Each event of `other` is joined to the reference event with the same pairing whose kickoff is nearest, provided
+    the kickoffs differ by at most `tolerance`. The join is a sorted as-of join over the distinct events of both
+    tables, so it takes O(n log n) time and tells apart repeated pairings of the same season. Events of `other`
+    without a kickoff are linked only if the reference has a single event with their pairing.
+
+    Args:
+        reference (pd.DataFrame): Quotes of the reference provider with the columns 'home_team', 'away_team' and
+            'commence_time'.
+        other (pd.DataFrame): Quotes of the other provider with the columns 'home_team' and 'away_team', and
+            optionally 'commence_time'.
+        tolerance (pd.Timedelta, optional): Largest kickoff difference of linked events. Defaults to
+            `KICKOFF_TOLERANCE`.
+
+    Returns:
+        tuple: (reference, other, unmatched) where `reference` and `other` are copies of the inputs with an
+            'event_id' column, the linked rows of `other` taking the ID and 'commence_time' of their reference
+            event, and `unmatched` holds the distinct events of `other` that were not linked, with the columns
+            'home_team', 'away_team' and 'kickoff'.
+    """
+    reference_kickoffs = _kickoffs(reference)
+    other_kickoffs = _kickoffs(other)
+
+    # The reference events keep their commence time as the reference provider writes it
+    reference_events = reference[PAIRING + ['commence_time']].assign(kickoff=reference_kickoffs)
+    reference_events = reference_events.drop_duplicates(PAIRING + ['kickoff']).dropna(subset=['kickoff'])
+    reference_events['event_id'] = make_event_ids(reference_events)
+    candidates = reference_events.rename(columns={'event_id': 'reference_id', 'commence_time': 'reference_time'})
+    candidates = candidates.sort_values('kickoff')
+
+    other_events = other[PAIRING].assign(kickoff=other_kickoffs).drop_duplicates()
+    other_events['event_id'] = make_event_ids(other_events)
+    timed = other_events[other_events['kickoff'].notna()].sort_values('kickoff')
+    linked = pd.merge_asof(timed, candidates, on='kickoff', by=PAIRING, tolerance=tolerance, direction='nearest')
+
+    # Without a kickoff, only a pairing with a single reference event is unambiguous
+    untimed = other_events[other_events['kickoff'].isna()]
+    single = candidates.drop_duplicates(PAIRING, keep=False)
+    untimed = pd.merge(untimed, single[PAIRING + ['reference_id', 'reference_time']], on=PAIRING, how='left')
+
+    links = pd.concat([linked, untimed], ignore_index=True)
+    matched = links['reference_id'].notna()
+    unmatched = links.loc[~matched, PAIRING + ['kickoff']].reset_index(drop=True)
+
+    # Linked events take the ID and commence time of their reference event, the others keep their own
+    links['event_id'] = np.where(matched, links['reference_id'], links['event_id'])
+    other_links = _attach(other, other_kickoffs, links[PAIRING + ['kickoff', 'event_id', 'reference_time']])
+
+    reference_ids = _attach(reference, reference_kickoffs, reference_events[PAIRING + ['kickoff', 'event_id']])
+    reference = reference.assign(event_id=reference_ids['event_id'])
+    other = other.assign(event_id=other_links['event_id'])
+    own_time = other['commence_time'] if 'commence_time' in other else pd.Series(None, index=other.index,
+                                                                                dtype=object)
+    reference_times = other_links['reference_time']
+    other['commence_time'] = np.where(reference_times.notna(), reference_times, own_time)
+    return reference, other, unmatched
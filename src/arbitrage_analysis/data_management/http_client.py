@@ -0,0 +1,270 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from arbitrage_analysis.data_management.response_cache import cache_key
+from requests.adapters import HTTPAdapter
+
+# Status codes that are worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how many requests are sent per second.
+
+    Tokens are refilled continuously at `rate` per second up to `capacity`. Every request takes one token and waits
+    if the bucket is empty, so bursts of up to `capacity` requests are allowed while the long-run rate never
+    exceeds the provider quota.
+
+    Args:
+        rate (float): Number of tokens added per second.
+        capacity (float, optional): Maximum number of tokens the bucket can hold. Defaults to `rate`, but at least 1
+            so that a bucket refilled more slowly than once per second still admits a request.
+        clock (callable, optional): Function returning the current time in seconds. Defaults to `time.monotonic`.
+        sleep (callable, optional): Function used to wait for new tokens. Defaults to `time.sleep`.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self):
+        """
+        Takes one token from the bucket if one is available, without waiting.
+
+        Returns:
+            bool: Whether a token was taken.
+        """
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def time_until_available(self):
+        """
+        Returns the number of seconds until the next token becomes available.
+
+        Returns:
+            float: Zero if a token is available now.
+        """
+        with self._lock:
+            self._refill()
+            return max(0.0, (1 - self.tokens) / self.rate)
+
+    def acquire(self):
+        """
+        Takes one token from the bucket, blocking until a token is available.
+
+        Returns:
+            float: The number of seconds spent waiting for the token.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait_time = (1 - self.tokens) / self.rate
+            self._sleep(wait_time)
+            waited += wait_time
+
+
+class BudgetExhaustedError(RuntimeError):
+    """Raised when a request would exceed the total request budget."""
+
+
+class RequestBudget:
+    """
+    Thread-safe cap on the total number of requests sent by a group of fetches, e.g. a full crawl.
+
+    The budget has the same `acquire` interface as `TokenBucket`, so it can be passed wherever a rate limiter is
+    expected. It optionally wraps a `TokenBucket` to also limit the request rate.
+
+    Args:
+        max_requests (int): Total number of requests that may be sent.
+        rate_limiter (TokenBucket, optional): Limiter applied after a request has been admitted by the budget.
+    """
+
+    def __init__(self, max_requests, rate_limiter=None):
+        self.max_requests = max_requests
+        self.used = 0
+        self.rate_limiter = rate_limiter
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self):
+        """Number of requests left in the budget."""
+        return self.max_requests - self.used
+
+    def acquire(self):
+        """
+        Takes one request from the budget and waits for the rate limiter, if any.
+
+        Returns:
+            float: The number of seconds spent waiting for the rate limiter.
+
+        Raises:
+            BudgetExhaustedError: If the budget has been used up.
+        """
+        with self._lock:
+            if self.used >= self.max_requests:
+                raise BudgetExhaustedError(f"Request budget of {self.max_requests} requests exhausted")
+            self.used += 1
+        if self.rate_limiter is not None:
+            return self.rate_limiter.acquire()
+        return 0.0
+
+
+def create_session(pool_size=10):
+    """
+    Creates a `requests.Session` whose connection pool keeps up to `pool_size` keep-alive connections per host.
+
+    Args:
+        pool_size (int, optional): Number of connections kept open per host. Defaults to 10.
+
+    Returns:
+        requests.Session: Session that reuses connections across requests.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _backoff_delay(attempt, backoff_factor, max_backoff, response=None):
+    """
+    Computes the waiting time before the next retry using exponential backoff with full jitter.
+
+    A `Retry-After` header sent with a 429 response takes precedence over the computed delay.
+
+    Args:
+        attempt (int): Number of the failed attempt, starting at 0.
+        backoff_factor (float): Base delay in seconds.
+        max_backoff (float): Upper bound for the delay in seconds.
+        response (requests.Response, optional): The failed response, if any.
+
+    Returns:
+        float: Delay in seconds.
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), max_backoff)
+            except ValueError:
+                pass
+    return random.uniform(0, min(max_backoff, backoff_factor * 2 ** attempt))
+
+
+def get_with_retry(session, url, params=None, headers=None, rate_limiter=None, max_retries=3, backoff_factor=0.5,
+                   max_backoff=30.0, timeout=10, sleep=time.sleep, cache=None, endpoint=None):
+    """
+    Sends a GET request and retries it on rate limiting (429), server errors (5xx) and connection failures.
+
+    If a cache is given, fresh cached responses are returned without contacting the API, and expired ones are
+    revalidated with a conditional request where the API supports it.
+
+    Args:
+        session (requests.Session): Session used to send the request.
+        url (str): URL of the request.
+        params (dict, optional): Query string parameters.
+        headers (dict, optional): Request headers.
+        rate_limiter (TokenBucket, optional): Limiter from which a token is taken before every attempt.
+        max_retries (int, optional): Maximum number of retries after the first attempt. Defaults to 3.
+        backoff_factor (float, optional): Base delay of the exponential backoff in seconds. Defaults to 0.5.
+        max_backoff (float, optional): Maximum delay between two attempts in seconds. Defaults to 30.
+        timeout (float, optional): Timeout of a single attempt in seconds. Defaults to 10.
+        sleep (callable, optional): Function used to wait between attempts. Defaults to `time.sleep`.
+        cache (ResponseCache, optional): Cache to answer the request from and to store the response in.
+        endpoint (str, optional): Endpoint name selecting the time-to-live of the cached response.
+
+    Returns:
+        requests.Response or None: The last response received, or None if every attempt failed to connect or the
+            response is missing from an offline cache.
+    """
+    cached = None
+    if cache is not None:
+        key = cache_key(url, params)
+        cached, fresh = cache.lookup(key, endpoint)
+        if fresh:
+            return cached
+        if cache.offline:
+            return None
+        if cached is not None:
+            headers = {**(headers or {}), **cache.conditional_headers(key)}
+
+    response = None
+    for attempt in range(max_retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            response = None
+        else:
+            if response.status_code not in RETRY_STATUS_CODES:
+                if cache is None:
+                    return response
+                if response.status_code == 304 and cached is not None:
+                    cache.refresh(key, response)
+                    return cached
+                cache.store(key, endpoint, response)
+                return response
+        if attempt < max_retries:
+            sleep(_backoff_delay(attempt, backoff_factor, max_backoff, response))
+    return response
+
+
+def fetch_all(request_specs, session=None, max_workers=8, rate_limiter=None, **retry_kwargs):
+    """
+    Sends many GET requests concurrently over one pooled session and returns the responses in input order.
+
+    Args:
+        request_specs (list of dicts): One dict per request with the key 'url' and the optional keys 'params',
+            'headers' and 'endpoint'.
+        session (requests.Session, optional): Session to use. A pooled session sized to `max_workers` is created if
+            none is given.
+        max_workers (int, optional): Maximum number of requests in flight at the same time. Defaults to 8.
+        rate_limiter (TokenBucket, optional): Limiter shared by all requests.
+        **retry_kwargs: Further keyword arguments passed on to `get_with_retry`.
+
+    Returns:
+        list: The response for every request, in the same order as `request_specs`. Requests that could not be sent,
+            e.g. because the request budget was exhausted, are None.
+    """
+    own_session = session is None
+    if own_session:
+        session = create_session(pool_size=max_workers)
+
+    def _fetch(spec):
+        try:
+            return get_with_retry(session, spec["url"], params=spec.get("params"), headers=spec.get("headers"),
+                                  rate_limiter=rate_limiter, endpoint=spec.get("endpoint"), **retry_kwargs)
+        except BudgetExhaustedError:
+            return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_fetch, request_specs))
+    finally:
+        if own_session:
+            session.close()
@@ -0,0 +1,215 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.data_management.snapshot_delta import QUOTE_KEY
+
+# Columns of the history table, in storage order
+HISTORY_COLUMNS = ['captured_at', 'change', 'match_id', 'bookmaker', 'market', 'line', 'outcome', 'price',
+                   'last_update']
+
+# Number of rows sent to SQLite per executemany call
+BATCH_SIZE = 50000
+
+# Columns identifying a change: a quote can change once per snapshot. Missing lines are replaced by a value no line
+# takes, as SQLite treats NULLs in a unique index as distinct.
+CHANGE_KEY = "captured_at, match_id, bookmaker, market, ifnull(line, 'none'), outcome"
+
+
+def _to_epoch(timestamps):
+    """Converts timestamps, naive ones taken as UTC, to seconds since the epoch."""
+    timestamps = pd.to_datetime(pd.Series(timestamps), utc=True)
+    return (timestamps - pd.Timestamp(0, tz='UTC')).dt.total_seconds().to_numpy()
+
+
+def _from_epoch(seconds):
+    return pd.to_datetime(seconds, unit='s', utc=True)
+
+
+class OddsHistoryStore:
+    """
+    File-backed history of every quote change, stored in SQLite and queried by match, bookmaker and time.
+
+    The store receives the change logs produced by `ingest_snapshot`. Each row is one inserted, updated or deleted
+    quote together with the time of the snapshot in which the change was seen, so the quotes on offer at any past
+    moment can be rebuilt. An index on (match_id, bookmaker, market, outcome, captured_at) keeps slice queries fast
+    regardless of the length of the history. A unique index on the snapshot time and the quote makes appending the
+    same snapshot again a no-op, so reruns of the ingestion do not duplicate the history.
+
+    Args:
+        path (Path): Path of the SQLite file.
+        batch_size (int, optional): Number of rows inserted per batch. Defaults to `BATCH_SIZE`.
+    """
+
+    def __init__(self, path, batch_size=BATCH_SIZE):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS quotes ("
+            "captured_at REAL NOT NULL, change TEXT NOT NULL, match_id TEXT NOT NULL, bookmaker TEXT NOT NULL, "
+            "market TEXT NOT NULL, line REAL, outcome TEXT NOT NULL, price REAL, last_update TEXT)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS quotes_key_time ON quotes (match_id, bookmaker, market, outcome, captured_at)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS quotes_time ON quotes (captured_at)")
+        has_key = self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'quotes_change'").fetchone()
+        if not has_key:
+            # Histories written before the index existed may hold repeated snapshots, of which the first is kept
+            self._connection.execute(
+                f"DELETE FROM quotes WHERE rowid NOT IN (SELECT MIN(rowid) FROM quotes GROUP BY {CHANGE_KEY})")
+            self._connection.execute(f"CREATE UNIQUE INDEX quotes_change ON quotes ({CHANGE_KEY})")
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    def append(self, changes):
+        """
+        Appends a change log to the history in batches, all within one transaction. Changes already stored for the
+        same snapshot time are skipped.
+
+        Args:
+            changes (pd.DataFrame): Changes as returned by `ingest_snapshot`, with the columns 'captured_at' and
+                'change' and the columns of `QUOTE_KEY` and 'price'. 'last_update' is optional.
+
+        Returns:
+            int: Number of rows appended, without the skipped ones.
+        """
+        if changes.empty:
+            return 0
+
+        columns = {
+            'captured_at': _to_epoch(changes['captured_at']),
+            'change': changes['change'].astype(str).to_numpy(),
+            **{column: changes[column].astype(object).to_numpy() for column in ['match_id', 'bookmaker', 'market',
+                                                                                 'outcome']},
+            'line': changes['line'].astype(float).to_numpy(),
+            'price': changes['price'].astype(float).to_numpy(),
+            'last_update': (changes['last_update'].astype(object).to_numpy() if 'last_update' in changes
+                            else np.full(len(changes), None)),
+        }
+        # SQLite stores missing lines and prices as NULL rather than NaN
+        rows = pd.DataFrame(columns, columns=HISTORY_COLUMNS).astype(object)
+        rows = rows.where(rows.notna(), None)
+        records = list(rows.itertuples(index=False, name=None))
+
+        with self._lock, self._connection:
+            inserted = self._connection.total_changes
+            for start in range(0, len(records), self.batch_size):
+                self._connection.executemany(
+                    f"INSERT OR IGNORE INTO quotes VALUES ({', '.join('?' * len(HISTORY_COLUMNS))})",
+                    records[start:start + self.batch_size],
+                )
+            return self._connection.total_changes - inserted
+
+    def _query(self, sql, params):
+        with self._lock:
+            df = pd.read_sql_query(sql, self._connection, params=params)
+        df['captured_at'] = _from_epoch(df['captured_at'])
+        return df
+
+    @staticmethod
+    def _filters(match_id=None, bookmaker=None, market=None):
+        """Builds the WHERE clauses and parameters restricting a query to a match, bookmaker and market."""
+        clauses, params = [], []
+        for column, value in (('match_id', match_id), ('bookmaker', bookmaker), ('market', market)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return clauses, params
+
+    def latest_quotes(self, as_of=None, match_id=None, bookmaker=None, market=None):
+        """
+        Rebuilds the quotes on offer at a given time, i.e. the latest change of every quote up to that time, leaving
+        out quotes whose latest change is a deletion.
+
+        Args:
+            as_of (str or pd.Timestamp, optional): Point in time. Defaults to the end of the history.
+            match_id (str, optional): Restricts the result to one match.
+            bookmaker (str, optional): Restricts the result to one bookmaker.
+            market (str, optional): Restricts the result to one market.
+
+        Returns:
+            pd.DataFrame: One row per quote with the columns of `HISTORY_COLUMNS`.
+        """
+        clauses, params = self._filters(match_id, bookmaker, market)
+        if as_of is not None:
+            clauses.append("captured_at <= ?")
+            params.append(float(_to_epoch([as_of])[0]))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        sql = (
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM ("
+            f"SELECT *, ROW_NUMBER() OVER (PARTITION BY {', '.join(QUOTE_KEY)} ORDER BY captured_at DESC) AS recency "
+            f"FROM quotes {where}) "
+            "WHERE recency = 1 AND change != 'delete' "
+            "ORDER BY match_id, bookmaker, market, line, outcome"
+        )
+        return self._query(sql, params)
+
+    def match_quotes(self, match_id, start=None, end=None, bookmaker=None, market=None):
+        """
+        Returns every change of the quotes of one match inside a time window.
+
+        Args:
+            match_id (str): The match.
+            start (str or pd.Timestamp, optional): Start of the window, inclusive. Unbounded if None.
+            end (str or pd.Timestamp, optional): End of the window, inclusive. Unbounded if None.
+            bookmaker (str, optional): Restricts the result to one bookmaker.
+            market (str, optional): Restricts the result to one market.
+
+        Returns:
+            pd.DataFrame: The changes with the columns of `HISTORY_COLUMNS`, ordered by time.
+        """
+        clauses, params = self._filters(match_id, bookmaker, market)
+        for operator, bound in ((">=", start), ("<=", end)):
+            if bound is not None:
+                clauses.append(f"captured_at {operator} ?")
+                params.append(float(_to_epoch([bound])[0]))
+
+        sql = (
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM quotes WHERE {' AND '.join(clauses)} "
+            "ORDER BY captured_at, bookmaker, market, line, outcome"
+        )
+        return self._query(sql, params)
+
+    def changes(self, start=None, end=None):
+        """
+        Returns every change of all quotes inside a time window in the order in which they were appended, e.g. to
+        replay the history.
+
+        Args:
+            start (str or pd.Timestamp, optional): Start of the window, inclusive. Unbounded if None.
+            end (str or pd.Timestamp, optional): End of the window, inclusive. Unbounded if None.
+
+        Returns:
+            pd.DataFrame: The changes with the columns of `HISTORY_COLUMNS`, ordered by time.
+        """
+        clauses, params = [], []
+        for operator, bound in ((">=", start), ("<=", end)):
+            if bound is not None:
+                clauses.append(f"captured_at {operator} ?")
+                params.append(float(_to_epoch([bound])[0]))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        sql = f"SELECT {', '.join(HISTORY_COLUMNS)} FROM quotes {where} ORDER BY captured_at, rowid"
+        return self._query(sql, params)
+
+    def snapshot_times(self):
+        """
+        Returns the times of all snapshots in the history.
+
+        Returns:
+            pd.DatetimeIndex: The distinct capture times in ascending order.
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT DISTINCT captured_at FROM quotes ORDER BY captured_at").fetchall()
+        return pd.DatetimeIndex(_from_epoch([row[0] for row in rows]))
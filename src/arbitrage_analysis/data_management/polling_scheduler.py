@@ -0,0 +1,234 @@
+import heapq
+import math
+import time
+
+import pandas as pd
+from arbitrage_analysis.data_management.http_client import TokenBucket, create_session
+from arbitrage_analysis.data_management.retrieve_data_rapid_api import get_odds_for_matchid_bookie_pairs
+from arbitrage_analysis.data_management.retrieve_data_the_odds_api import get_odds_the_odds_api
+
+# Refresh interval in seconds by time to kickoff: (maximum seconds to kickoff, interval)
+REFRESH_TIERS = [
+    (60 * 60, 10),
+    (6 * 60 * 60, 60),
+    (24 * 60 * 60, 5 * 60),
+    (48 * 60 * 60, 15 * 60),
+    (math.inf, 60 * 60),
+]
+
+# Matches keep being polled at the shortest interval while they are played
+LIVE_WINDOW = 2 * 60 * 60
+
+
+def refresh_interval(commence_time, now, tiers=REFRESH_TIERS, live_window=LIVE_WINDOW):
+    """
+    Picks how often the odds of a match should be refreshed given the time left until kickoff.
+
+    Args:
+        commence_time (float): Kickoff as seconds since the epoch.
+        now (float): Current time as seconds since the epoch.
+        tiers (list of tuples, optional): (maximum seconds to kickoff, interval) pairs sorted by the first entry.
+            Defaults to `REFRESH_TIERS`.
+        live_window (float, optional): Seconds after kickoff during which the match is still polled. Defaults to
+            `LIVE_WINDOW`.
+
+    Returns:
+        float or None: The refresh interval in seconds, or None if the match is over and should not be polled.
+    """
+    seconds_to_kickoff = commence_time - now
+    if seconds_to_kickoff < -live_window:
+        return None
+    for max_seconds_to_kickoff, interval in tiers:
+        if seconds_to_kickoff <= max_seconds_to_kickoff:
+            return interval
+    return tiers[-1][1]
+
+
+def to_epoch(commence_time):
+    """
+    Converts a commence time such as '2024-03-03T19:45:50Z' to seconds since the epoch.
+
+    Args:
+        commence_time (str or pd.Timestamp or float): The commence time.
+
+    Returns:
+        float: Seconds since the epoch.
+    """
+    if isinstance(commence_time, (int, float)):
+        return float(commence_time)
+    return pd.Timestamp(commence_time).timestamp()
+
+
+class PollingScheduler:
+    """
+    Long-running scheduler refreshing the odds of each match at an interval depending on its time to kickoff.
+
+    Every refresh takes one token from a requests-per-minute budget. When more refreshes are due than the budget
+    allows, the jobs most overdue relative to their own interval are refreshed first and the others wait for the next
+    free token. As matches close to kickoff have the shortest intervals, most of the quota is spent on the quotes
+    most likely to yield arbitrage, while matches days away are delayed but never starved.
+
+    Args:
+        fetch (callable): Function fetching the odds of one job key, e.g. a match ID or a sport key.
+        requests_per_minute (float): Request budget per minute.
+        on_result (callable, optional): Function called with the job key and the fetch result.
+        tiers (list of tuples, optional): Refresh tiers passed on to `refresh_interval`. Defaults to `REFRESH_TIERS`.
+        live_window (float, optional): Seconds after kickoff during which a match is still polled. Defaults to
+            `LIVE_WINDOW`.
+        clock (callable, optional): Function returning the current time as seconds since the epoch. Defaults to
+            `time.time`.
+        sleep (callable, optional): Function used to wait for the next due refresh. Defaults to `time.sleep`.
+    """
+
+    def __init__(self, fetch, requests_per_minute, on_result=None, tiers=REFRESH_TIERS, live_window=LIVE_WINDOW,
+                 clock=time.time, sleep=time.sleep):
+        self.fetch = fetch
+        self.on_result = on_result
+        self.tiers = tiers
+        self.live_window = live_window
+        self._clock = clock
+        self._sleep = sleep
+        self.rate_limiter = TokenBucket(requests_per_minute / 60, capacity=1, clock=clock, sleep=sleep)
+        self.commence_times = {}
+        self.fetch_counts = {}
+        self._due = {}
+        self._queue = []
+
+    def add(self, key, commence_time):
+        """
+        Adds a job, or updates its kickoff, and makes it due immediately.
+
+        Args:
+            key (hashable): Job key passed to `fetch`.
+            commence_time (str or pd.Timestamp or float): Kickoff of the match.
+        """
+        self.commence_times[key] = to_epoch(commence_time)
+        self.fetch_counts.setdefault(key, 0)
+        self._push(key, self._clock())
+
+    def remove(self, key):
+        self.commence_times.pop(key, None)
+        self._due.pop(key, None)
+
+    def _push(self, key, due):
+        self._due[key] = due
+        heapq.heappush(self._queue, (due, key))
+
+    def _pop_due(self, now):
+        due_keys = []
+        while self._queue and self._queue[0][0] <= now:
+            due, key = heapq.heappop(self._queue)
+            # Skip entries of removed jobs and entries superseded by a later push
+            if self._due.get(key) == due:
+                due_keys.append(key)
+        return due_keys
+
+    def _priority(self, key, now):
+        """
+        Sort key of a due job: jobs overdue by more of their own refresh interval come first, so that matches far
+        from kickoff are delayed but never starved, and ties go to the match closest to kickoff.
+        """
+        seconds_to_kickoff = abs(self.commence_times[key] - now)
+        interval = refresh_interval(self.commence_times[key], now, self.tiers, self.live_window) or 1
+        return -(now - self._due[key]) / interval, seconds_to_kickoff
+
+    def run_pending(self):
+        """
+        Refreshes every due job the budget allows, most overdue relative to its interval first, and reschedules it.
+
+        Returns:
+            list: Keys of the jobs refreshed.
+        """
+        now = self._clock()
+        due_keys = self._pop_due(now)
+        due_keys.sort(key=lambda key: self._priority(key, now))
+
+        refreshed = []
+        for position, key in enumerate(due_keys):
+            if not self.rate_limiter.try_acquire():
+                # Budget spent: the remaining jobs keep their due time until the next token is available
+                for waiting_key in due_keys[position:]:
+                    self._push(waiting_key, self._due[waiting_key])
+                break
+
+            result = self.fetch(key)
+            self.fetch_counts[key] += 1
+            refreshed.append(key)
+            if self.on_result is not None:
+                self.on_result(key, result)
+
+            interval = refresh_interval(self.commence_times[key], now, self.tiers, self.live_window)
+            if interval is None:
+                self.remove(key)
+            else:
+                self._push(key, now + interval)
+        return refreshed
+
+    def run(self, duration):
+        """
+        Keeps refreshing jobs for `duration` seconds or until no job is left.
+
+        Args:
+            duration (float): Number of seconds to run.
+        """
+        end = self._clock() + duration
+        while self._due and self._clock() < end:
+            self.run_pending()
+            now = self._clock()
+            if not self._queue:
+                break
+            wait = self._queue[0][0] - now
+            if wait <= 0:
+                wait = self.rate_limiter.time_until_available()
+            self._sleep(max(min(wait, end - now), 1e-3))
+
+
+def rapid_api_match_fetcher(api_key, bookies_by_match, **fetch_kwargs):
+    """
+    Creates a fetch function refreshing the Rapid API odds of a single match.
+
+    Every refresh sends exactly one request, so that the token the scheduler takes for it covers it: a failed request
+    is not retried but waits for the next refresh of the match. All refreshes share one keep-alive session.
+
+    Args:
+        api_key (str): API key for RapidAPI.
+        bookies_by_match (dict): Comma-separated bookmakers per match ID.
+        **fetch_kwargs: Further keyword arguments passed on to `get_odds_for_matchid_bookie_pairs`.
+
+    Returns:
+        callable: Function taking a match ID and returning its odds DataFrame.
+    """
+    session = fetch_kwargs.pop("session", None) or create_session(pool_size=1)
+
+    def fetch(match_id):
+        pair = {"match_id": match_id, "bookies": bookies_by_match[match_id]}
+        return get_odds_for_matchid_bookie_pairs([pair], api_key, max_workers=1, requests_per_second=None,
+                                                 max_retries=0, session=session, **fetch_kwargs)
+
+    return fetch
+
+
+def the_odds_api_sport_fetcher(api_key, regions, markets, **fetch_kwargs):
+    """
+    Creates a fetch function refreshing the odds of all events of one sport from The Odds API.
+
+    The Odds API returns all events of a sport with one request, so jobs are keyed by sport and scheduled by the
+    kickoff of the sport's next event. As for `rapid_api_match_fetcher`, every refresh sends exactly one request over
+    a shared keep-alive session.
+
+    Args:
+        api_key (str): The API key for authenticating requests to The Odds API.
+        regions (str): Comma-separated string of region codes for which to fetch odds.
+        markets (str): Comma-separated string of market types for which to fetch odds.
+        **fetch_kwargs: Further keyword arguments passed on to `get_odds_the_odds_api`.
+
+    Returns:
+        callable: Function taking a sport key and returning the API response.
+    """
+    session = fetch_kwargs.pop("session", None) or create_session(pool_size=1)
+
+    def fetch(sport_key):
+        return get_odds_the_odds_api(sport_key, api_key, regions, markets, max_retries=0, session=session,
+                                     **fetch_kwargs)
+
+    return fetch
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+
+def _epoch_seconds(times):
+    """Converts update times, naive ones taken as UTC, to seconds since the epoch with NaN for missing times."""
+    parsed = pd.to_datetime(times, utc=True, errors='coerce', format='ISO8601')
+    seconds = parsed.array.asi8 / 1e9
+    seconds[parsed.isna().to_numpy()] = np.nan
+    return seconds
+
+
+def quote_ages(update_times, as_of=None):
+    """
+    Computes the age of quotes from their update times.
+
+    Args:
+        update_times (pd.Series or pd.DataFrame): Update times of the quotes, or one column per leg of a combination
+            of quotes.
+        as_of (str or pd.Timestamp, optional): Time at which the ages are taken. Defaults to the latest update time,
+            i.e. the moment the newest quote was captured.
+
+    Returns:
+        np.ndarray: Ages in seconds, for several legs the age of the oldest one. NaN where an update time is missing.
+    """
+    frame = update_times.to_frame() if isinstance(update_times, pd.Series) else update_times
+    seconds = np.column_stack([_epoch_seconds(frame[column]) for column in frame.columns])
+    if np.isnan(seconds).all():
+        return np.full(len(frame), np.nan)
+
+    reference = np.nanmax(seconds) if as_of is None else pd.Timestamp(as_of).timestamp()
+    # The oldest leg decides, and a missing time leaves the age missing
+    return reference - seconds.min(axis=1)
+
+
+def fresh_quotes(df, max_age, as_of=None, update_columns='last_update'):
+    """
+    Keeps the quotes, or the combinations of quotes, not older than a maximum age.
+
+    Rows without an update time cannot be shown to be fresh and are dropped. Without `max_age`, or if the table
+    lacks the update columns, all rows are kept.
+
+    Args:
+        df (pd.DataFrame): The quotes.
+        max_age (float or None): Maximum age in seconds.
+        as_of (str or pd.Timestamp, optional): Time at which the ages are taken. Defaults to the latest update time.
+        update_columns (str or list of str, optional): Column with the update time, or one column per leg of which
+            the oldest decides. Defaults to 'last_update'.
+
+    Returns:
+        pd.DataFrame: The rows not older than `max_age`.
+    """
+    update_columns = [update_columns] if isinstance(update_columns, str) else list(update_columns)
+    if max_age is None or df.empty or not set(update_columns) <= set(df.columns):
+        return df
+    ages = quote_ages(df[update_columns], as_of)
+    return df[ages <= max_age]
@@ -0,0 +1,137 @@
+import csv
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover
+    pa = None
+
+# Arrow types of the Python types used to declare column types
+ARROW_TYPES = {float: "float64", str: "string"}
+
+# Bytes per block read by the pyarrow streaming reader
+PYARROW_BLOCK_SIZE = 1 << 20
+
+
+def read_header(src_file):
+    """
+    Reads the column names of a CSV file without parsing any of its rows.
+
+    Args:
+        src_file (Path): Path to the CSV file.
+
+    Returns:
+        list: The column names.
+    """
+    with open(src_file, newline="") as file:
+        return next(csv.reader(file))
+
+
+def _resolve(header, columns, dtype):
+    """
+    Turns column and type selectors given as callables into explicit lists and mappings for the header of a file.
+    """
+    if columns is None:
+        columns = list(header)
+    elif callable(columns):
+        columns = [column for column in header if columns(column)]
+    if callable(dtype):
+        dtype = {column: dtype(column) for column in columns}
+    return columns, dtype
+
+
+def read_raw_dump(src_file, columns=None, dtype=None, chunksize=None, engine="c"):
+    """
+    Reads a raw provider dump, parsing only the requested columns and optionally only a bounded number of rows at a
+    time.
+
+    The projection is pushed down to the parser, so columns that are not requested are skipped while tokenizing
+    instead of being converted and dropped afterwards.
+
+    Args:
+        src_file (Path): Path to the CSV file.
+        columns (list of str or callable, optional): Columns to read, or a function telling for a column name whether
+            to read it. All columns are read if None.
+        dtype (dict or callable, optional): Type (`float` or `str`) per column, or a function returning the type of a
+            column name. Types are inferred if None.
+        chunksize (int, optional): Number of rows per chunk. The whole file is read at once if None.
+        engine (str, optional): 'c' for the pandas parser or 'pyarrow' for the multithreaded pyarrow CSV reader.
+            Defaults to 'c'.
+
+    Returns:
+        pandas.DataFrame or iterator: The table, or an iterator over DataFrames of at most `chunksize` rows.
+    """
+    if engine == "pyarrow":
+        if pa is None:
+            raise ImportError("The pyarrow engine requires pyarrow to be installed.")
+        columns, dtype = _resolve(read_header(src_file), columns, dtype)
+        return _read_pyarrow(src_file, columns, dtype, chunksize)
+
+    if callable(dtype):
+        columns, dtype = _resolve(read_header(src_file), columns, dtype)
+    return pd.read_csv(src_file, usecols=columns, dtype=dtype, chunksize=chunksize)
+
+
+def previous_dump_path(src_file):
+    """
+    Returns the path at which `replace_dump` keeps the dump it replaced, e.g. 'df_odds_rapid_api_previous.csv'.
+
+    Args:
+        src_file (Path): Path to the current dump.
+
+    Returns:
+        Path: Path to the previous dump, next to the current one.
+    """
+    src_file = Path(src_file)
+    return src_file.with_name(f"{src_file.stem}_previous{src_file.suffix}")
+
+
+def replace_dump(df, src_file):
+    """
+    Writes a new raw dump, keeping the dump it replaces at `previous_dump_path`.
+
+    The two dumps are the snapshots the quote changes are derived from, so that the change log can be rebuilt from
+    the source data alone.
+
+    Args:
+        df (pandas.DataFrame): The new dump.
+        src_file (Path): Path to the dump.
+    """
+    src_file = Path(src_file)
+    if src_file.exists():
+        src_file.replace(previous_dump_path(src_file))
+    df.to_csv(src_file, index=False)
+
+
+def _read_pyarrow(src_file, columns, dtype, chunksize):
+    column_types = {column: ARROW_TYPES.get(kind, kind) for column, kind in (dtype or {}).items()}
+    convert_options = pa_csv.ConvertOptions(include_columns=columns, column_types=column_types,
+                                            strings_can_be_null=True)
+    if chunksize is None:
+        return pa_csv.read_csv(src_file, convert_options=convert_options).to_pandas()
+
+    read_options = pa_csv.ReadOptions(block_size=PYARROW_BLOCK_SIZE)
+    reader = pa_csv.open_csv(src_file, read_options=read_options, convert_options=convert_options)
+    return _rebatch(reader, chunksize)
+
+
+def _rebatch(reader, chunksize):
+    """
+    Regroups the record batches of a streaming reader, whose sizes depend on the block size in bytes, into DataFrames
+    of `chunksize` rows.
+    """
+    buffered = []
+    n_buffered = 0
+    for batch in reader:
+        buffered.append(batch)
+        n_buffered += batch.num_rows
+        while n_buffered >= chunksize:
+            table = pa.Table.from_batches(buffered)
+            yield table.slice(0, chunksize).to_pandas()
+            buffered = table.slice(chunksize).to_batches()
+            n_buffered -= chunksize
+    if n_buffered:
+        yield pa.Table.from_batches(buffered, schema=reader.schema).to_pandas()
@@ -0,0 +1,225 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+import pandas as pd
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Time-to-live in seconds per endpoint. The sports list barely changes, odds move constantly.
+DEFAULT_TTLS = {
+    "sports": 24 * 60 * 60,
+    "matches": 15 * 60,
+    "odds": 60,
+}
+
+# Query parameters holding credentials, which must never become part of a cache key
+SECRET_PARAMS = {"apiKey"}
+
+# Response headers reporting the remaining quota of The Odds API and RapidAPI
+QUOTA_HEADERS = ("x-requests-remaining", "x-requests-used", "x-ratelimit-requests-remaining")
+
+
+def cache_key(url, params=None):
+    """
+    Builds the cache key of a request from its URL and query parameters, leaving out credentials.
+
+    Args:
+        url (str): URL of the request.
+        params (dict, optional): Query string parameters.
+
+    Returns:
+        str: The cache key.
+    """
+    public_params = sorted((key, str(value)) for key, value in (params or {}).items() if key not in SECRET_PARAMS)
+    return f"{url}?{urlencode(public_params)}" if public_params else url
+
+
+class ResponseCache:
+    """
+    Persistent cache of HTTP responses stored in a SQLite file and shared by both provider modules.
+
+    Entries expire after a time-to-live that depends on the endpoint. Expired entries carrying an `ETag` or
+    `Last-Modified` header are revalidated with a conditional request instead of being downloaded again. The number
+    of entries is capped, evicting the least recently used ones. In offline mode every lookup is answered from the
+    cache regardless of its age, and requests without a cached response fail instead of reaching the network.
+
+    Args:
+        path (Path): Path of the SQLite file.
+        ttls (dict, optional): Time-to-live in seconds per endpoint. Defaults to `DEFAULT_TTLS`.
+        max_entries (int, optional): Maximum number of cached responses. Defaults to 10000.
+        offline (bool, optional): Whether to replay cached responses only. Defaults to False.
+        clock (callable, optional): Function returning the current time in seconds. Defaults to `time.time`.
+    """
+
+    def __init__(self, path, ttls=None, max_entries=10000, offline=False, clock=time.time):
+        self.path = Path(path)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self.offline = offline
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0}
+        self.quota = {}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, endpoint TEXT, status INTEGER, headers TEXT, body BLOB, "
+            "etag TEXT, last_modified TEXT, stored_at REAL, last_access REAL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    def lookup(self, key, endpoint):
+        """
+        Looks up a cached response.
+
+        Args:
+            key (str): Cache key built by `cache_key`.
+            endpoint (str): Endpoint name used to select the time-to-live.
+
+        Returns:
+            tuple: (response, fresh) where `response` is the cached `requests.Response` or None, and `fresh` tells
+                whether it can be used without contacting the API.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT status, headers, body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, False
+            status, headers, body, stored_at = row
+            now = self._clock()
+            self._connection.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+            fresh = self.offline or now - stored_at < self.ttls.get(endpoint, 0)
+            if fresh:
+                self.stats["hits"] += 1
+        return _build_response(key, status, json.loads(headers), body), fresh
+
+    def store(self, key, endpoint, response):
+        """
+        Stores a successful response and records the quota headers it carries.
+
+        Args:
+            key (str): Cache key built by `cache_key`.
+            endpoint (str): Endpoint name of the request.
+            response (requests.Response): The response to store.
+        """
+        self.record_quota(response)
+        if response.status_code != 200:
+            return
+        now = self._clock()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, response.status_code, json.dumps(dict(response.headers)), response.content,
+                 response.headers.get("ETag"), response.headers.get("Last-Modified"), now, now),
+            )
+            self._evict()
+            self._connection.commit()
+            self.stats["misses"] += 1
+
+    def refresh(self, key, response):
+        """
+        Marks a cached entry as fresh again after the API answered a conditional request with 304 Not Modified.
+
+        Args:
+            key (str): Cache key built by `cache_key`.
+            response (requests.Response): The 304 response.
+        """
+        self.record_quota(response)
+        with self._lock:
+            self._connection.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (self._clock(), key))
+            self._connection.commit()
+            self.stats["revalidated"] += 1
+
+    def conditional_headers(self, key):
+        """
+        Returns the headers turning a request into a conditional request for a cached entry.
+
+        Args:
+            key (str): Cache key built by `cache_key`.
+
+        Returns:
+            dict: `If-None-Match` and/or `If-Modified-Since` headers, empty if the entry has no validators.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, last_modified FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        headers = {}
+        if row is not None:
+            etag, last_modified = row
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def record_quota(self, response):
+        for header in QUOTA_HEADERS:
+            if header in response.headers:
+                self.quota[header] = response.headers[header]
+
+    def _evict(self):
+        excess = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_access LIMIT ?)", (excess,)
+            )
+
+    def report(self):
+        """
+        Summarizes the cache usage of the current run.
+
+        Returns:
+            dict: Counts of cache hits, misses (downloaded responses) and revalidations, the number of requests saved
+                (hits that did not reach the API) and the last quota headers seen.
+        """
+        return {**self.stats, "requests_saved": self.stats["hits"], **self.quota}
+
+    def save_report(self, path):
+        """
+        Writes the cache usage of the current run as a one-row CSV file.
+
+        Args:
+            path (str or Path): Path of the CSV file, overwritten if it exists.
+
+        Returns:
+            dict: The report as returned by `report`.
+        """
+        report = self.report()
+        pd.DataFrame([report]).to_csv(path, index=False)
+        return report
+
+
+def _build_response(key, status, headers, body):
+    """
+    Rebuilds a `requests.Response` from a cached entry.
+
+    Args:
+        key (str): Cache key, used as the response URL.
+        status (int): HTTP status code.
+        headers (dict): Response headers.
+        body (bytes): Response body.
+
+    Returns:
+        requests.Response: The rebuilt response.
+    """
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    response.url = key
+    response.encoding = "utf-8"
+    return response
@@ -1,7 +1,10 @@
 import requests
 import pandas as pd
 import os
-from arbitrage_analysis.config import SRC
+from arbitrage_analysis.config import RESPONSE_CACHE, SRC
+from arbitrage_analysis.data_management.raw_dumps import replace_dump
+from arbitrage_analysis.data_management.response_cache import ResponseCache
+from arbitrage_analysis.data_management.http_client import TokenBucket, fetch_all, get_with_retry
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -10,7 +13,14 @@ load_dotenv()
 # Access environment variables for RapidAPI
 rapid_api_key = os.getenv('RAPIDAPI_API_KEY')
 
-def get_matches_rapid_api(sport, country, competition, api_key):
+RAPID_API_HOST = "odds-api1.p.rapidapi.com"
+RAPID_API_URL = f"https://{RAPID_API_HOST}"
+
+# Requests per second allowed by the RapidAPI plan
+RAPID_API_REQUESTS_PER_SECOND = 5
+
+def get_matches_rapid_api(sport, country, competition, api_key, session=None, rate_limiter=None, max_retries=0,
+                          base_url=RAPID_API_URL, cache=None):
     """
     Fetches matches for a specified sport, country, and competition from RapidAPI.
 
@@ -19,11 +29,16 @@ def get_matches_rapid_api(sport, country, competition, api_key):
         country (str): Country to fetch matches for.
         competition (str): Competition to fetch matches for.
         api_key (str): API key for RapidAPI.
+        session (requests.Session, optional): Session to send the request with. Defaults to a plain request.
+        rate_limiter (TokenBucket, optional): Limiter from which a token is taken before every attempt.
+        max_retries (int, optional): Maximum number of retries on 429/5xx responses. Defaults to 0.
+        base_url (str, optional): Base URL of the API. Defaults to `RAPID_API_URL`.
+        cache (ResponseCache, optional): Cache answering the request while the cached response is fresh.
 
     Returns:
         JSON or str: JSON response containing the matches if successful, else an error message.
     """
-    url = "https://odds-api1.p.rapidapi.com/matches"
+    url = f"{base_url}/matches"
     querystring = {
         "sport": sport,
         "country": country,
@@ -32,82 +47,119 @@ def get_matches_rapid_api(sport, country, competition, api_key):
     }
     headers = {
         "X-RapidAPI-Key": api_key,
-        "X-RapidAPI-Host": "odds-api1.p.rapidapi.com"
+        "X-RapidAPI-Host": RAPID_API_HOST
     }
-    response = requests.get(url, headers=headers, params=querystring)
-    if response.status_code == 200:
+    response = get_with_retry(session if session is not None else requests, url, params=querystring,
+                              headers=headers, rate_limiter=rate_limiter, max_retries=max_retries, cache=cache,
+                              endpoint="matches")
+    if response is not None and response.status_code == 200:
         return response.json()  # Returns the JSON response from the API
-    else:
-        return f"Error fetching data: {response.status_code}"
+    status = response.status_code if response is not None else "no response"
+    return f"Error fetching data: {status}"
 
-def extract_matchid_bookie_pairs(csv_path):
+def matchid_bookie_pairs_from_matches(df_matches):
     """
-    Extracts match IDs and corresponding bookmakers from a CSV file.
+    Collects the match IDs and corresponding bookmakers of every match in a normalized matches response.
+
+    The matches endpoint returns one object per match keyed by its position, which `pd.json_normalize` flattens
+    into columns like '0.matchid', '0.bookie', '1.matchid', and so on. All positions are used, in numeric order.
 
     Args:
-        csv_path (str): Path to the CSV file.
+        df_matches (pd.DataFrame): Normalized matches response with one row.
 
     Returns:
         list: List of dictionaries with 'match_id' and 'bookies'.
     """
-    # Load the CSV file
-    df_matches = pd.read_csv(csv_path)
-    
+    match_indices = sorted(
+        int(column.split(".", 1)[0]) for column in df_matches.columns
+        if column.endswith(".matchid") and column.split(".", 1)[0].isdigit()
+    )
+
     # Initialize a list to hold dictionaries of matchid and corresponding bookies
     matchid_bookie_pairs = []
 
-    # Extract matchids and corresponding bookies
-    for i in range(15):  # Assuming the first 15 matches are of interest
-        matchid_column = f"{i}.matchid"
-        bookie_column = f"{i}.bookie"
-        
-        # Extract matchid and corresponding bookies
-        matchid = df_matches[matchid_column].values[0]
-        bookies = df_matches[bookie_column].values[0]  # Assuming bookies are stored as a comma-separated string
-        
-        # Append the dictionary to the list
+    for i in match_indices:
+        matchid = df_matches[f"{i}.matchid"].values[0]
+        bookies = df_matches[f"{i}.bookie"].values[0]  # Bookies are stored as a comma-separated string
+
+        # Skip positions without a match
+        if pd.isna(matchid):
+            continue
+
         matchid_bookie_pairs.append({"match_id": matchid, "bookies": bookies})
 
     return matchid_bookie_pairs
 
-def get_odds_for_matchid_bookie_pairs(matchid_bookie_pairs, api_key):
+def extract_matchid_bookie_pairs(csv_path):
+    """
+    Extracts match IDs and corresponding bookmakers of all matches from a CSV file.
+
+    Args:
+        csv_path (str): Path to the CSV file.
+
+    Returns:
+        list: List of dictionaries with 'match_id' and 'bookies'.
+    """
+    # Load the CSV file
+    df_matches = pd.read_csv(csv_path)
+
+    return matchid_bookie_pairs_from_matches(df_matches)
+
+def get_odds_for_matchid_bookie_pairs(matchid_bookie_pairs, api_key, max_workers=8,
+                                      requests_per_second=RAPID_API_REQUESTS_PER_SECOND, max_retries=3,
+                                      base_url=RAPID_API_URL, session=None, rate_limiter=None, cache=None):
     """
     Fetches odds for each match ID and corresponding bookmakers using RapidAPI.
 
+    The requests are sent concurrently over one pooled keep-alive session. A token bucket keeps the request rate
+    within the RapidAPI quota and requests failing with 429 or 5xx are retried with jittered exponential backoff.
+
     Args:
         matchid_bookie_pairs (list of dicts): List containing match IDs and bookmakers.
         api_key (str): API key for RapidAPI.
+        max_workers (int, optional): Maximum number of requests in flight at the same time. Defaults to 8.
+        requests_per_second (float, optional): Request rate limit, None disables rate limiting. Defaults to
+            `RAPID_API_REQUESTS_PER_SECOND`.
+        max_retries (int, optional): Maximum number of retries per match. Defaults to 3.
+        base_url (str, optional): Base URL of the odds endpoint. Defaults to `RAPID_API_URL`.
+        session (requests.Session, optional): Session to reuse. A pooled session is created if none is given.
+        rate_limiter (TokenBucket or RequestBudget, optional): Limiter shared with other fetches. Takes precedence
+            over `requests_per_second`.
+        cache (ResponseCache, optional): Cache answering the requests while the cached responses are fresh.
 
     Returns:
         pd.DataFrame: DataFrame containing odds data.
     """
-    all_odds = []  # List to store odds data for all matches
-    
-    for pair in matchid_bookie_pairs:
-        matchid = pair["match_id"]
-        bookies = pair["bookies"]
-        
-        url = "https://odds-api1.p.rapidapi.com/odds"
-        querystring = {
-            "matchid": matchid,
-            "bookmakers": bookies
-        }
-        headers = {
-            "X-RapidAPI-Key": api_key,
-            "X-RapidAPI-Host": "odds-api1.p.rapidapi.com"
+    headers = {
+        "X-RapidAPI-Key": api_key,
+        "X-RapidAPI-Host": RAPID_API_HOST
+    }
+    request_specs = [
+        {
+            "url": f"{base_url}/odds",
+            "params": {"matchid": pair["match_id"], "bookmakers": pair["bookies"]},
+            "headers": headers,
+            "endpoint": "odds"
         }
-        response = requests.get(url, headers=headers, params=querystring)
-
-        if response.status_code == 200:
-            odds_data = response.json()            
-            all_odds.append(odds_data)
-
+        for pair in matchid_bookie_pairs
+    ]
+    if rate_limiter is None and requests_per_second:
+        rate_limiter = TokenBucket(requests_per_second)
+    responses = fetch_all(request_specs, session=session, max_workers=max_workers, rate_limiter=rate_limiter,
+                          max_retries=max_retries, cache=cache)
+
+    all_odds = []  # List to store odds data for all matches, in the order of the input pairs
+
+    for pair, response in zip(matchid_bookie_pairs, responses):
+        if response is not None and response.status_code == 200:
+            all_odds.append(response.json())
         else:
-            print(f"Error fetching data for match {matchid} with bookies {bookies}: {response.status_code}")
-    
+            status = response.status_code if response is not None else "no response"
+            print(f"Error fetching data for match {pair['match_id']} with bookies {pair['bookies']}: {status}")
+
     # Convert the collected odds data into a DataFrame
     df_odds = pd.json_normalize(all_odds)
-     
+
     return df_odds
 
 # As the retrival depends on API keys and the data changes frequently, this code should not run via pytask.
@@ -117,8 +169,11 @@ if __name__ == "__main__":
     country = "italy"
     competition = "serie-a"
 
+    # Reuse cached responses while they are fresh
+    cache = ResponseCache(RESPONSE_CACHE)
+
     # Fetch matches data
-    matches_data = get_matches_rapid_api(sport, country, competition, rapid_api_key)
+    matches_data = get_matches_rapid_api(sport, country, competition, rapid_api_key, cache=cache)
     df_matches = pd.json_normalize(matches_data)
     df_matches.to_csv(SRC / "data" / "df_matches_rapid_api.csv", index=False)
 
@@ -128,5 +183,7 @@ if __name__ == "__main__":
     matchid_bookie_pairs = extract_matchid_bookie_pairs(csv_path)
 
     # Fetch odds data
-    df_odds = get_odds_for_matchid_bookie_pairs(matchid_bookie_pairs, rapid_api_key)
-    df_odds.to_csv(SRC / "data" / "df_odds_rapid_api.csv", index=False)
\ No newline at end of file
+    df_odds = get_odds_for_matchid_bookie_pairs(matchid_bookie_pairs, rapid_api_key, cache=cache)
+    # Keep the replaced dump as the previous snapshot the quote changes are taken against
+    replace_dump(df_odds, SRC / "data" / "df_odds_rapid_api.csv")
+    cache.save_report(SRC / "data" / "cache_report_rapid_api.csv")
\ No newline at end of file
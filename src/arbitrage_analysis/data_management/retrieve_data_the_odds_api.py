@@ -1,7 +1,10 @@
 import requests
 import pandas as pd
 import os
-from arbitrage_analysis.config import SRC
+from arbitrage_analysis.config import RESPONSE_CACHE, SRC
+from arbitrage_analysis.data_management.raw_dumps import replace_dump
+from arbitrage_analysis.data_management.response_cache import ResponseCache
+from arbitrage_analysis.data_management.http_client import get_with_retry
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -10,25 +13,47 @@ load_dotenv()
 # Access environment variables
 the_odds_api_key = os.getenv('THEODDSAPI_API_KEY')
 
-def get_sports_the_odds_api(api_key):
+THE_ODDS_API_URL = "https://api.the-odds-api.com/v4"
+
+def _json_or_error(response):
+    """
+    Returns the JSON body of a successful response, or an error message with the HTTP status code.
+
+    Args:
+        response (requests.Response or None): The response, None if the request could not be sent.
+
+    Returns:
+        dict or list or str: The JSON body, or an error message if the request failed.
+    """
+    if response is not None and response.status_code == 200:
+        return response.json()  # Returns the JSON response from the API
+    status = response.status_code if response is not None else "no response"
+    return f"Error fetching data: {status}"
+
+def get_sports_the_odds_api(api_key, session=None, rate_limiter=None, max_retries=0, base_url=THE_ODDS_API_URL,
+                            cache=None):
     """
     Fetches the list of available sports from The Odds API.
 
     Args:
         api_key (str): The API key for authenticating requests to The Odds API.
+        session (requests.Session, optional): Session to send the request with. Defaults to a plain request.
+        rate_limiter (TokenBucket, optional): Limiter from which a token is taken before every attempt.
+        max_retries (int, optional): Maximum number of retries on 429/5xx responses. Defaults to 0.
+        base_url (str, optional): Base URL of the API. Defaults to `THE_ODDS_API_URL`.
+        cache (ResponseCache, optional): Cache answering the request while the cached response is fresh.
 
     Returns:
         dict: A JSON response with the list of sports, if the request is successful.
         str: An error message with the HTTP status code, if the request fails.
     """
-    url = f"https://api.the-odds-api.com/v4/sports/?apiKey={api_key}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()  # Returns the JSON response from the API
-    else:
-        return f"Error fetching data: {response.status_code}"
+    url = f"{base_url}/sports/"
+    response = get_with_retry(session if session is not None else requests, url, params={"apiKey": api_key},
+                              rate_limiter=rate_limiter, max_retries=max_retries, cache=cache, endpoint="sports")
+    return _json_or_error(response)
 
-def get_odds_the_odds_api(sport, api_key, regions, markets):
+def get_odds_the_odds_api(sport, api_key, regions, markets, session=None, rate_limiter=None, max_retries=0,
+                          base_url=THE_ODDS_API_URL, cache=None):
     """
     Fetches odds for a specified sport from The Odds API, filtered by regions and markets.
 
@@ -37,27 +62,33 @@ def get_odds_the_odds_api(sport, api_key, regions, markets):
         api_key (str): The API key for authenticating requests to The Odds API.
         regions (str): Comma-separated string of region codes for which to fetch odds.
         markets (str): Comma-separated string of market types for which to fetch odds.
+        session (requests.Session, optional): Session to send the request with. Defaults to a plain request.
+        rate_limiter (TokenBucket, optional): Limiter from which a token is taken before every attempt.
+        max_retries (int, optional): Maximum number of retries on 429/5xx responses. Defaults to 0.
+        base_url (str, optional): Base URL of the API. Defaults to `THE_ODDS_API_URL`.
+        cache (ResponseCache, optional): Cache answering the request while the cached response is fresh.
 
     Returns:
         dict: A JSON response with the odds, if the request is successful.
         str: An error message with the HTTP status code, if the request fails.
     """
-    url = f"https://api.the-odds-api.com/v4/sports/{sport}/odds/"
+    url = f"{base_url}/sports/{sport}/odds/"
     params = {
         "apiKey": api_key,
         "regions": regions,
         "markets": markets,
     }
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        return response.json()  # Returns the JSON response from the API
-    else:
-        return f"Error fetching data: {response.status_code}"
+    response = get_with_retry(session if session is not None else requests, url, params=params,
+                              rate_limiter=rate_limiter, max_retries=max_retries, cache=cache, endpoint="odds")
+    return _json_or_error(response)
 
 # As the retrival depends on API keys and the data changes frequently, this code should not run via pytask.
 if __name__ == "__main__":
+    # Reuse cached responses while they are fresh
+    cache = ResponseCache(RESPONSE_CACHE)
+
     # Fetch and save sports to CSV
-    sports = get_sports_the_odds_api(the_odds_api_key)
+    sports = get_sports_the_odds_api(the_odds_api_key, cache=cache)
     df_sports = pd.json_normalize(sports)
     df_sports.to_csv(SRC / "data" / "df_sports_the_odds_api.csv", index=False)
 
@@ -67,7 +98,9 @@ if __name__ == "__main__":
     markets = "h2h"
 
     # Fetch odds data, print and save to CSV
-    odds_data = get_odds_the_odds_api(sport, the_odds_api_key, regions, markets)
+    odds_data = get_odds_the_odds_api(sport, the_odds_api_key, regions, markets, cache=cache)
     df_odds = pd.json_normalize(odds_data)
-    df_odds.to_csv(SRC / "data" / "df_odds_the_odds_api.csv", index=False)
+    # Keep the replaced dump as the previous snapshot the quote changes are taken against
+    replace_dump(df_odds, SRC / "data" / "df_odds_the_odds_api.csv")
+    cache.save_report(SRC / "data" / "cache_report_the_odds_api.csv")
 
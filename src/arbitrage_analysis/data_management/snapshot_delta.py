@@ -0,0 +1,156 @@
+from pathlib import Path
+
+import pandas as pd
+
+# Columns identifying a single quote in the long odds tables
+QUOTE_KEY = ['match_id', 'bookmaker', 'market', 'line', 'outcome']
+
+CHANGE_TYPES = ['insert', 'update', 'delete']
+
+
+def _differs(new, old):
+    """Element-wise inequality treating two missing values as equal."""
+    return (new != old) & ~(new.isna() & old.isna())
+
+
+def diff_quote_snapshots(previous, current, key_columns=QUOTE_KEY, value_column='price', update_column='last_update'):
+    """
+    Compares two snapshots of long-format quotes and returns only the quotes that were inserted, changed or removed.
+
+    A quote counts as updated if its price or its last update time changed.
+
+    Args:
+        previous (pd.DataFrame): The previous snapshot, empty if there is none.
+        current (pd.DataFrame): The new snapshot with the same columns.
+        key_columns (list of str, optional): Columns identifying a quote. Defaults to `QUOTE_KEY`.
+        value_column (str, optional): Column holding the price. Defaults to 'price'.
+        update_column (str, optional): Column holding the time of the last update. Defaults to 'last_update'.
+
+    Returns:
+        pd.DataFrame: The change log with the columns of `current` and a 'change' column taking the values 'insert',
+            'update' or 'delete'. Deleted quotes carry their last known values.
+    """
+    compare_columns = [value_column] + ([update_column] if update_column in current.columns else [])
+    merged = pd.merge(
+        previous[key_columns + compare_columns], current[key_columns + compare_columns],
+        on=key_columns, how='outer', suffixes=('_previous', ''), indicator=True
+    )
+
+    inserted = merged['_merge'] == 'right_only'
+    deleted = merged['_merge'] == 'left_only'
+    both = merged['_merge'] == 'both'
+    changed = pd.Series(False, index=merged.index)
+    for column in compare_columns:
+        changed |= _differs(merged[column], merged[f'{column}_previous'])
+    updated = both & changed
+
+    change = pd.Series(pd.NA, index=merged.index, dtype='object')
+    change[inserted] = 'insert'
+    change[updated] = 'update'
+    change[deleted] = 'delete'
+    merged['change'] = change
+    changes = merged.loc[inserted | updated | deleted, key_columns + ['change']]
+
+    # Attach the full rows: current values for inserts and updates, previous values for deletes
+    current_rows = pd.merge(changes[changes['change'] != 'delete'], current, on=key_columns, how='left')
+    deleted_rows = pd.merge(changes[changes['change'] == 'delete'], previous, on=key_columns, how='left')
+    non_empty = [frame for frame in (current_rows, deleted_rows) if not frame.empty]
+    if not non_empty:
+        return current.iloc[0:0].assign(change=pd.Categorical([], categories=CHANGE_TYPES))
+    change_log = pd.concat(non_empty, ignore_index=True)
+
+    change_log['change'] = pd.Categorical(change_log['change'], categories=CHANGE_TYPES)
+    return change_log[list(current.columns) + ['change']]
+
+
+def snapshot_time(times):
+    """
+    Takes the time of a snapshot from the times found in it, e.g. the update times of its quotes.
+
+    Args:
+        times (pd.Series): Times in the snapshot, naive ones taken as UTC.
+
+    Returns:
+        pd.Timestamp: The latest of the times, NaT if there is none.
+    """
+    return pd.to_datetime(times, utc=True, errors='coerce', format='ISO8601').max()
+
+
+def write_quote_changes(previous, current, changelog_path, captured_at, history=None):
+    """
+    Writes the changes between two snapshots to a change log, replacing its contents.
+
+    Unlike `ingest_snapshot`, which diffs against the state it kept from its previous call, the change log depends
+    only on the two snapshots passed in, so a pipeline task writes the same log however often it runs.
+
+    Args:
+        previous (pd.DataFrame): The previous snapshot of quotes in long format, empty if there is none.
+        current (pd.DataFrame): The new snapshot with the same columns.
+        changelog_path (Path): Path to the CSV change log.
+        captured_at (str or pd.Timestamp): Time of the new snapshot, e.g. as returned by `snapshot_time`.
+        history (OddsHistoryStore, optional): Store to which the changes are appended as well.
+
+    Returns:
+        pd.DataFrame: The changes, tagged with `captured_at`.
+    """
+    changes = diff_quote_snapshots(previous, current)
+    changes.insert(0, 'captured_at', pd.Timestamp(captured_at))
+    changes.to_csv(changelog_path, index=False)
+    if history is not None:
+        history.append(changes)
+    return changes
+
+
+def read_quote_changes(changelog_path):
+    """
+    Reads a change log written by `write_quote_changes` or `ingest_snapshot`.
+
+    Args:
+        changelog_path (Path): Path to the CSV change log.
+
+    Returns:
+        pd.DataFrame: The changes, with the identifying columns as strings and 'captured_at' in UTC.
+    """
+    changes = pd.read_csv(changelog_path, dtype={column: str for column in QUOTE_KEY if column != 'line'} |
+                          {'change': str, 'last_update': str})
+    changes['captured_at'] = pd.to_datetime(changes['captured_at'], utc=True, format='ISO8601')
+    return changes
+
+
+def ingest_snapshot(quotes, state_path, changelog_path, captured_at=None, history=None):
+    """
+    Ingests a new snapshot of quotes by appending only its differences to the previous snapshot to a change log.
+
+    The latest snapshot is kept at `state_path` and only rewritten if something changed. The change log is a CSV file
+    to which every ingestion appends its inserted, updated and deleted quotes, tagged with `captured_at`, which
+    defaults to the time of the snapshot so that a snapshot ingested again into the history is recognized.
+
+    Args:
+        quotes (pd.DataFrame): The new snapshot of quotes in long format.
+        state_path (Path): Path to the pickle file holding the previous snapshot.
+        changelog_path (Path): Path to the CSV change log.
+        captured_at (str or pd.Timestamp, optional): Time of the snapshot. Defaults to the latest update time of the
+            quotes, as returned by `snapshot_time`, or the current UTC time if the quotes carry none.
+        history (OddsHistoryStore, optional): Store to which the changes are appended as well.
+
+    Returns:
+        pd.DataFrame: The changes found in this snapshot.
+    """
+    state_path = Path(state_path)
+    changelog_path = Path(changelog_path)
+    previous = pd.read_pickle(state_path) if state_path.exists() else quotes.iloc[0:0]
+
+    changes = diff_quote_snapshots(previous, quotes)
+    if changes.empty:
+        return changes
+
+    if captured_at is None and 'last_update' in quotes:
+        captured_at = snapshot_time(quotes['last_update'])
+    if captured_at is None or pd.isna(captured_at):
+        captured_at = pd.Timestamp.now('UTC')
+    changes.insert(0, 'captured_at', pd.Timestamp(captured_at))
+    changes.to_csv(changelog_path, mode='a', header=not changelog_path.exists(), index=False)
+    if history is not None:
+        history.append(changes)
+    quotes.to_pickle(state_path)
+    return changes
@@ -0,0 +1,37 @@
+from arbitrage_analysis.config import ODDS_HISTORY, BLD_data
+from arbitrage_analysis.data_management.odds_history import OddsHistoryStore
+from arbitrage_analysis.data_management.snapshot_delta import read_quote_changes
+
+
+def append_quote_changes(changelog_paths, history_path):
+    """
+    Appends change logs to the odds history, one after another.
+
+    As the history skips changes it already holds for the same snapshot time, appending the same change logs again
+    leaves it unchanged.
+
+    Args:
+        changelog_paths (list of Path): Change logs as written by `write_quote_changes`.
+        history_path (Path): Path of the SQLite file of the `OddsHistoryStore`.
+
+    Returns:
+        int: Number of rows appended.
+    """
+    history = OddsHistoryStore(history_path)
+    try:
+        return sum(history.append(read_quote_changes(path)) for path in changelog_paths)
+    finally:
+        history.close()
+
+
+append_odds_history_depends_on = {
+    "the_odds_api": BLD_data / "quote_changes_the_odds_api.csv",
+    "rapid_api": BLD_data / "quote_changes_rapid_api.csv",
+}
+
+def task_append_odds_history(
+        depends_on=append_odds_history_depends_on,
+        produces=ODDS_HISTORY
+        ):
+    # The only task writing to the history, so that pytask orders it after both change logs
+    append_quote_changes(depends_on.values(), produces)
@@ -1,67 +1,87 @@
 import pandas as pd
 from arbitrage_analysis.config import SRC, BLD_data
+from arbitrage_analysis.data_management.bookmakers import BookmakerRegistry, keep_freshest_quotes
+from arbitrage_analysis.data_management.event_linking import link_events
+from arbitrage_analysis.data_management.team_names import TeamNameResolver
+from arbitrage_analysis.storage import load_table, save_table, table_path
 
-def standardize_team_names_and_merge(df_the_odds_api_path, df_rapid_api_path, output_path):
+def standardize_team_names_and_merge(df_the_odds_api_path, df_rapid_api_path, output_path, aliases_path=None,
+                                     unmatched_path=None, learned_aliases_path=None):
     """
     Reads, standardizes team names, and merges two DataFrames containing odds data from different APIs. 
     The standardized and merged data is then saved to a specified path.
 
     Args:
-        df_the_odds_api_path (Path): Path to the pickle file with odds data from The Odds API.
-        df_rapid_api_path (Path): Path to the pickle file with odds data from Rapid API.
-        output_path (Path): Path where the merged and standardized DataFrame is saved as a pickle file.
+        df_the_odds_api_path (Path): Path to the table with odds data from The Odds API.
+        df_rapid_api_path (Path): Path to the table with odds data from Rapid API.
+        output_path (Path): Path where the merged and standardized DataFrame is saved.
+        aliases_path (Path, optional): CSV file with the team name aliases learned in earlier runs, updated with the
+            aliases learned in this run. Aliases are not persisted if None. As the merged table then depends on earlier
+            runs, the pipeline leaves it out.
+        unmatched_path (Path, optional): CSV file listing the Rapid API events without a counterpart in The Odds API.
+            Not written if None.
+        learned_aliases_path (Path, optional): CSV file listing the team name aliases learned by fuzzy matching in
+            this run, for review. Not written if None.
 
     Returns:
         None: This function does not have a return value. It saves the calculated averages to a file specified by
          `output_path`.
     """
     # Load the DataFrames
-    df_the_odds_api = pd.read_pickle(df_the_odds_api_path)
-    df_rapid_api = pd.read_pickle(df_rapid_api_path)
+    df_the_odds_api = load_table(df_the_odds_api_path)
+    df_rapid_api = load_table(df_rapid_api_path)
 
-    # Define the mapping of team names
-    team_name_mapping = {
-        'Ssc Napoli': 'Napoli', 'Inter Milano': 'Inter Milan', 'Cagliari ': 'Cagliari',
-        'Us Sassuolo ': 'Sassuolo', 'Genoa Cfc': 'Genoa', 'Us Lecce': 'Lecce',
-        'Ac Milan': 'AC Milan', 'Juventus Turin': 'Juventus', 'Acf Fiorentina': 'Fiorentina',
-        'Fc Torino': 'Torino', 'Sportiva Salernitana': 'Salernitana', 'Frosinone ': 'Frosinone',
-        'Ac Monza': 'Monza', 'Hellas Verona Fc': 'Hellas Verona FC', 'Fc Empoli': 'Empoli',
-        'Atalanta Bergamasca ': 'Atalanta BC', 'As Roma': 'AS Roma'
-    }
-
-    # Standardize team names in df_rapid_api using the mapping
-    df_rapid_api['home_team'] = df_rapid_api['home_team'].map(team_name_mapping).fillna(df_rapid_api['home_team'])
-    df_rapid_api['away_team'] = df_rapid_api['away_team'].map(team_name_mapping).fillna(df_rapid_api['away_team'])
+    # Standardize the team names in df_rapid_api to the names used by The Odds API
+    resolver = TeamNameResolver(pd.concat([df_the_odds_api['home_team'], df_the_odds_api['away_team']]),
+                                aliases_path=aliases_path)
+    df_rapid_api['home_team'] = resolver.resolve_series(df_rapid_api['home_team'])
+    df_rapid_api['away_team'] = resolver.resolve_series(df_rapid_api['away_team'])
+    if learned_aliases_path is not None:
+        resolver.learned_aliases().to_csv(learned_aliases_path, index=False)
+    resolver.save()
 
     # Rename columns in df_rapid_api for consistency
     df_rapid_api.rename(columns={'away': 'away_win_odds', 'home': 'home_win_odds', 'draw': 'draw_odds', 'bookie': 'bookmaker'}, inplace=True)
 
-    # Merge the DataFrames
-    df_merged = pd.concat([df_the_odds_api, df_rapid_api], ignore_index=True)
-
-    # Extract unique pairs of home_team, away_team, and their commence_time from df_the_odds_api
-    commence_time_mapping = df_the_odds_api[['home_team', 'away_team', 'commence_time']].drop_duplicates()
+    # Express the Rapid API kickoff in the format of The Odds API
+    if 'match_timestamp' in df_rapid_api:
+        kickoff = pd.to_datetime(df_rapid_api.pop('match_timestamp'), unit='s', utc=True)
+        df_rapid_api['commence_time'] = kickoff.dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+    if 'scraped_date' in df_rapid_api:
+        scraped = pd.to_datetime(df_rapid_api.pop('scraped_date'), utc=True)
+        df_rapid_api['last_update'] = scraped.dt.strftime('%Y-%m-%dT%H:%M:%SZ')
 
-    # Left merge to fill in commence_time for matches in df_rapid_api based on matches in df_the_odds_api
-    df_merged_updated = pd.merge(df_merged, commence_time_mapping, on=['home_team', 'away_team'], how='left', suffixes=('', '_from_api'))
+    # Link the Rapid API events to the events of The Odds API by teams and kickoff, taking over their commence time
+    df_the_odds_api, df_rapid_api, unmatched = link_events(df_the_odds_api, df_rapid_api)
+    if unmatched_path is not None:
+        unmatched.to_csv(unmatched_path, index=False)
 
-    # Resolve any commence_time conflicts (if both columns have values, prefer the original commence_time)
-    df_merged_updated['commence_time'] = df_merged_updated['commence_time'].fillna(df_merged_updated['commence_time_from_api'])
+    # Merge the DataFrames
+    df_merged = pd.concat([df_the_odds_api, df_rapid_api], ignore_index=True)
 
-    # Drop the temporary column used for merging
-    df_merged_updated.drop(columns=['commence_time_from_api'], inplace=True)
+    # Identify each bookmaker by one ID across both APIs and keep only its most recent odds of every event
+    df_merged['bookmaker'] = BookmakerRegistry().canonicalize(df_merged['bookmaker'])
+    df_merged_updated = keep_freshest_quotes(df_merged, ['event_id', 'home_team', 'away_team', 'bookmaker'])
 
     # Sort and save the merged DataFrame
     df_merged_sorted = df_merged_updated.sort_values(by=['home_team', 'away_team'])
-    df_merged_sorted.to_pickle(output_path)
+    save_table(df_merged_sorted, output_path)
 
 standardize_and_merge_depends_on = {
-    "df_the_odds_api_path": BLD_data / "all_odds_the_odds_api.pkl",
-    "df_rapid_api_path": BLD_data / "all_odds_rapid_api.pkl"
+    "df_the_odds_api_path": table_path("all_odds_the_odds_api"),
+    "df_rapid_api_path": table_path("all_odds_rapid_api")
+}
+
+standardize_and_merge_produces = {
+    "merged": table_path("all_odds_merged"),
+    "unmatched": BLD_data / "unmatched_events_rapid_api.csv",
+    "learned_aliases": BLD_data / "team_aliases_rapid_api.csv"
 }
 
 def task_standardize_and_merge(
         depends_on= standardize_and_merge_depends_on,
-        produces= BLD_data / "all_odds_merged.pkl"
+        produces= standardize_and_merge_produces
         ):
-    standardize_team_names_and_merge(depends_on["df_the_odds_api_path"], depends_on["df_rapid_api_path"], produces)
+    standardize_team_names_and_merge(depends_on["df_the_odds_api_path"], depends_on["df_rapid_api_path"],
+                                     produces["merged"], unmatched_path=produces["unmatched"],
+                                     learned_aliases_path=produces["learned_aliases"])
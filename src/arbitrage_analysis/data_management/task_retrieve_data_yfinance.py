@@ -2,6 +2,7 @@ import yfinance as yf
 import numpy as np
 import pandas as pd
 from arbitrage_analysis.config import BLD_data
+from arbitrage_analysis.storage import save_table, table_path
 
 def calculate_average_returns(ticker, yield_average_path):
     """
@@ -12,7 +13,7 @@ def calculate_average_returns(ticker, yield_average_path):
     Args:
         ticker (str): The ticker symbol for the stock or asset to fetch historical data for.
         yield_average_path (Path): The path where the DataFrame containing the average daily changes
-                                          will be saved as a pickle file.
+                                          will be saved.
 
     Returns:
         None: This function does not have a return value. It saves the calculated averages to a file specified by
@@ -40,12 +41,12 @@ def calculate_average_returns(ticker, yield_average_path):
     averages_df = pd.DataFrame(averages, columns=['Average Daily Change'])
     averages_df = averages_df.fillna(1)
 
-    averages_df.to_pickle(yield_average_path)
+    save_table(averages_df, yield_average_path)
 
 
 def task_calculate_intervals_average(
     depends_on = BLD_data / ".dir_created",
-    produces = BLD_data / "yield_averages_BTC.pkl"
+    produces = table_path("yield_averages_BTC")
 ):
     ticker = 'BTC-USD'
     calculate_average_returns(ticker, produces)
\ No newline at end of file
@@ -1,44 +1,274 @@
+import re
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 from arbitrage_analysis.config import SRC, BLD_data
+from arbitrage_analysis.data_management.raw_dumps import previous_dump_path, read_raw_dump
+from arbitrage_analysis.data_management.snapshot_delta import snapshot_time, write_quote_changes
+from arbitrage_analysis.storage import load_table, save_table, table_path
 
-def extract_odds_rapid_api(src_file):
+ODDS_COLUMNS = ['away_team', 'home_team', 'away', 'home', 'draw', 'bookie']
+
+# Price fields of the 1X2 market
+PRICE_COLUMNS_1X2 = ['home', 'draw', 'away']
+
+# Highest decimal odds bookmakers offer. Larger numbers in price fields are IDs that were scraped in their place.
+MAX_PRICE = 1001
+
+# Fields locating a match and its quotes in time, used to link it to the events of The Odds API and to keep the
+# freshest of duplicate quotes
+EVENT_FIELDS = ['match_timestamp', 'scraped_date']
+
+# Outcome labels of the Rapid API field suffixes
+SIDES = {'1': 'home', 'X': 'draw', '2': 'away'}
+
+# Declarative parsing table: field pattern -> function returning (market, line, outcome) from the match groups
+MARKET_FIELD_PATTERNS = [
+    (r'^(home|draw|away)$', lambda m: ('h2h', np.nan, m[1])),
+    (r'^total_(over|under)_(\d)(\d)$', lambda m: ('totals', float(f'{m[2]}.{m[3]}'), m[1])),
+    (r'^hand(\d)(\d)_([12X])$', lambda m: ('handicap', float(int(m[1]) - int(m[2])), SIDES[m[3]])),
+    (r'^hand_asian_(minus|plus)_(\d+)_([12])$', lambda m: ('asian_handicap', _asian_line(m[1], m[2]), SIDES[m[3]])),
+    (r'^b_score_([yn])$', lambda m: ('btts', np.nan, {'y': 'yes', 'n': 'no'}[m[1]])),
+    (r'^double_chance_(1X|12|2X)$', lambda m: ('double_chance', np.nan, {'1X': '1X', '12': '12', '2X': 'X2'}[m[1]])),
+    (r'^draw_no_bet_([12])$', lambda m: ('draw_no_bet', np.nan, SIDES[m[1]])),
+    (r'^first_g_([12X])$', lambda m: ('first_goal', np.nan, {'1': 'home', 'X': 'none', '2': 'away'}[m[1]])),
+    (r'^last_g_([12X])$', lambda m: ('last_goal', np.nan, {'1': 'home', 'X': 'none', '2': 'away'}[m[1]])),
+    (r'^first_h_([12X])$', lambda m: ('first_half', np.nan, SIDES[m[1]])),
+    (r'^total_goals_(odd|even)$', lambda m: ('odd_even', np.nan, m[1])),
+    (r'^correct_score_(\d+)_(\d+)$', lambda m: ('correct_score', np.nan, f'{m[1]}:{m[2]}')),
+]
+
+QUOTE_COLUMNS = ['match_id', 'bookmaker', 'market', 'line', 'outcome', 'price']
+
+# Text fields of a bookmaker entry. All other fields hold numbers, mostly prices.
+STRING_FIELDS = {
+    'away_team', 'bookie', 'competition', 'country', 'date', 'home_team', 'match', 'match_status', 'match_url',
+    'matchid', 'scraped_date', 'sport', 'time'
+}
+
+def _asian_line(sign, digits):
+    """
+    Converts the line of an Asian handicap field, e.g. ('minus', '025') to -0.25 or ('plus', '1') to 1.0.
+    """
+    value = float(f'0.{digits[1:]}') if len(digits) > 1 and digits[0] == '0' else float(digits)
+    return -value if sign == 'minus' else value
+
+def parse_market_field(field):
+    """
+    Splits a Rapid API price field into its market, line and outcome.
+
+    European handicap lines are the goal start of the home team, e.g. 'hand10_1' is the home win with a one goal
+    head start (line 1.0) and 'hand02_X' is the draw after giving the away team two goals (line -2.0).
+
+    Args:
+        field (str): Field name without the entry prefix, e.g. 'total_over_25'.
+
+    Returns:
+        tuple or None: (market, line, outcome), or None if the field holds no price.
+    """
+    for pattern, parse in MARKET_FIELD_PATTERNS:
+        match = re.match(pattern, field)
+        if match:
+            return parse(match)
+    return None
+
+def rapid_api_columns(fields=(), markets=None):
+    """
+    Creates a column selector for the Rapid API dump keeping the given fields and the prices of the given markets
+    for every bookmaker entry.
+
+    Args:
+        fields (iterable of str, optional): Fields to keep, e.g. ['matchid', 'bookie'].
+        markets (iterable of str, optional): Markets whose price fields to keep, e.g. ['h2h', 'totals']. All markets
+            are kept if None, no market if empty.
+
+    Returns:
+        callable: Function telling for a column name such as '3.total_over_25' whether to read it.
+    """
+    fields = set(fields)
+    markets = None if markets is None else set(markets)
+    selected = {}
+
+    def select(column):
+        field = column.partition('.')[2]
+        if field not in selected:
+            parsed = parse_market_field(field)
+            is_market = parsed is not None and (markets is None or parsed[0] in markets)
+            selected[field] = field in fields or is_market
+        return selected[field]
+
+    return select
+
+def rapid_api_dtype(column):
+    """
+    Returns the type of a Rapid API column, e.g. for the pyarrow reader whose streaming mode infers types from the
+    first block only.
+    """
+    return str if column.partition('.')[2] in STRING_FIELDS else float
+
+def reshape_rapid_api_long(df, fields):
+    """
+    Reshapes the wide Rapid API table into a long table in a single pass over its columns.
+
+    Each row of the source holds one match, and every bookmaker entry of that match is spread over columns named
+    "{i}.field". The column names are split into (entry, field) pairs once, and each field is then gathered for all
+    entries with one block copy, so the cost grows linearly with the number of entries.
+
+    Args:
+        df (pandas.DataFrame): Wide table as saved by `retrieve_data_rapid_api`.
+        fields (list of str): Fields to keep, e.g. ['home_team', 'home'].
+
+    Returns:
+        pandas.DataFrame: One row per (entry, source row) with one column per field, ordered by entry and then by
+                          source row. The index is the position in the stacked table, entry * len(df) + source row.
+    """
+    parts = df.columns.str.extract(r'^(\d+)\.(.+)$')
+    selected = (parts[0].notna() & parts[1].isin(fields)).to_numpy()
+    column_positions = np.flatnonzero(selected)
+    column_entries = parts.loc[selected, 0].astype(int).to_numpy()
+    column_fields = parts.loc[selected, 1].to_numpy()
+
+    # Entries present in the file, in numeric order, and the row block each of them occupies
+    entries = np.unique(column_entries)
+    n_rows = len(df)
+
+    data = {}
+    for field in fields:
+        is_field = column_fields == field
+        values = df.iloc[:, column_positions[is_field]].to_numpy().T
+        dtype = np.float64 if values.dtype.kind in 'iuf' else object
+        block = np.full((len(entries), n_rows), np.nan, dtype=dtype)
+        block[np.searchsorted(entries, column_entries[is_field])] = values
+        data[field] = block.ravel()
+
+    index = (entries[:, None] * n_rows + np.arange(n_rows)).ravel()
+    long_df = pd.DataFrame(data, index=index, columns=fields)
+
+    # Restore numeric types for fields that were gathered into object arrays
+    return long_df.infer_objects()
+
+def extract_odds_rapid_api(src_file, engine='c', fields=ODDS_COLUMNS):
     """
     Reads and cleans odds data from a specified CSV file. This involves extracting key columns,
     renaming them for consistency, and removing any rows with missing values.
 
     Args:
         src_file (Path): Path to the source CSV file containing odds data.
+        engine (str, optional): CSV parser passed on to `read_raw_dump`. Defaults to 'c'.
+        fields (list of str, optional): Fields to extract. Defaults to `ODDS_COLUMNS`.
 
     Returns:
         pandas.DataFrame: Cleaned DataFrame with odds data structured with columns
-                          ['away_team', 'home_team', 'away', 'home', 'draw', 'bookie'].
-    """
-    # Read the source CSV file
-    df = pd.read_csv(src_file)
-
-    # Initialize an empty DataFrame with the desired column names
-    final_df = pd.DataFrame(columns=['away_team', 'home_team', 'away', 'home', 'draw', 'bookie'])
-
-    # Loop through each match's data, extracting and transforming relevant columns
-    for i in range(167):
-        # Define the column names to extract for this match
-        columns_to_extract = [
-            f'{i}.away_team', f'{i}.home_team', f'{i}.away', f'{i}.home', f'{i}.draw', f'{i}.bookie'
-        ]
-
-        # Check if the columns exist, then extract, rename, and concatenate them
-        if all(column in df.columns for column in columns_to_extract):
-            extracted_df = df[columns_to_extract].copy()
-            extracted_df.columns = ['away_team', 'home_team', 'away', 'home', 'draw', 'bookie']
-            final_df = pd.concat([final_df, extracted_df], ignore_index=True)
-        else:
-            break
+                          ['away_team', 'home_team', 'away', 'home', 'draw', 'bookie'] and any further `fields`.
+    """
+    # Read only the columns of the odds fields from the source CSV file
+    df = read_raw_dump(src_file, columns=rapid_api_columns(fields, markets=()), engine=engine)
+
+    # Stack the columns of all bookmaker entries into one long table
+    final_df = reshape_rapid_api_long(df, fields)
 
     # Drop any rows containing NaN values to clean the dataset
     final_df.dropna(inplace=True)
 
+    # Drop rows with an ID scraped in place of a price
+    price_columns = [column for column in PRICE_COLUMNS_1X2 if column in final_df.columns]
+    final_df = final_df[(final_df[price_columns].astype(float) <= MAX_PRICE).all(axis=1)]
+
     return final_df
 
+def _quotes_from_wide(df):
+    """
+    Extracts the quotes of all price fields present in a chunk of the wide Rapid API table.
+
+    Args:
+        df (pandas.DataFrame): Rows of the wide table holding the 'matchid', 'bookie' and price fields.
+
+    Returns:
+        pandas.DataFrame: One row per quote with the columns of `QUOTE_COLUMNS`.
+    """
+    # Parse every distinct price field once
+    fields = df.columns.str.split('.', n=1).str[1].dropna().unique()
+    parsed = {field: parse_market_field(field) for field in fields}
+    price_fields = [field for field, market in parsed.items() if market is not None]
+
+    long_df = reshape_rapid_api_long(df, ['matchid', 'bookie'] + price_fields)
+    long_df = long_df[long_df['matchid'].notna() & long_df['bookie'].notna()]
+
+    # Keep the positions of all quoted prices, the NaN of fields without a price and IDs scraped in place of a
+    # price failing the comparison
+    prices = long_df[price_fields].to_numpy(dtype=np.float32)
+    rows, columns = np.nonzero(prices <= MAX_PRICE)
+
+    match_ids = pd.Categorical(long_df['matchid'].to_numpy())
+    bookmakers = pd.Categorical(long_df['bookie'].to_numpy())
+    markets = pd.Categorical([parsed[field][0] for field in price_fields])
+    outcomes = pd.Categorical([parsed[field][2] for field in price_fields])
+    lines = np.array([parsed[field][1] for field in price_fields], dtype=np.float32)
+
+    return pd.DataFrame({
+        'match_id': pd.Categorical.from_codes(match_ids.codes[rows], match_ids.categories),
+        'bookmaker': pd.Categorical.from_codes(bookmakers.codes[rows], bookmakers.categories),
+        'market': pd.Categorical.from_codes(markets.codes[columns], markets.categories),
+        'line': lines[columns],
+        'outcome': pd.Categorical.from_codes(outcomes.codes[columns], outcomes.categories),
+        'price': prices[rows, columns],
+    }, columns=QUOTE_COLUMNS)
+
+def _concat_quote_chunks(chunks):
+    """
+    Concatenates the quotes of several chunks, merging the categories of the categorical columns.
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+    data = {}
+    for column in QUOTE_COLUMNS:
+        values = [chunk[column] for chunk in chunks]
+        if isinstance(values[0].dtype, pd.CategoricalDtype):
+            data[column] = union_categoricals(values, sort_categories=True)
+        else:
+            data[column] = np.concatenate([value.to_numpy() for value in values])
+    return pd.DataFrame(data, columns=QUOTE_COLUMNS)
+
+def extract_markets_rapid_api(src_file, markets=None, chunksize=None, engine='c'):
+    """
+    Extracts the markets of the Rapid API dump into one compact long table of quotes.
+
+    String columns are categorical and line and price are float32, so that all markets of all bookmakers fit in
+    memory and can be scanned with vectorized operations. Only the columns of the requested markets are parsed, and
+    with `chunksize` the dump is read a bounded number of matches at a time.
+
+    Args:
+        src_file (Path): Path to the source CSV file containing odds data.
+        markets (iterable of str, optional): Markets to extract, e.g. ['h2h', 'totals']. All markets if None.
+        chunksize (int, optional): Number of matches read at a time. The whole file is read at once if None.
+        engine (str, optional): CSV parser passed on to `read_raw_dump`. Defaults to 'c'.
+
+    Returns:
+        pandas.DataFrame: One row per quote with the columns ['match_id', 'bookmaker', 'market', 'line', 'outcome',
+                          'price'].
+    """
+    # The streaming pyarrow reader needs fixed types, while the pandas parser is faster inferring them
+    dtype = rapid_api_dtype if engine == 'pyarrow' else None
+    chunks = read_raw_dump(src_file, columns=rapid_api_columns(['matchid', 'bookie'], markets), dtype=dtype,
+                           chunksize=chunksize, engine=engine)
+    if chunksize is None:
+        chunks = [chunks]
+    quotes = [_quotes_from_wide(chunk) for chunk in chunks]
+    return _concat_quote_chunks([chunk for chunk in quotes if not chunk.empty] or quotes[:1])
+
+def snapshot_time_rapid_api(src_file):
+    """
+    Takes the time of a Rapid API dump from the scrape times of its bookmaker entries.
+
+    Args:
+        src_file (Path): Path to the source CSV file containing odds data.
+
+    Returns:
+        pd.Timestamp: The latest scrape time, NaT if the dump has none.
+    """
+    df = read_raw_dump(src_file, columns=rapid_api_columns(['scraped_date'], markets=[]), dtype=rapid_api_dtype)
+    return snapshot_time(pd.Series(df.to_numpy().ravel()))
+
 create_odds_dataframe_depends_on = {
     "data": SRC / "data" / "df_odds_rapid_api.csv",
     "directory": BLD_data / ".dir_created"
@@ -46,13 +276,38 @@ create_odds_dataframe_depends_on = {
 
 def task_extract_odds_rapid_api(
         depends_on= create_odds_dataframe_depends_on,
-        produces=BLD_data / "all_odds_rapid_api.pkl",
+        produces=table_path("all_odds_rapid_api"),
 ):
     # Extract the path to the source data file from task dependencies
     data_file = depends_on["data"]
 
     # Transform the source data into a cleaned DataFrame
-    all_odds_df = extract_odds_rapid_api(data_file)
+    all_odds_df = extract_odds_rapid_api(data_file, fields=ODDS_COLUMNS + EVENT_FIELDS)
     
-    # Save the transformed DataFrame to a pickle file
-    all_odds_df.to_pickle(produces)
+    # Save the transformed DataFrame
+    save_table(all_odds_df, produces)
+
+
+def task_extract_markets_rapid_api(
+        depends_on=create_odds_dataframe_depends_on,
+        produces=table_path("all_markets_rapid_api"),
+):
+    all_markets_df = extract_markets_rapid_api(depends_on["data"])
+    save_table(all_markets_df, produces)
+
+# The current dump and, once a retrieval has replaced one, the previous dump the changes are taken against
+ingest_delta_depends_on = {
+    "quotes": table_path("all_markets_rapid_api"),
+    "data": SRC / "data" / "df_odds_rapid_api.csv",
+}
+if previous_dump_path(ingest_delta_depends_on["data"]).exists():
+    ingest_delta_depends_on["previous"] = previous_dump_path(ingest_delta_depends_on["data"])
+
+def task_ingest_quote_changes_rapid_api(
+        depends_on=ingest_delta_depends_on,
+        produces=BLD_data / "quote_changes_rapid_api.csv",
+):
+    # Write the quotes that changed since the previous dump to the change log
+    current = load_table(depends_on["quotes"])
+    previous = extract_markets_rapid_api(depends_on["previous"]) if "previous" in depends_on else current.iloc[0:0]
+    write_quote_changes(previous, current, produces, snapshot_time_rapid_api(depends_on["data"]))
@@ -1,6 +1,11 @@
+import numpy as np
 import pandas as pd
+import ast
 import json
 from arbitrage_analysis.config import BLD_data, SRC
+from arbitrage_analysis.data_management.raw_dumps import previous_dump_path, read_raw_dump
+from arbitrage_analysis.data_management.snapshot_delta import snapshot_time, write_quote_changes
+from arbitrage_analysis.storage import save_table, table_path
 
 def extract_odds_the_odds_api(bookmakers_json, home_team, away_team, commence_time):
     """
@@ -17,7 +22,7 @@ def extract_odds_the_odds_api(bookmakers_json, home_team, away_team, commence_ti
         pandas.DataFrame: DataFrame containing odds from different bookmakers for the specified game, including
                           home win odds, draw odds, away win odds, and the commence time.
     """
-    bookmakers_data = json.loads(bookmakers_json.replace("'", "\""))
+    bookmakers_data = _load_bookmakers(bookmakers_json)
     bookmakers_odds = []
 
     for bookmaker in bookmakers_data:
@@ -43,6 +48,165 @@ def extract_odds_the_odds_api(bookmakers_json, home_team, away_team, commence_ti
 
     return pd.DataFrame(bookmakers_odds)
 
+EVENT_COLUMNS = ['id', 'sport_key', 'commence_time', 'home_team', 'away_team']
+
+def _load_bookmakers(bookmakers):
+    """
+    Loads the bookmakers of an event, given as JSON text, as the Python literal saved by `pd.json_normalize` and
+    `to_csv`, or already parsed.
+
+    Python literals are first read as JSON after swapping the quote characters, which is much faster than evaluating
+    them. If a team name contains an apostrophe, the swap yields invalid JSON and the literal is evaluated instead,
+    which keeps the name intact.
+
+    Args:
+        bookmakers (str or list): The bookmakers payload of one event.
+
+    Returns:
+        list: One dict per bookmaker.
+    """
+    if not isinstance(bookmakers, str):
+        return bookmakers
+    for text in (bookmakers, bookmakers.replace("'", "\"")):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+    return ast.literal_eval(bookmakers)
+
+def extract_quotes_the_odds_api(events):
+    """
+    Flattens every bookmaker, market and outcome of The Odds API events into one long table of quotes.
+
+    The payloads are parsed once, the number of outcomes is counted, and all outcomes are then written into
+    preallocated column arrays in a single pass. The DataFrame is built once at the end.
+
+    Args:
+        events (pandas.DataFrame or list of dicts): Events as saved by `retrieve_data_the_odds_api`, with the columns
+                                                    'id', 'sport_key', 'commence_time', 'home_team', 'away_team' and
+                                                    'bookmakers', or the raw JSON response of the odds endpoint.
+
+    Returns:
+        pandas.DataFrame: One row per quote with the columns 'match_id', 'sport_key', 'commence_time', 'home_team',
+                          'away_team', 'bookmaker', 'market', 'line', 'outcome', 'price' and 'last_update'.
+    """
+    if isinstance(events, pd.DataFrame):
+        df_events = events[EVENT_COLUMNS]
+        payloads = [_load_bookmakers(bookmakers) for bookmakers in events['bookmakers']]
+    else:
+        df_events = pd.DataFrame(events, columns=EVENT_COLUMNS)
+        payloads = [event['bookmakers'] for event in events]
+
+    n_quotes = sum(
+        len(market['outcomes']) for bookmakers in payloads for bookmaker in bookmakers for market in bookmaker['markets']
+    )
+
+    # Preallocated column arrays
+    event_index = np.empty(n_quotes, dtype=np.int64)
+    bookmaker_titles = np.empty(n_quotes, dtype=object)
+    market_keys = np.empty(n_quotes, dtype=object)
+    lines = np.full(n_quotes, np.nan)
+    outcome_names = np.empty(n_quotes, dtype=object)
+    prices = np.empty(n_quotes)
+    last_updates = np.empty(n_quotes, dtype=object)
+
+    position = 0
+    for event_position, bookmakers in enumerate(payloads):
+        for bookmaker in bookmakers:
+            for market in bookmaker['markets']:
+                market_update = market.get('last_update', bookmaker.get('last_update'))
+                for outcome in market['outcomes']:
+                    event_index[position] = event_position
+                    bookmaker_titles[position] = bookmaker['title']
+                    market_keys[position] = market['key']
+                    if 'point' in outcome:
+                        lines[position] = outcome['point']
+                    outcome_names[position] = outcome['name']
+                    prices[position] = outcome['price']
+                    last_updates[position] = market_update
+                    position += 1
+
+    home_teams = df_events['home_team'].to_numpy()[event_index]
+    away_teams = df_events['away_team'].to_numpy()[event_index]
+
+    # Replace team names by provider-independent outcome labels
+    outcomes = pd.Series(outcome_names).str.lower().to_numpy()
+    outcomes[outcome_names == home_teams] = 'home'
+    outcomes[outcome_names == away_teams] = 'away'
+
+    return pd.DataFrame({
+        'match_id': df_events['id'].to_numpy()[event_index],
+        'sport_key': df_events['sport_key'].to_numpy()[event_index],
+        'commence_time': df_events['commence_time'].to_numpy()[event_index],
+        'home_team': home_teams,
+        'away_team': away_teams,
+        'bookmaker': bookmaker_titles,
+        'market': market_keys,
+        'line': lines,
+        'outcome': outcomes,
+        'price': prices,
+        'last_update': last_updates,
+    })
+
+def read_quotes_the_odds_api(src_file, markets=None, chunksize=None, engine='c'):
+    """
+    Reads the saved events of The Odds API and flattens them into quotes, parsing only the columns needed.
+
+    Args:
+        src_file (Path): Path to the CSV file saved by `retrieve_data_the_odds_api`.
+        markets (iterable of str, optional): Markets to keep, e.g. ['h2h']. All markets if None.
+        chunksize (int, optional): Number of events read and flattened at a time. The whole file is read at once if
+                                   None.
+        engine (str, optional): CSV parser passed on to `read_raw_dump`. Defaults to 'c'.
+
+    Returns:
+        pandas.DataFrame: Long table of quotes as returned by `extract_quotes_the_odds_api`.
+    """
+    columns = EVENT_COLUMNS + ['bookmakers']
+    chunks = read_raw_dump(src_file, columns=columns, dtype={column: str for column in columns},
+                           chunksize=chunksize, engine=engine)
+    if chunksize is None:
+        chunks = [chunks]
+
+    quotes = []
+    for chunk in chunks:
+        df_quotes = extract_quotes_the_odds_api(chunk)
+        if markets is not None:
+            df_quotes = df_quotes[df_quotes['market'].isin(markets)]
+        quotes.append(df_quotes)
+    return pd.concat(quotes, ignore_index=True)
+
+def h2h_odds_table(df_quotes, last_update=False):
+    """
+    Turns the head-to-head quotes of the long table into one row per event and bookmaker.
+
+    Args:
+        df_quotes (pandas.DataFrame): Long table of quotes as returned by `extract_quotes_the_odds_api`.
+        last_update (bool, optional): Whether to add a 'last_update' column with the latest update time of the
+                                      row's quotes. Defaults to False.
+
+    Returns:
+        pandas.DataFrame: DataFrame with the columns 'bookmaker', 'home_team', 'away_team', 'commence_time',
+                          'home_win_odds', 'draw_odds' and 'away_win_odds', in the order of the quotes.
+    """
+    keys = ['match_id', 'bookmaker', 'home_team', 'away_team', 'commence_time']
+    h2h = df_quotes[df_quotes['market'] == 'h2h']
+
+    wide = h2h.set_index(keys + ['outcome'])['price'].unstack('outcome')
+    wide = wide.reindex(columns=['home', 'draw', 'away'])
+    wide = wide.reindex(pd.MultiIndex.from_frame(h2h[keys].drop_duplicates()))
+
+    columns = ['bookmaker', 'home_team', 'away_team', 'commence_time', 'home_win_odds', 'draw_odds', 'away_win_odds']
+    if last_update:
+        # ISO 8601 times in UTC sort as strings
+        wide['last_update'] = h2h.groupby(keys, sort=False)['last_update'].max().reindex(wide.index)
+        columns.append('last_update')
+
+    wide = wide.rename(columns={'home': 'home_win_odds', 'draw': 'draw_odds', 'away': 'away_win_odds'})
+    wide = wide.reset_index().drop(columns='match_id')
+    wide.columns.name = None
+    return wide[columns]
+
 create_odds_dataframe_depends_on = {
     "data": SRC / "data" / "df_odds_the_odds_api.csv",
     "directory": BLD_data / ".dir_created"
@@ -50,15 +214,24 @@ create_odds_dataframe_depends_on = {
 
 def task_extract_odds_the_odds_api(
         depends_on=create_odds_dataframe_depends_on,
-        produces=BLD_data / "all_odds_the_odds_api.pkl"
+        produces=table_path("all_odds_the_odds_api")
         ):
-    df_odds = pd.read_csv(depends_on["data"])
-    all_games_odds = []
+    # Flatten all events at once and keep one row of head-to-head odds per event and bookmaker
+    df_quotes = read_quotes_the_odds_api(depends_on["data"], markets=['h2h'])
+    df_all_games_odds = h2h_odds_table(df_quotes, last_update=True)
+    save_table(df_all_games_odds, produces)
 
-    for index, row in df_odds.iterrows():
-        # Include commence_time in the function call
-        game_odds_df = extract_odds_the_odds_api(row['bookmakers'], row['home_team'], row['away_team'], row['commence_time'])
-        all_games_odds.append(game_odds_df)
+# The current dump and, once a retrieval has replaced one, the previous dump the changes are taken against
+ingest_delta_depends_on = {"data": SRC / "data" / "df_odds_the_odds_api.csv"}
+if previous_dump_path(ingest_delta_depends_on["data"]).exists():
+    ingest_delta_depends_on["previous"] = previous_dump_path(ingest_delta_depends_on["data"])
+
+def task_ingest_quote_changes_the_odds_api(
+        depends_on=ingest_delta_depends_on,
+        produces=BLD_data / "quote_changes_the_odds_api.csv"
+        ):
+    df_quotes = read_quotes_the_odds_api(depends_on["data"])
+    previous = read_quotes_the_odds_api(depends_on["previous"]) if "previous" in depends_on else df_quotes.iloc[0:0]
 
-    df_all_games_odds = pd.concat(all_games_odds, ignore_index=True)
-    df_all_games_odds.to_pickle(produces)
+    # Write the quotes that changed since the previous dump to the change log
+    write_quote_changes(previous, df_quotes, produces, snapshot_time(df_quotes['last_update']))
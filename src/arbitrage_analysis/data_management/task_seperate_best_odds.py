@@ -1,49 +1,128 @@
+import numpy as np
 import pandas as pd
-from arbitrage_analysis.config import SRC, BLD_data, BLD_figures
+from arbitrage_analysis.config import MAX_QUOTE_AGE, SRC, BLD_data, BLD_figures
+from arbitrage_analysis.data_management.quote_age import fresh_quotes
+from arbitrage_analysis.storage import load_table, save_table, table_columns, table_path
 
-def find_best_odds(df_path) -> pd.DataFrame:
+# Columns identifying the outcome a price is quoted for in the long quote tables
+BEST_PRICE_KEY = ['match_id', 'market', 'line', 'outcome']
+
+# Columns identifying a match of the merged odds table, sorted by teams first. Linked quotes of both providers share
+# the event ID, and the commence time tells apart repeated pairings of a season.
+MATCH_KEY = ['home_team', 'away_team', 'commence_time', 'event_id']
+
+# Price columns of the head-to-head table by outcome
+H2H_ODDS_COLUMNS = {'home': 'home_win_odds', 'draw': 'draw_odds', 'away': 'away_win_odds'}
+
+
+def best_prices(quotes, key=BEST_PRICE_KEY, price_column='price'):
+    """
+    Selects the highest price of every outcome and the quote offering it, for markets with any number of outcomes.
+
+    All outcomes are handled in one pass: the quotes are sorted by descending price and the first quote of every
+    outcome is kept. The sort is stable, so among equal prices the quote appearing first wins.
+
+    Args:
+        quotes (pd.DataFrame): Long table with one row per quote, e.g. as returned by `extract_markets_rapid_api`.
+        key (list of str, optional): Columns identifying an outcome. Defaults to `BEST_PRICE_KEY`, i.e. event,
+            market, line and outcome.
+        price_column (str, optional): Column holding the price. Defaults to 'price'.
+
+    Returns:
+        pd.DataFrame: The quote with the best price of every outcome, with all columns of `quotes`, sorted by `key`.
+    """
+    prices = quotes[price_column].to_numpy(dtype=float)
+    quoted = quotes[~np.isnan(prices)]
+    best = quoted.iloc[np.argsort(-prices[~np.isnan(prices)], kind='stable')]
+    best = best[~best.duplicated(key)]
+    return best.sort_values(key, kind='stable').reset_index(drop=True)
+
+
+def select_best_odds(df):
+    """
+    Identifies the best odds for home wins, draws, and away wins for each match of the merged odds table, along with
+    the corresponding bookmakers.
+
+    Args:
+        df (pd.DataFrame): Merged odds with the columns 'bookmaker', 'home_team', 'away_team', 'commence_time',
+            'home_win_odds', 'draw_odds' and 'away_win_odds', and optionally 'event_id' and 'last_update'.
+
+    Returns:
+        pd.DataFrame: One row per match, as identified by `MATCH_KEY`, with the columns 'home_team', 'away_team',
+            'commence_time', 'best_odds_home', 'best_odds_draw', 'best_odds_away', 'bookie_home', 'bookie_draw' and
+            'bookie_away', preceded by 'event_id' if `df` has one. If `df` has a 'last_update' column, the update
+            times of the best quotes follow as 'last_update_home', 'last_update_draw' and 'last_update_away'.
+    """
+    match = [column for column in MATCH_KEY if column in df]
+
+    # Number the matches in sorted order once, so that the selection only compares integers
+    match_codes = df.groupby(match, sort=True, dropna=False).ngroup().to_numpy()
+    n_rows, n_outcomes = len(df), len(H2H_ODDS_COLUMNS)
+
+    # Stack the odds of all outcomes into one price column and select the best quote of every match and outcome
+    quotes = pd.DataFrame({
+        'match': np.tile(match_codes, n_outcomes),
+        'outcome': np.repeat(np.arange(n_outcomes), n_rows),
+        'row': np.tile(np.arange(n_rows), n_outcomes),
+        'price': np.concatenate([df[column].to_numpy(dtype=float) for column in H2H_ODDS_COLUMNS.values()]),
+    })
+    best = best_prices(quotes, key=['match', 'outcome'])
+
+    # Every match keeps the teams and commence time of its first row
+    first_rows = np.unique(match_codes, return_index=True)[1]
+    columns = ['event_id', 'home_team', 'away_team', 'commence_time'] if 'event_id' in df else match
+    best_odds = df.iloc[first_rows][columns].reset_index(drop=True)
+
+    # Columns taken from the best quote of every outcome
+    sources = {'bookie': df['bookmaker'].to_numpy()}
+    if 'last_update' in df:
+        sources['last_update'] = df['last_update'].to_numpy()
+
+    by_outcome = [best[best['outcome'] == position] for position in range(n_outcomes)]
+    for outcome, outcome_best in zip(H2H_ODDS_COLUMNS, by_outcome):
+        best_odds[f'best_odds_{outcome}'] = pd.Series(outcome_best['price'].to_numpy(),
+                                                      index=outcome_best['match'].to_numpy())
+    for prefix, values in sources.items():
+        for outcome, outcome_best in zip(H2H_ODDS_COLUMNS, by_outcome):
+            best_odds[f'{prefix}_{outcome}'] = pd.Series(values[outcome_best['row'].to_numpy()],
+                                                         index=outcome_best['match'].to_numpy())
+    return best_odds
+
+
+def find_best_odds(df_path, max_age=None, as_of=None) -> pd.DataFrame:
     """
     Loads betting odds data and identifies the best odds for home wins, draws, and away wins for each match, along with the corresponding bookmakers.
 
     Args:
-        df_path (Path): The path to the pickle file containing the dataset with merged odds from various bookmakers.
+        df_path (Path): The path to the table containing the dataset with merged odds from various bookmakers.
+        max_age (float, optional): Maximum age in seconds of the quotes taken into account. All quotes are used if
+            None.
+        as_of (str or pd.Timestamp, optional): Time at which the quote ages are taken. Defaults to the latest update
+            time in the table.
 
     Returns:
         pd.DataFrame: A DataFrame with columns for home team, away team, commence time, best odds for home win, draw, and away win, and the bookmakers offering these odds.
     """
-    # Load the merged odds data
-    df = pd.read_pickle(df_path)
-
-    # Initialize a list to store data for each match
-    data_to_append = []
-
-    # Iterate over each match to find the best odds and corresponding bookmakers
-    for (home_team, away_team), group in df.groupby(['home_team', 'away_team']):
-        best_home = group.loc[group['home_win_odds'].idxmax()]
-        best_draw = group.loc[group['draw_odds'].idxmax()]
-        best_away = group.loc[group['away_win_odds'].idxmax()]
-        commence_time = group['commence_time'].iloc[0]
-        
-        # Append information for each match
-        data_to_append.append({
-            'home_team': home_team,
-            'away_team': away_team,
-            'commence_time': commence_time,
-            'best_odds_home': best_home['home_win_odds'],
-            'best_odds_draw': best_draw['draw_odds'],
-            'best_odds_away': best_away['away_win_odds'],
-            'bookie_home': best_home['bookmaker'],
-            'bookie_draw': best_draw['bookmaker'],
-            'bookie_away': best_away['bookmaker']
-        })
-
-    # Convert the list of data into a DataFrame
-    return pd.DataFrame(data_to_append)
+    # Load the columns of the merged odds data needed to compare the bookmakers
+    columns = ['bookmaker', 'home_team', 'away_team', 'commence_time'] + list(H2H_ODDS_COLUMNS.values())
+    columns += [column for column in ['event_id', 'last_update'] if column in table_columns(df_path)]
+    df = load_table(df_path, columns=columns)
+
+    # Leave out quotes too old to be still on offer
+    return select_best_odds(fresh_quotes(df, max_age, as_of))
 
 
 def task_find_best_odds(
-        depends_on = BLD_data / "all_odds_merged.pkl",
-        produces = BLD_data / "best_odds_info.pkl"
+        depends_on = table_path("all_odds_merged"),
+        produces = table_path("best_odds_info")
+    ):
+    best_odds_info = find_best_odds(depends_on, max_age=MAX_QUOTE_AGE)
+    save_table(best_odds_info, produces)
+
+
+def task_find_best_prices(
+        depends_on = table_path("all_markets_rapid_api"),
+        produces = table_path("best_prices_all_markets")
     ):
-    best_odds_info = find_best_odds(depends_on)
-    best_odds_info.to_pickle(produces)
+    # Best price of every outcome of every market, line and match
+    save_table(best_prices(load_table(depends_on)), produces)
@@ -0,0 +1,160 @@
+import difflib
+import re
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+
+import pandas as pd
+
+# Tokens naming the legal form or sports club of a team rather than the team itself, e.g. 'Ssc' in 'Ssc Napoli'
+CLUB_TOKENS = {
+    'ac', 'acf', 'afc', 'as', 'asd', 'bc', 'bk', 'cf', 'cfc', 'club', 'fc', 'fk', 'if', 'sc', 'sk', 'ss', 'ssc',
+    'sv', 'ud', 'us', 'vfb', 'vfl',
+}
+
+# Number of leading characters of a token used as blocking key of the fuzzy matching
+BLOCK_PREFIX = 3
+
+# Minimum similarity for a fuzzy match to be accepted
+MATCH_THRESHOLD = 0.85
+
+# Columns of the persisted alias table
+ALIAS_COLUMNS = ['alias', 'team', 'method', 'score']
+
+
+def normalize_team_name(name):
+    """
+    Reduces a team name to a key that is equal for the spellings of the same team used by different providers.
+
+    The key is lowercase and free of accents, punctuation, repeated whitespace, club tokens such as 'Fc', 'Ac' or
+    'Ssc', and founding years such as '1919'.
+
+    Args:
+        name (str): The team name, e.g. 'Ssc Napoli '.
+
+    Returns:
+        str: The key, e.g. 'napoli'.
+    """
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii')
+    tokens = re.sub(r'[^a-z0-9]+', ' ', name.lower()).split()
+    core = [token for token in tokens if token not in CLUB_TOKENS and not token.isdigit()]
+    return ' '.join(core or tokens)
+
+
+class TeamNameResolver:
+    """
+    Maps the team names of any provider to a canonical set of names, e.g. the names used by The Odds API.
+
+    Names are first looked up by their normalized key (see `normalize_team_name`) in a hash index of the canonical
+    names and of the aliases learned so far, which resolves most names in constant time. Only names still unresolved
+    are matched fuzzily, and only against the canonical names sharing a token prefix with them. A fuzzy match is
+    accepted if its similarity reaches `threshold` and no other candidate scores as high, so the result does not
+    depend on the order of the names. Accepted matches become aliases, which can be persisted to a CSV file and are
+    reused by later runs. Names are resolved once per distinct value, so the cost grows with the number of distinct
+    names rather than with the number of rows.
+
+    Args:
+        teams (iterable of str): The canonical team names.
+        aliases_path (Path, optional): CSV file with learned aliases, read if it exists and written by `save`.
+        threshold (float, optional): Minimum similarity of a fuzzy match. Defaults to `MATCH_THRESHOLD`.
+    """
+
+    def __init__(self, teams, aliases_path=None, threshold=MATCH_THRESHOLD):
+        self.aliases_path = Path(aliases_path) if aliases_path is not None else None
+        self.threshold = threshold
+        self._index = {}
+        self._blocks = defaultdict(set)
+        self._learned = {}
+        self.unresolved = set()
+
+        for team in sorted(set(teams)):
+            key = normalize_team_name(team)
+            self._index.setdefault(key, team)
+            for token in key.split():
+                self._blocks[token[:BLOCK_PREFIX]].add(key)
+
+        if self.aliases_path is not None and self.aliases_path.exists():
+            aliases = pd.read_csv(self.aliases_path, dtype={'alias': str, 'team': str})
+            for alias, team in zip(aliases['alias'], aliases['team']):
+                self._index.setdefault(alias, team)
+
+    def _score(self, key, candidate):
+        """
+        Similarity of two keys: the string similarity, or 1 if all tokens of one key are tokens of the other, as in
+        'juventus turin' and 'juventus'.
+        """
+        tokens, candidate_tokens = set(key.split()), set(candidate.split())
+        if tokens <= candidate_tokens or candidate_tokens <= tokens:
+            return 1.0
+        return difflib.SequenceMatcher(None, key, candidate).ratio()
+
+    def _match(self, key):
+        candidates = set()
+        for token in key.split():
+            candidates |= self._blocks.get(token[:BLOCK_PREFIX], set())
+
+        scores = sorted(((self._score(key, candidate), candidate) for candidate in candidates), reverse=True)
+        if not scores or scores[0][0] < self.threshold:
+            return None
+        if len(scores) > 1 and scores[1][0] == scores[0][0]:
+            # Ambiguous, e.g. 'milan' against both 'milan' and 'inter milan'
+            return None
+        return scores[0]
+
+    def resolve(self, name):
+        """
+        Resolves a single team name.
+
+        Args:
+            name (str): The team name of any provider.
+
+        Returns:
+            str or None: The canonical team name, or None if there is no unambiguous match.
+        """
+        key = normalize_team_name(name)
+        if key in self._index:
+            return self._index[key]
+
+        match = self._match(key)
+        if match is None:
+            self.unresolved.add(name)
+            return None
+        score, candidate = match
+        team = self._index[candidate]
+        self._index[key] = team
+        self._learned[key] = (team, 'fuzzy', round(score, 4))
+        return team
+
+    def resolve_series(self, names):
+        """
+        Resolves a column of team names, keeping names without a match unchanged.
+
+        Args:
+            names (pd.Series): The team names.
+
+        Returns:
+            pd.Series: The canonical team names.
+        """
+        mapping = {name: self.resolve(name) for name in pd.unique(names.dropna())}
+        return names.map(mapping).fillna(names)
+
+    def learned_aliases(self):
+        """
+        Returns the aliases learned by fuzzy matching and not yet saved.
+
+        Returns:
+            pd.DataFrame: One row per alias with the columns `ALIAS_COLUMNS`, sorted by alias.
+        """
+        return pd.DataFrame([(alias, *match) for alias, match in sorted(self._learned.items())],
+                            columns=ALIAS_COLUMNS)
+
+    def save(self):
+        """
+        Adds the aliases learned by fuzzy matching to the alias file, if one was given.
+        """
+        if self.aliases_path is None or not self._learned:
+            return
+        learned = self.learned_aliases()
+        self.aliases_path.parent.mkdir(parents=True, exist_ok=True)
+        learned.to_csv(self.aliases_path, mode='a', header=not self.aliases_path.exists(), index=False)
+        self._learned = {}
@@ -1,4 +1,5 @@
 from arbitrage_analysis.config import BLD_data, BLD_figures
+from arbitrage_analysis.storage import load_table, table_path
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.colors import qualitative
@@ -57,7 +58,7 @@ def plot_kernel_density_estimate(all_odds_x, all_odds_y, df_arb_opp, produces):
 
 depends_on_plot_kde = {
     "odds_kde": BLD_data / "odds_kde_with_arbitrage_opportunities.pkl",
-    "arbitrage_opportunities": BLD_data / "arbitrage_opportunities.pkl"
+    "arbitrage_opportunities": table_path("arbitrage_opportunities")
 } 
 
 def task_plot_kde(
@@ -65,5 +66,5 @@ def task_plot_kde(
     produces = BLD_figures / 'kde_with_arbitrage_opportunities.png'
     ):
     all_odds_x, all_odds_y = pd.read_pickle(depends_on["odds_kde"])
-    df_arb_opp = pd.read_pickle(depends_on["arbitrage_opportunities"])
+    df_arb_opp = load_table(depends_on["arbitrage_opportunities"])
     plot_kernel_density_estimate(all_odds_x, all_odds_y, df_arb_opp, produces)
\ No newline at end of file
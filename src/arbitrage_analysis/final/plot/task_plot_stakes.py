@@ -1,6 +1,7 @@
 import plotly.graph_objects as go
 import pandas as pd
-from arbitrage_analysis.config import BLD_data, BLD_figures
+from arbitrage_analysis.config import BLD_data, BLD_figures, TOTAL_INVESTMENT
+from arbitrage_analysis.storage import load_table, table_path
 
 def plot_arbitrage_opportunities(data_path, fig_path):
     """
@@ -11,7 +12,7 @@ def plot_arbitrage_opportunities(data_path, fig_path):
     The resulting plot is saved to a specified location.
 
     Args:
-        data_path (Path): Path to a pickle file containing arbitrage opportunities. This file
+        data_path (Path): Path to a table containing arbitrage opportunities. This table
             should contain a DataFrame with columns specifying stakes and potential payouts.
         fig_path (Path): Path where the generated plot figure will be saved.
 
@@ -19,11 +20,11 @@ def plot_arbitrage_opportunities(data_path, fig_path):
         None: The plot is directly saved to the location specified by `fig_path`.
 
     """
-    arb_opportunities = pd.read_pickle(data_path)
+    arb_opportunities = load_table(data_path)
     fig = go.Figure()
     bar_width = 0.2
     offset = 0.2
-    total_investment = 100
+    total_investment = TOTAL_INVESTMENT
 
     for i, row in enumerate(arb_opportunities.itertuples(index=False)):
         match_index = i
@@ -49,7 +50,7 @@ def plot_arbitrage_opportunities(data_path, fig_path):
     fig.write_image(fig_path)
 
 def task_plot_stakes(
-    depends_on = BLD_data / "arbitrage_opportunities.pkl",
+    depends_on = table_path("arbitrage_opportunities"),
     produces = BLD_figures / "arbitrage_opportunities.png"
     ):
     plot_arbitrage_opportunities(depends_on, produces)
\ No newline at end of file
@@ -2,6 +2,7 @@ import pandas as pd
 import plotly.graph_objects as go
 from datetime import timedelta
 from arbitrage_analysis.config import BLD_data, BLD_figures
+from arbitrage_analysis.storage import load_table, table_path
 
 
 def plot_investment_growth(filtered_arbitrage_opp_path, investment_growth_path, btc_ticker_path):
@@ -11,16 +12,16 @@ def plot_investment_growth(filtered_arbitrage_opp_path, investment_growth_path,
     This function reads filtered arbitrage opportunities data and BTC yield averages from specified paths, then generates a time series plot. The x-axis represents dates of each bet, and the y-axis shows the cumulative value of the investment over time. Betting events are indicated with colored dots, and BTC yield averages are plotted for comparison.
 
     Args:
-        filtered_arbitrage_opp_path (Path or str): Path to the pickle file with filtered arbitrage opportunities data.
+        filtered_arbitrage_opp_path (Path or str): Path to the table with filtered arbitrage opportunities data.
         investment_growth_path (Path or str): File path where the generated plot image will be saved.
-        btc_ticker_path (Path or str): Path to the pickle file with Bitcoin yield averages data.
+        btc_ticker_path (Path or str): Path to the table with Bitcoin yield averages data.
 
     Returns:
         None: The plot is directly saved to the location specified by `investment_growth_path`.
     """
     # Load the filtered dataset
-    df_filtered = pd.read_pickle(filtered_arbitrage_opp_path)
-    ticker_averages = pd.read_pickle(btc_ticker_path)
+    df_filtered = load_table(filtered_arbitrage_opp_path)
+    ticker_averages = load_table(btc_ticker_path)
     
     # Sort the DataFrame by commence_time to ensure chronological order
     df_filtered = df_filtered.sort_values(by='commence_time')
@@ -70,8 +71,8 @@ def plot_investment_growth(filtered_arbitrage_opp_path, investment_growth_path,
     fig.write_image(investment_growth_path)
 
 depends_on_plot_investment = {
-    "filtered_arbitrage_opp_path": BLD_data / "filtered_arbitrage_opportunities.pkl",
-    "ticker_path": BLD_data / "benchmark_growth_path_BTC.pkl"
+    "filtered_arbitrage_opp_path": table_path("filtered_arbitrage_opportunities"),
+    "ticker_path": table_path("benchmark_growth_path_BTC")
 }
 
 def task_plot_investment_growth(
@@ -1,5 +1,6 @@
 import pandas as pd
 from arbitrage_analysis.config import BLD_data, BLD_tables
+from arbitrage_analysis.storage import load_table, table_path
 
 def _format_column_name(col_name):
     """
@@ -21,27 +22,27 @@ def _format_column_name(col_name):
 
 def display_stakes_in_latex(file_path, output_path):
     """
-    Reads a DataFrame from a pickle file, selects and renames specific columns, then exports it as a LaTeX table.
+    Reads a DataFrame from a stored table, selects and renames specific columns, then exports it as a LaTeX table.
 
     This function processes a DataFrame containing arbitrage stakes information by selecting relevant columns,
     formatting their names for readability, and finally converting the data into a LaTeX table format. The resultant
     table is saved to a specified file path.
 
     Args:
-        file_path (str): Path to the pickle (.pkl) file containing the DataFrame with arbitrage opportunities.
+        file_path (str): Path to the table with arbitrage opportunities.
         output_path (str): Destination path for the generated LaTeX table file.
 
     Returns:
         None: The LaTeX table is written to `output_path`, with no value returned.
     """
-    # Load the DataFrame from .pkl file
-    df = pd.read_pickle(file_path)
-    
-    # Select and rename columns
+    # Select the columns and load only those
     selected_columns = [
         'home_team', 'away_team', 'best_odds_home', 'best_odds_draw', 'best_odds_away',
         'stake_home', 'stake_draw', 'stake_away', 'payout_home'
     ]
+    df = load_table(file_path, columns=selected_columns)
+    
+    # Rename columns
     df = df[selected_columns]
     
     # Rename 'payout_home' to 'Safe Payout' and format other column names
@@ -55,7 +56,7 @@ def display_stakes_in_latex(file_path, output_path):
         file.write(latex_table)
 
 def task_display_stakes_in_latex(
-    depends_on = BLD_data / "arbitrage_opportunities.pkl",
+    depends_on = table_path("arbitrage_opportunities"),
     produces = BLD_tables / "arbitrage_opportunities.tex"
 ):
     display_stakes_in_latex(depends_on, produces)
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""Storage of the intermediate tables handed from one pipeline stage to the next."""
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.config import BLD_data, PARTITION_COLUMNS, STORAGE_FORMAT
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    from pyarrow.fs import LocalFileSystem
+except ImportError:  # pragma: no cover
+    pa = None
+
+# File suffix of every storage format, and the pyarrow dataset format behind the columnar ones
+FILE_SUFFIXES = {"parquet": ".parquet", "arrow": ".arrow", "pickle": ".pkl"}
+DATASET_FORMATS = {".parquet": "parquet", ".arrow": "ipc"}
+
+# Partition column derived from 'commence_time', and the column keeping the row order across partitions
+DATE_PARTITION = "commence_date"
+ROW_COLUMN = "_row"
+
+# Manifest written into every partitioned table. As pytask only tracks files, it stands for the whole directory.
+TABLE_MANIFEST = "_table.json"
+
+
+def table_path(name, storage_format=STORAGE_FORMAT):
+    """
+    Returns the path of an intermediate table in BLD_data for the configured storage format.
+
+    Args:
+        name (str): Name of the table, e.g. 'all_odds_merged'.
+        storage_format (str, optional): 'parquet', 'arrow' or 'pickle'. Defaults to `STORAGE_FORMAT`.
+
+    Returns:
+        Path: The manifest of the table directory for the partitioned formats, the file itself for pickle.
+    """
+    path = BLD_data / f"{name}{FILE_SUFFIXES[storage_format]}"
+    return path / TABLE_MANIFEST if path.suffix in DATASET_FORMATS else path
+
+
+def _dataset_directory(path):
+    """
+    Returns the directory of a partitioned table given either the directory or its manifest.
+    """
+    path = Path(path)
+    return path.parent if path.name == TABLE_MANIFEST else path
+
+
+def _is_dataset(path):
+    return _dataset_directory(path).suffix in DATASET_FORMATS
+
+
+def _string_partitioning(columns):
+    return ds.partitioning(pa.schema([(column, pa.string()) for column in columns]), flavor="hive")
+
+
+def save_table(df, path, partition_columns=PARTITION_COLUMNS):
+    """
+    Saves a table in the format given by the suffix of `path`.
+
+    Parquet ('.parquet') and Arrow IPC ('.arrow') tables are written as a directory partitioned by those
+    `partition_columns` that the table has, together with a manifest listing the partitioning and the columns. The
+    partition 'commence_date' is derived from 'commence_time'. Any other suffix is written as a pickle. The index is
+    not stored.
+
+    Args:
+        df (pandas.DataFrame): The table to save.
+        path (Path or str): Destination path, the table directory or its manifest as returned by `table_path`.
+        partition_columns (list of str, optional): Columns to partition by. Defaults to `PARTITION_COLUMNS`.
+    """
+    if not _is_dataset(path):
+        df.to_pickle(path)
+        return
+
+    path = _dataset_directory(path)
+    dataset_format = DATASET_FORMATS[path.suffix]
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if DATE_PARTITION in partition_columns and DATE_PARTITION not in df.columns and "commence_time" in df.columns:
+        dates = pd.to_datetime(df["commence_time"], utc=True, errors="coerce").dt.strftime("%Y-%m-%d")
+        table = table.append_column(DATE_PARTITION, pa.array(dates, type=pa.string(), from_pandas=True))
+    table = table.append_column(ROW_COLUMN, pa.array(np.arange(len(df), dtype=np.int64)))
+
+    # Rewrite the whole table so that no partition of a previous run is left behind
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+    path.mkdir(parents=True)
+
+    partitions = [column for column in partition_columns if column in table.column_names]
+    if table.num_rows == 0 or not partitions:
+        # A dataset write skips empty tables, which would lose the schema
+        partitions = []
+        if dataset_format == "parquet":
+            pq.write_table(table, path / "part-0.parquet")
+        else:
+            feather.write_feather(table, path / "part-0.arrow", compression="uncompressed")
+    else:
+        # Partition values are directory names, so they are stored and read back as strings
+        for column in partitions:
+            table = table.set_column(table.schema.get_field_index(column), column, table[column].cast(pa.string()))
+        ds.write_dataset(table, path, format=dataset_format, partitioning=_string_partitioning(partitions),
+                         existing_data_behavior="overwrite_or_ignore")
+
+    manifest = {"format": dataset_format, "partition_columns": partitions, "columns": list(map(str, df.columns)),
+                "rows": len(df)}
+    (path / TABLE_MANIFEST).write_text(json.dumps(manifest, indent=2))
+
+
+def table_columns(path):
+    """
+    Returns the column names of a table saved by `save_table`, reading only the manifest of partitioned tables.
+
+    Args:
+        path (Path or str): Path of the table, for partitioned tables the directory or its manifest.
+
+    Returns:
+        list of str: The column names.
+    """
+    if not _is_dataset(path):
+        return list(pd.read_pickle(path).columns)
+    return json.loads((_dataset_directory(path) / TABLE_MANIFEST).read_text())["columns"]
+
+
+def load_table(path, columns=None, filters=None):
+    """
+    Loads a table saved by `save_table`, reading only the requested columns and partitions.
+
+    Parquet and Arrow IPC datasets are read through memory maps, and uncompressed Arrow IPC files are used without
+    copying. Partitions not matching `filters` are skipped without opening their files.
+
+    Args:
+        path (Path or str): Path of the table, for partitioned tables the directory or its manifest.
+        columns (list of str, optional): Columns to read. All stored columns if None.
+        filters (list of tuples or pyarrow.compute.Expression, optional): Row filter such as
+            [('sport_key', '==', 'soccer_italy_serie_a'), ('commence_date', '>=', '2024-03-03')]. Filters on the
+            partition columns prune whole partitions. Only supported for Parquet and Arrow IPC.
+
+    Returns:
+        pandas.DataFrame: The table in the row order in which it was saved.
+    """
+    if not _is_dataset(path):
+        if filters is not None:
+            raise ValueError("Filters are only supported for Parquet and Arrow IPC tables.")
+        df = pd.read_pickle(path)
+        return df if columns is None else df[columns]
+
+    path = _dataset_directory(path)
+    manifest = json.loads((path / TABLE_MANIFEST).read_text())
+    dataset = ds.dataset(path, format=manifest["format"],
+                         partitioning=_string_partitioning(manifest["partition_columns"]),
+                         filesystem=LocalFileSystem(use_mmap=True))
+    if filters is not None and not isinstance(filters, ds.Expression):
+        filters = pq.filters_to_expression(filters)
+
+    # Without a projection, return the columns of the saved DataFrame in their original order
+    if columns is None:
+        columns = manifest["columns"]
+
+    table = dataset.to_table(columns=list(columns) + [ROW_COLUMN], filter=filters)
+    df = table.to_pandas()
+    return df.sort_values(ROW_COLUMN).drop(columns=ROW_COLUMN).reset_index(drop=True)
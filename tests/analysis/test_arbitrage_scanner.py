@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.arbitrage_scanner import price_matrix, scan_arbitrage, scan_line_market, scan_markets
+
+
+def test_scan_arbitrage_equalizes_payouts():
+    """Checks that 2-way and 3-way instances are scanned at once and every outcome of an instance pays the same."""
+    prices = np.array([[2.10, 2.05, np.nan], [1.90, 1.90, np.nan], [2.0, 3.6, 6.0]])
+    two_way = scan_arbitrage(prices[:2, :2], 100)
+    three_way = scan_arbitrage(prices[2:], 100)
+
+    np.testing.assert_allclose(two_way['total_imp_prob'], [1 / 2.10 + 1 / 2.05, 2 / 1.90])
+    np.testing.assert_allclose(two_way['stakes'].sum(axis=1), [100, 100])
+    np.testing.assert_allclose(two_way['stakes'] * prices[:2, :2], np.repeat(two_way['payout'][:, None], 2, axis=1))
+    assert three_way['arb_profit_margin'][0] > 0
+    assert np.isnan(scan_arbitrage(prices[:1], 100)['total_imp_prob'][0]), "A missing price leaves no coverage."
+
+
+def test_scan_markets_finds_opportunities_across_markets():
+    """Ensures the best prices of several markets and lines are arranged into matrices and only arbitrages remain."""
+    best = pd.DataFrame({
+        'match_id': [1, 1, 1, 1, 1, 1, 1, 2, 2],
+        'market': ['totals', 'totals', 'totals', 'totals', 'h2h', 'h2h', 'h2h', 'btts', 'double_chance'],
+        'line': [2.5, 2.5, 3.5, 3.5, np.nan, np.nan, np.nan, np.nan, np.nan],
+        'outcome': ['over', 'under', 'over', 'under', 'home', 'draw', 'away', 'yes', '1X'],
+        'bookmaker': ['pinnacle', 'unibet', 'pinnacle', 'unibet', 'betfair', 'unibet', 'pinnacle', 'unibet',
+                      'unibet'],
+        'price': [2.10, 2.05, 3.10, 1.35, 2.0, 3.6, 6.0, 1.80, 1.20],
+    })
+
+    instances, prices, bookmakers = price_matrix(best, 'totals', ['over', 'under'])
+    assert instances['line'].tolist() == [2.5, 3.5]
+    assert prices.tolist() == [[2.10, 2.05], [3.10, 1.35]]
+    assert bookmakers[0].tolist() == ['pinnacle', 'unibet']
+
+    legs = scan_markets(best, 100)
+    assert legs[['market', 'outcome', 'bookmaker']].values.tolist() == [
+        ['h2h', 'home', 'betfair'], ['h2h', 'draw', 'unibet'], ['h2h', 'away', 'pinnacle'],
+        ['totals', 'over', 'pinnacle'], ['totals', 'under', 'unibet']], "Only complete, non-overlapping arbitrages."
+    np.testing.assert_allclose(legs.groupby('market')['stake'].sum(), [100, 100])
+    np.testing.assert_allclose(legs['stake'] * legs['price'], legs['payout'])
+
+
+def test_pushes_lower_the_payout_of_line_markets():
+    """Checks that whole lines and draw no bet cannot pay more than the stakes and quarter lines pay half bets."""
+    best = pd.DataFrame({
+        'match_id': [1] * 8,
+        'market': ['draw_no_bet'] * 2 + ['asian_handicap'] * 4 + ['totals'] * 2,
+        'line': [np.nan, np.nan, -1.0, -1.0, -0.75, -0.75, 2.5, 2.5],
+        'outcome': ['home', 'away', 'home', 'away', 'home', 'away', 'over', 'under'],
+        'bookmaker': ['a', 'b'] * 4,
+        'price': [2.1, 2.05] * 4,
+    })
+
+    legs = scan_markets(best, 100)
+
+    assert legs[['market', 'line']].drop_duplicates().values.tolist() == [['asian_handicap', -0.75],
+                                                                          ['totals', 2.5]]
+    quarter = legs[legs['line'] == -0.75]
+    # Home -0.75 winning by one goal wins half of its stake at 2.1 and refunds the other half, the away side losing
+    # half of its stake
+    stakes = quarter['stake'].to_numpy()
+    np.testing.assert_allclose(quarter['payout'].iloc[0], min(2.1 * stakes[0], 1.55 * stakes[0] + 0.5 * stakes[1],
+                                                              2.05 * stakes[1]))
+    assert quarter['payout'].iloc[0] < 100 / (1 / 2.1 + 1 / 2.05)
+    whole = scan_line_market(np.array([[2.1, 2.05]]), np.array([1.0]), 100)
+    np.testing.assert_allclose(whole['payout'], 100)
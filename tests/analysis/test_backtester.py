@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.backtester import (BestYieldPolicy, ProportionalPolicy, TopNPolicy, backtest,
+                                                    summarize_backtest)
+
+
+def _legs(opportunities):
+    """Builds 2-way legs at the bookmakers 'a' and 'b' from (match, placed hour, settled hour, price, won) tuples."""
+    rows = []
+    for match_id, placed, settled, price, won in opportunities:
+        for bookmaker, outcome_won in (('a', won), ('b', not won)):
+            rows.append({'match_id': match_id, 'market': 'btts', 'line': np.nan,
+                         'placed_at': pd.Timestamp('2024-03-01') + pd.Timedelta(hours=placed),
+                         'settles_at': pd.Timestamp('2024-03-01') + pd.Timedelta(hours=settled),
+                         'bookmaker': bookmaker, 'price': price, 'won': outcome_won})
+    return pd.DataFrame(rows)
+
+
+def test_stakes_are_locked_until_settlement():
+    """Checks that capital locked in an open bet cannot be staked again before it is settled at the winner."""
+    legs = _legs([('m1', 0, 10, 2.2, True), ('m2', 1, 12, 2.1, True), ('m1', 2, 10, 2.3, True),
+                  ('m3', 10, 20, 2.1, False)])
+
+    result = backtest(legs, BestYieldPolicy(), bankroll={'a': 50, 'b': 80})
+
+    bets = result['bets']
+    assert bets['match_id'].tolist() == ['m1', 'm3'], "m2 finds no free capital and m1 is staked on only once."
+    # The payout of m1 went to 'a', so the capital left at 'b' limits m3
+    np.testing.assert_allclose(bets['stake'], [100, 60])
+    np.testing.assert_allclose(bets['payout'], [110, 63])
+    np.testing.assert_allclose(result['balances'].loc[['a', 'b']], [80, 63])
+    assert result['capital']['event'].tolist() == ['placement', 'settlement', 'placement', 'settlement']
+    np.testing.assert_allclose(result['capital']['locked'], [100, 0, 60, 0], atol=1e-9)
+
+
+def test_policies_select_among_simultaneous_opportunities():
+    """Ensures the policies pick the best, the top n or all opportunities detected at the same time."""
+    margins = np.array([0.01, 0.03, 0.02])
+    capacity = np.array([50.0, 40.0, 30.0])
+
+    np.testing.assert_allclose(BestYieldPolicy(max_stake=20)(margins, capacity, 100), [0, 20, 0])
+    np.testing.assert_allclose(TopNPolicy(2)(margins, capacity, 100), [0, 40, 30])
+    np.testing.assert_allclose(ProportionalPolicy(0.6)(margins, capacity, 100), [10, 30, 20])
+
+
+def test_backtest_draws_one_winner_per_opportunity():
+    """Checks that without results every placed opportunity pays out once, so the profits add up to the capital."""
+    rng = np.random.default_rng(0)
+    opportunities = [(f'm{i}', i, i + rng.integers(1, 30), rng.uniform(2.01, 2.1), True) for i in range(200)]
+    legs = _legs(opportunities).drop(columns='won')
+
+    result = backtest(legs, TopNPolicy(1, max_stake=10), bankroll=1000)
+
+    summary = summarize_backtest(result, 1000)
+    np.testing.assert_allclose(summary['final_capital'], 1000 + result['bets']['profit'].sum())
+    assert summary['bets'] == 200 and summary['max_locked'] <= 300
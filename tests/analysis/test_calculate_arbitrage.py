@@ -2,7 +2,8 @@ import pandas as pd
 import pytest
 import os
 import numpy as np
-from arbitrage_analysis.analysis.task_calculate_arbitrage import identify_arbitrage_opportunities
+from arbitrage_analysis.analysis.task_calculate_arbitrage import arbitrage_by_quote_age, identify_arbitrage_opportunities
+from arbitrage_analysis.data_management.task_seperate_best_odds import find_best_odds
 
 # Sample data
 data = {
@@ -32,4 +33,48 @@ def test_identify_arbitrage_opportunities(setup_data):
     assert os.path.exists(output_path), "Output file was not created."
     assert not result_df.empty, "No arbitrage opportunities were identified."
     np.testing.assert_allclose(result_df['payout_home'].values, result_df['payout_draw'].values, rtol=1e-5, atol=0, err_msg="Payouts for home and draw should be almost equal.")
-    np.testing.assert_allclose(result_df['payout_home'].values, result_df['payout_away'].values, rtol=1e-5, atol=0, err_msg="Payouts for home and away should be almost equal.")
\ No newline at end of file
+    np.testing.assert_allclose(result_df['payout_home'].values, result_df['payout_away'].values, rtol=1e-5, atol=0, err_msg="Payouts for home and away should be almost equal.")
+
+def _quotes_with_update_times():
+    """Merged odds of two matches, the away price of 8.00 being an hour older than the other quotes."""
+    return pd.DataFrame({
+        'bookmaker': ['pinnacle', 'unibet', 'betfair', 'unibet'],
+        'home_team': ['AC Milan', 'AC Milan', 'AC Milan', 'AS Roma'],
+        'away_team': ['Empoli', 'Empoli', 'Empoli', 'Sassuolo'],
+        'commence_time': ['2024-03-10T14:00:00Z'] * 3 + ['2024-03-17T17:00:00Z'],
+        'home_win_odds': [2.00, 1.50, 1.40, 1.44],
+        'draw_odds': [3.20, 3.40, 3.00, 5.60],
+        'away_win_odds': [4.00, 3.50, 8.00, 8.50],
+        'last_update': ['2024-03-03T20:15:00Z', '2024-03-03T20:14:00Z', '2024-03-03T19:00:00Z',
+                        '2024-03-03T20:16:00Z'],
+    })
+
+def test_stale_quotes_are_left_out(tmp_path):
+    """Checks that opportunities with a stale leg are dropped and the age report counts the removed ones."""
+    df = _quotes_with_update_times()
+    report = arbitrage_by_quote_age(df, [10 * 60]).set_index('max_age', drop=False)
+    assert report['opportunities'].tolist() == [2, 1], "The stale price of 8.00 should only count without a limit."
+    assert report['removed'].tolist() == [0, 1]
+    assert report['quotes'].tolist() == [4, 3]
+
+    merged_path, best_odds_path = tmp_path / "merged.pkl", tmp_path / "best_odds.pkl"
+    df.to_pickle(merged_path)
+    find_best_odds(merged_path, max_age=10 * 60).to_pickle(best_odds_path)
+    output_path = tmp_path / "arbitrage.pkl"
+    identify_arbitrage_opportunities(best_odds_path, 100, output_path)
+    assert pd.read_pickle(output_path)['home_team'].tolist() == ['AS Roma']
+
+def test_age_report_agrees_with_the_opportunities(tmp_path):
+    """Ensures the age report counts the opportunities identified from the best odds of the quotes of each age."""
+    df = _quotes_with_update_times()
+    merged_path = tmp_path / "merged.pkl"
+    df.to_pickle(merged_path)
+    thresholds = [60, 10 * 60, 90 * 60]
+
+    for as_of in [None, '2024-03-03T20:20:00Z']:
+        report = arbitrage_by_quote_age(df, thresholds, as_of=as_of)
+        for max_age, expected in zip([None] + thresholds, report['opportunities']):
+            best_odds_path, output_path = tmp_path / "best_odds.pkl", tmp_path / "arbitrage.pkl"
+            find_best_odds(merged_path, max_age=max_age, as_of=as_of).to_pickle(best_odds_path)
+            identify_arbitrage_opportunities(best_odds_path, 100, output_path)
+            assert len(pd.read_pickle(output_path)) == expected, f"Counts differ at {max_age} s as of {as_of}."
@@ -1,27 +1,23 @@
-import pandas as pd
-from arbitrage_analysis.analysis.task_calculate_arbitrage import _calculate_stakes
+import numpy as np
+from arbitrage_analysis.analysis.arbitrage_scanner import scan_arbitrage
 
 def test_calculate_stakes():
     """Validates that stakes are correctly calculated for a given arbitrage opportunity."""
-    # Creating a sample row with arbitrage opportunity
-    sample_row = pd.Series({
-        'best_odds_home': 2.0,
-        'best_odds_draw': 3.0,
-        'best_odds_away': 6.0,
-        'total_imp_prob': 0.9
-    })
+    # Creating a sample opportunity with the best odds of home, draw and away
+    prices = np.array([[2.0, 3.0, 6.0]])
+    total_imp_prob = 1 / 2.0 + 1 / 3.0 + 1 / 6.0
 
     total_investment = 100
 
     # Manually calculating expected stakes
-    expected_stake_home = (1 / 2.0 / 0.9) * total_investment
-    expected_stake_draw = (1 / 3.0 / 0.9) * total_investment
-    expected_stake_away = (1 / 6.0 / 0.9) * total_investment
+    expected_stake_home = (1 / 2.0 / total_imp_prob) * total_investment
+    expected_stake_draw = (1 / 3.0 / total_imp_prob) * total_investment
+    expected_stake_away = (1 / 6.0 / total_imp_prob) * total_investment
 
-    # Calling the calculate_stakes function
-    calculated_row = _calculate_stakes(sample_row, total_investment)
+    # Calling the vectorized scan
+    stake_home, stake_draw, stake_away = scan_arbitrage(prices, total_investment)['stakes'][0]
 
     # Assert
-    assert calculated_row['stake_home'] == expected_stake_home, f"Expected stake_home to be {expected_stake_home}, got {calculated_row['stake_home']}"
-    assert calculated_row['stake_draw'] == expected_stake_draw, f"Expected stake_draw to be {expected_stake_draw}, got {calculated_row['stake_draw']}"
-    assert calculated_row['stake_away'] == expected_stake_away, f"Expected stake_away to be {expected_stake_away}, got {calculated_row['stake_away']}"
+    np.testing.assert_allclose(stake_home, expected_stake_home, err_msg=f"Expected stake_home to be {expected_stake_home}, got {stake_home}")
+    np.testing.assert_allclose(stake_draw, expected_stake_draw, err_msg=f"Expected stake_draw to be {expected_stake_draw}, got {stake_draw}")
+    np.testing.assert_allclose(stake_away, expected_stake_away, err_msg=f"Expected stake_away to be {expected_stake_away}, got {stake_away}")
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.cross_market import covering_combinations, find_cross_market_arbitrage, payoff_matrices
+
+
+def test_covering_combinations():
+    """Checks that only combinations winning every result, with at most one leg per result, are enumerated."""
+    combinations = covering_combinations(['WWL', 'LLW', 'WPL', 'LPW', 'LWL', 'WLL'])
+
+    assert ('LLW', 'WWL') in combinations
+    assert ('LPW', 'WPL') not in combinations, "A draw refunding both legs cannot be a surebet."
+    assert ('LPW', 'LWL', 'WPL') in combinations
+    assert max(len(combination) for combination in combinations) == 3
+
+
+def test_find_cross_market_arbitrage():
+    """Ensures surebets across markets are found with equal minimum payouts, refunds included."""
+    best = pd.DataFrame({
+        'match_id': ['m1'] * 4 + ['m2'] * 3 + ['m3'] * 2,
+        'market': ['double_chance', 'asian_handicap', 'h2h', 'h2h', 'asian_handicap', 'h2h', 'h2h',
+                   'double_chance', 'h2h'],
+        'line': [np.nan, 0.5, np.nan, np.nan, -0.0, np.nan, np.nan, np.nan, np.nan],
+        'outcome': ['1X', 'home', 'away', 'home', 'home', 'draw', 'away', '1X', 'away'],
+        'bookmaker': ['unibet', 'pinnacle', 'betfair', 'unibet', 'pinnacle', 'unibet', 'betfair', 'unibet',
+                      'betfair'],
+        'price': [1.50, 1.55, 3.20, 2.10, 2.00, 4.00, 4.00, 1.30, 3.20],
+    })
+
+    legs = find_cross_market_arbitrage(best, 100)
+
+    assert legs['match_id'].unique().tolist() == ['m1', 'm2'], "m3 is covered without a surebet."
+    m1, m2 = legs[legs['match_id'] == 'm1'], legs[legs['match_id'] == 'm2']
+    assert m1['bookmaker'].tolist() == ['betfair', 'pinnacle'], "The better of two alike bets should be used."
+    np.testing.assert_allclose(m1['payout'], 100 / (1 / 1.55 + 1 / 3.20))
+    np.testing.assert_allclose(m2['payout'], 100 * 8 / 7)
+    np.testing.assert_allclose(legs.groupby('match_id')['stake'].sum(), [100, 100])
+
+    # The stakes pay at least the guaranteed payout for every result
+    payoffs = payoff_matrices(m2['price'].to_numpy()[None], ('LLW', 'LWL', 'WPL'))[0]
+    assert (payoffs @ m2['stake'].to_numpy() >= m2['payout'].iloc[0] - 1e-9).all()
@@ -1,8 +1,10 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import tempfile
 import pytest
-from arbitrage_analysis.analysis.task_estimate_yield import calculate_and_filter_highest_yield
+from arbitrage_analysis.analysis.task_estimate_yield import (calculate_and_filter_highest_yield, compound_growth,
+                                                             compound_yields, highest_yield_per_time)
 
 @pytest.fixture
 def mock_data():
@@ -41,3 +43,29 @@ def test_calculate_and_filter_highest_yield_basic(mock_data):
         assert not result_df.empty, "The result should not be empty"
         assert 'yield' in result_df.columns, "Result DataFrame must contain 'yield' column"
         assert 'investment_growth' in result_df.columns, "Result DataFrame must contain 'investment_growth' column"
+
+
+def test_highest_yield_per_time_and_compounding():
+    """Checks that the best opportunity of each commence time is kept and the investment compounded over them."""
+    df = pd.DataFrame({
+        'commence_time': pd.to_datetime(['2024-03-17', '2024-03-10', '2024-03-10', '2024-03-17', '2024-03-24']),
+        'match': ['a', 'b', 'c', 'd', 'e'],
+        'yield': [1.0, 2.0, 0.5, 3.0, 2.0],
+    }, index=[4, 4, 2, 0, 1])
+
+    best = highest_yield_per_time(df)
+
+    assert best['match'].tolist() == ['b', 'd', 'e']
+    np.testing.assert_allclose(compound_yields(best['yield'], 100), [102, 102 * 1.03, 102 * 1.03 * 1.02])
+
+
+def test_compound_growth_of_several_investments_and_strategies():
+    """Ensures several initial investments and strategies are compounded at once, one column each."""
+    factors = np.array([1.1, 0.9, 1.2])
+
+    by_investment = compound_growth(factors, [100, 50])
+    by_strategy = compound_growth(np.column_stack([factors, np.ones(3)]), 100)
+
+    np.testing.assert_allclose(by_investment[-1], [118.8, 59.4])
+    np.testing.assert_allclose(by_strategy, [[110, 100], [99, 100], [118.8, 100]])
+    assert compound_growth(factors).shape == (3,)
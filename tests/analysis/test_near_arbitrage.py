@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.near_arbitrage import NearArbitrageScanner, TopK, event_chunks, find_middles
+
+
+def test_top_k_keeps_the_smallest_scores():
+    """Checks that the heap keeps the k smallest scores, best first, with the earlier item on ties."""
+    scores = np.random.default_rng(0).permutation(np.r_[np.arange(50.0), 3.0])
+    top = TopK(5)
+    top.push_many(scores[:20], lambda position: position)
+    top.push_many(scores[20:], lambda position: position + 20)
+
+    kept = top.items()
+    assert [score for score, _ in kept] == [0, 1, 2, 3, 3]
+    threes = [position for score, position in kept if score == 3]
+    assert threes == sorted(threes) and len(top) == 5 and top.threshold == 3
+
+
+def test_find_middles_for_totals_and_asian_handicap():
+    """Ensures middles are found only where a range of results wins both bets."""
+    best = pd.DataFrame({
+        'match_id': ['m1'] * 4 + ['m2'] * 2,
+        'market': ['totals'] * 4 + ['asian_handicap'] * 2,
+        'line': [1.5, 2.5, 3.5, 4.5, 0.5, -1.5],
+        'outcome': ['over', 'under', 'under', 'over', 'home', 'away'],
+        'bookmaker': ['a', 'b', 'c', 'd', 'a', 'b'],
+        'price': [2.0, 2.0, 1.5, 5.0, 1.6, 2.5],
+    })
+
+    middles = find_middles(best)
+
+    totals = middles[middles['market'] == 'totals']
+    assert totals[['line_a', 'line_b', 'width']].values.tolist() == [[1.5, 2.5, 1], [1.5, 3.5, 2]]
+    handicap = middles[middles['market'] == 'asian_handicap'].iloc[0]
+    assert handicap['width'] == 2, "Home +0.5 and the away side of home -1.5 both win on a draw or a home win by 1."
+    np.testing.assert_allclose(totals['total_imp_prob'], [1.0, 0.5 + 1 / 1.5])
+
+
+def test_streaming_scan_matches_one_shot_scan():
+    """Checks that scanning events in chunks keeps the same near-arbitrages as scanning them at once."""
+    rng = np.random.default_rng(1)
+    n_events = 40
+    quotes = pd.DataFrame({
+        'match_id': np.repeat([f"m{event}" for event in range(n_events)], 6),
+        'bookmaker': np.tile(['a', 'b', 'c'], 2 * n_events),
+        'market': 'totals',
+        'line': 2.5,
+        'outcome': np.tile(np.repeat(['over', 'under'], 3), n_events),
+        'price': rng.uniform(1.8, 2.1, 6 * n_events).round(2),
+    })
+
+    one_shot = NearArbitrageScanner(k=5, max_total=1.02)
+    one_shot.add(quotes)
+    streaming = NearArbitrageScanner(k=5, max_total=1.02)
+    for chunk in event_chunks(quotes, 7):
+        streaming.add(chunk)
+
+    expected = one_shot.near_arbitrage()
+    pd.testing.assert_frame_equal(streaming.near_arbitrage(), expected)
+    assert expected['rank'].nunique() == 5 and (expected['total_imp_prob'] <= 1.02).all()
+    assert expected['total_imp_prob'].is_monotonic_increasing
+
+
+def test_scanner_leaves_out_implausible_prices():
+    """Ensures a price above the bound of the extractor, e.g. a scraped ID, cannot top the near-arbitrages."""
+    quotes = pd.DataFrame({
+        'match_id': ['m1'] * 4 + ['m2'] * 2,
+        'bookmaker': ['a', 'b', 'a', 'b', 'a', 'b'],
+        'market': 'btts',
+        'line': np.nan,
+        'outcome': ['yes', 'no', 'yes', 'no', 'yes', 'no'],
+        'price': [1.95, 1.95, 421234567890.0, 1.90, 1.98, 1.98],
+    })
+
+    scanner = NearArbitrageScanner(k=5, max_total=1.05)
+    scanner.add(quotes)
+
+    near = scanner.near_arbitrage()
+    assert near['price'].max() < 2, "The scraped ID should not become the best price of m1."
+    assert near.groupby('match_id')['total_imp_prob'].first().round(4).to_dict() == {'m1': round(2 / 1.95, 4),
+                                                                                     'm2': round(2 / 1.98, 4)}
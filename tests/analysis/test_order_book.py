@@ -0,0 +1,60 @@
+import math
+
+import pandas as pd
+from arbitrage_analysis.analysis.order_book import OrderBook
+
+
+def test_order_book_upserts_and_removals():
+    """Checks that the best price and the depth follow single-quote updates and removals."""
+    book = OrderBook()
+    book.upsert('e1', 'h2h', None, 'home', 'pinnacle', 2.10)
+    book.upsert('e1', 'h2h', None, 'home', 'unibet', 2.20)
+    book.upsert('e1', 'h2h', None, 'home', 'betfair', 2.20)
+
+    assert book.best('e1', 'h2h', None, 'home').bookmaker == 'unibet', "Ties should go to the earlier quote."
+
+    book.upsert('e1', 'h2h', None, 'home', 'unibet', 1.90)
+    assert book.best('e1', 'h2h', float('nan'), 'home').bookmaker == 'betfair', "NaN and None are the same line."
+    assert [quote.bookmaker for quote in book.depth('e1', 'h2h', None, 'home', k=5)] == ['betfair', 'pinnacle',
+                                                                                         'unibet']
+
+    book.remove('e1', 'h2h', None, 'home', 'betfair')
+    book.remove('e1', 'h2h', None, 'home', 'unknown')
+    assert book.best('e1', 'h2h', None, 'home').price == 2.10
+    assert len(book) == 2
+
+    book.remove('e1', 'h2h', None, 'home', 'pinnacle')
+    book.remove('e1', 'h2h', None, 'home', 'unibet')
+    assert book.best('e1', 'h2h', None, 'home') is None and book.depth('e1', 'h2h', None, 'home') == []
+
+
+def test_order_book_implied_probability_from_changes():
+    """Ensures a change log is applied and the implied probabilities of the best prices are summed per market."""
+    changes = pd.DataFrame({
+        'match_id': ['e1'] * 5,
+        'bookmaker': ['pinnacle', 'unibet', 'pinnacle', 'unibet', 'pinnacle'],
+        'market': ['totals'] * 5,
+        'line': [2.5] * 5,
+        'outcome': ['over', 'over', 'under', 'under', 'over'],
+        'price': [2.00, 2.10, 1.90, 2.05, 2.00],
+        'change': ['insert', 'insert', 'insert', 'insert', 'delete'],
+    })
+    book = OrderBook()
+    book.apply_changes(changes)
+
+    assert book.implied_probability('e1', 'totals', 2.5) == 1 / 2.10 + 1 / 2.05
+    assert book.implied_probability('e1', 'totals', 2.5) < 1, "The best prices should form an arbitrage."
+    assert math.isnan(book.implied_probability('e1', 'totals', 2.5, n_outcomes=3))
+    assert math.isnan(book.implied_probability('e1', 'totals', 3.5))
+
+
+def test_order_book_compacts_stale_entries():
+    """Checks that repeated updates of the same quotes do not let the heap grow without bound."""
+    book = OrderBook()
+    for update in range(1000):
+        for bookmaker in ('pinnacle', 'unibet'):
+            book.upsert('e1', 'h2h', None, 'draw', bookmaker, 3.0 + (update % 7) / 10)
+
+    outcome_book = book._markets[('e1', 'h2h', None)]['draw']
+    assert len(outcome_book._heap) <= 12
+    assert book.best('e1', 'h2h', None, 'draw').price == 3.0 + (999 % 7) / 10
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.parameter_sweep import (evaluate_parameters, parameter_grid, run_sweep,
+                                                         sweep_inputs)
+
+
+def _inputs():
+    all_odds = pd.DataFrame({
+        'bookmaker': ['a', 'b', 'a', 'c', 'a', 'b', 'a', 'b'],
+        'home_team': ['A', 'A', 'B', 'B', 'C', 'C', 'D', 'D'],
+        'away_team': ['E', 'E', 'F', 'F', 'G', 'G', 'H', 'H'],
+        'commence_time': ['2024-03-10T14:00Z'] * 2 + ['2024-03-03T19:45Z'] * 2 + ['2024-03-10T14:00Z'] * 2
+                         + ['2024-03-17T17:00Z'] * 2,
+        'home_win_odds': [2.1, 1.5, 1.4, 1.3, 3.0, np.nan, 2.2, 2.2],
+        'draw_odds': [4.0, 3.0, 4.0, 3.5, 3.5, 3.5, 3.9, 3.4],
+        'away_win_odds': [4.0, 3.0, 6.0, 5.0, 3.5, 3.5, 4.0, 4.0],
+        'last_update': ['2024-03-03T20:00:00Z'] * 3 + ['2024-03-03T20:25:00Z'] + ['2024-03-03T20:00:00Z'] * 2
+                       + ['2024-03-03T19:00:00Z', '2024-03-03T20:00:00Z'],
+    })
+    return sweep_inputs(all_odds, [None, 1200, 1800])
+
+
+def test_evaluate_parameters_filters_and_compounds():
+    """Checks the opportunities kept by margin and quote age and the compounding of the best yield per kickoff."""
+    inputs = _inputs()
+    margins = (1 - (1 / inputs['odds'][0]).sum(axis=1)) * 100
+
+    result = evaluate_parameters(inputs, 100, 100, 0.5, min_margin=1, max_quote_age=None)
+    assert result['opportunities'] == 3, "The match of 2024-03-03 is no arbitrage."
+    yields = 100 / (1 - margins / 100) - 100
+    np.testing.assert_allclose(result['final_investment'], 100 * (1 + yields[2] / 100) * (1 + yields[3] / 100))
+    np.testing.assert_allclose(result['total_profit'], yields[[0, 2, 3]].sum())
+
+    fresh = evaluate_parameters(inputs, 100, 100, 0.5, min_margin=1, max_quote_age=1800)
+    assert fresh['opportunities'] == 2, "The draw quoted an hour earlier is too old."
+    fresh = evaluate_parameters(inputs, 100, 100, 0.5, min_margin=0, max_quote_age=1800)
+    assert fresh['opportunities'] == 3, "The stale draw gives way to the fresh one instead of dropping the match."
+    assert evaluate_parameters(inputs, 100, 100, 0.5, min_margin=0, max_quote_age=1200)['opportunities'] == 0, (
+        "Ages are taken from the newest quote captured, not from the newest best quote.")
+    assert evaluate_parameters(inputs, 100, 100, 0.5, min_margin=20, max_quote_age=None)['opportunities'] == 0
+
+
+def test_run_sweep_matches_serial_evaluation():
+    """Ensures the parallel sweep evaluates every configuration of the grid as a serial loop would."""
+    inputs = _inputs()
+    grid = {'total_investment': [50, 100], 'initial_investment': [100], 'bandwidth': [0.25, 1],
+            'min_margin': [0, 1], 'max_quote_age': [None, 1800]}
+
+    summary = run_sweep(inputs, grid, max_workers=2)
+
+    expected = pd.DataFrame([{**parameters, **evaluate_parameters(inputs, **parameters)}
+                             for parameters in parameter_grid(grid)])
+    assert len(summary) == 16
+    pd.testing.assert_frame_equal(summary, expected)
@@ -0,0 +1,66 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.realtime_engine import (ArbitrageEngine, LatencyHistogram, opportunities_table,
+                                                         replay_changes)
+from arbitrage_analysis.data_management.odds_history import OddsHistoryStore
+
+
+def test_engine_emits_opportunities_as_updates_arrive():
+    """Checks that an opportunity is emitted once when the sum falls below 1, again on new legs, and then closed."""
+    emitted = []
+    engine = ArbitrageEngine(on_opportunity=emitted.append, clock=itertools.count(0, 1000).__next__)
+
+    assert engine.process('e1', 'pinnacle', 'totals', 2.5, 'over', 2.00) is None
+    assert engine.process('e1', 'unibet', 'totals', 2.5, 'under', 1.95) is None
+    opportunity = engine.process('e1', 'betfair', 'totals', 2.5, 'over', 2.10)
+    assert opportunity.legs == (('over', 'betfair', 2.10), ('under', 'unibet', 1.95))
+    assert opportunity.arb_profit_margin > 0
+
+    assert engine.process('e1', 'pinnacle', 'h2h', None, 'home', 5.0) is None, "An incomplete market is no arbitrage."
+    assert engine.process('e1', 'pinnacle', 'totals', 2.5, 'over', 2.05) is None, "The best legs did not change."
+    assert engine.process('e1', 'unibet', 'totals', 2.5, 'under', 1.97).legs[1] == ('under', 'unibet', 1.97)
+
+    assert engine.process('e1', 'betfair', 'totals', 2.5, 'over', None, change='delete').legs[0][1] == 'pinnacle'
+    assert engine.process('e1', 'pinnacle', 'totals', 2.5, 'over', 1.90) is None
+    assert not engine.open_opportunities and len(emitted) == 3
+    assert engine.latency.count == 8 and engine.alert_latency.count == 3
+    assert engine.latency.summary()['max'] == 2, "Alerts take one tick more."
+
+
+def test_latency_histogram_percentiles():
+    """Ensures percentiles read from the buckets are close to the exact ones."""
+    latencies = np.random.default_rng(0).lognormal(np.log(5000), 0.5, 10000).astype(int)
+    histogram = LatencyHistogram()
+    for latency in latencies:
+        histogram.record(latency)
+
+    for q in (50, 99):
+        exact = np.percentile(latencies, q)
+        assert exact <= histogram.percentile(q) <= exact * 1.13
+    assert histogram.percentile(100) == latencies.max()
+
+
+def test_replay_from_odds_history(tmp_path):
+    """Checks that the recorded changes of the odds history are replayed snapshot by snapshot."""
+    store = OddsHistoryStore(tmp_path / "history.sqlite")
+    store.append(pd.DataFrame({
+        'captured_at': ['2024-03-03T20:05:00Z', '2024-03-03T20:00:00Z', '2024-03-03T20:00:00Z'],
+        'change': ['update', 'insert', 'insert'],
+        'match_id': ['e1'] * 3,
+        'bookmaker': ['pinnacle', 'pinnacle', 'unibet'],
+        'market': ['btts'] * 3,
+        'line': [np.nan] * 3,
+        'outcome': ['yes', 'yes', 'no'],
+        'price': [2.20, 1.80, 1.95],
+    }))
+    engine = ArbitrageEngine()
+    report = replay_changes(engine, store.changes())
+    store.close()
+
+    assert report['updates'].tolist() == [2, 1]
+    assert report['opportunities'].tolist() == [0, 1]
+    table = opportunities_table(engine.open_opportunities.values())
+    assert table[['outcome', 'bookmaker', 'price']].values.tolist() == [['yes', 'pinnacle', 2.20],
+                                                                         ['no', 'unibet', 1.95]]
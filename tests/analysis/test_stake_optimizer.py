@@ -0,0 +1,67 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.analysis.stake_optimizer import allocate_stakes, effective_odds, optimize_stakes
+
+
+def _brute_force_profit(odds, total_investment, caps):
+    """Tries every allocation of whole units and returns the highest guaranteed profit."""
+    best = 0
+    for stakes in itertools.product(range(total_investment + 1), repeat=len(odds)):
+        if sum(stakes) <= total_investment and all(stake <= cap for stake, cap in zip(stakes, caps)):
+            best = max(best, min(stake * price for stake, price in zip(stakes, odds)) - sum(stakes))
+    return best
+
+
+def test_optimize_stakes_matches_brute_force():
+    """Checks that the rounded stakes guarantee the best profit possible under caps and commission."""
+    prices = np.array([[2.10, 2.05, np.nan], [2.0, 3.6, 6.0], [1.90, 1.90, np.nan], [2.10, 2.05, np.nan],
+                       [2.12, 2.04, np.nan]])
+    caps = np.array([[np.inf] * 3, [np.inf, 8, np.inf], [np.inf] * 3, [12, np.inf, np.inf], [np.inf] * 3])
+    commissions = np.array([[0, 0, 0]] * 4 + [[0.05, 0, 0]])
+
+    result = optimize_stakes(prices, 30, 1.0, max_stakes=caps, commissions=commissions)
+
+    odds = effective_odds(prices, commissions)
+    for row in range(len(prices)):
+        legs = ~np.isnan(prices[row])
+        expected = _brute_force_profit(odds[row, legs], 30, caps[row, legs])
+        np.testing.assert_allclose(result['profit'][row], expected, atol=1e-9)
+
+    assert not result['profitable'][2] and (result['stakes'][2] == 0).all(), "No arbitrage, no stakes."
+    assert (result['stakes'] <= caps).all() and (result['stakes'].sum(axis=1) <= 30).all()
+    assert (result['stakes'] == np.round(result['stakes'])).all()
+
+
+def test_allocate_stakes_drops_opportunities_lost_to_commission():
+    """Ensures stakes are allocated per opportunity and an arbitrage eaten up by commission is left out."""
+    legs = pd.DataFrame({
+        'match_id': ['m1', 'm1', 'm2', 'm2'],
+        'market': ['totals'] * 4,
+        'line': [2.5, 2.5, 2.5, 2.5],
+        'outcome': ['over', 'under', 'over', 'under'],
+        'bookmaker': ['pinnacle', 'unibet', 'betfair', 'unibet'],
+        'price': [2.10, 2.05, 2.04, 2.00],
+    })
+
+    result = allocate_stakes(legs, 100, 5, commissions={'betfair': 0.05})
+
+    assert result['match_id'].unique().tolist() == ['m1']
+    assert result['stake'].tolist() == [50, 50]
+    np.testing.assert_allclose(result['profit'], 2.5)
+
+
+def test_allocate_stakes_settles_quarter_lines():
+    """Ensures the guaranteed profit of a quarter line counts the half won on the middle result."""
+    legs = pd.DataFrame({'match_id': [1, 1], 'market': 'totals', 'line': 2.75, 'outcome': ['under', 'over'],
+                         'bookmaker': ['a', 'b'], 'price': [2.05, 2.1]})
+
+    allocated = allocate_stakes(legs, 100)
+
+    stakes = dict(zip(allocated['outcome'], allocated['stake']))
+    # Three goals win half of the over bet and refund the other half, and lose half of the under bet
+    payout = min(2.1 * stakes['over'], 1.55 * stakes['over'] + 0.5 * stakes['under'], 2.05 * stakes['under'])
+    np.testing.assert_allclose(allocated['payout'], payout)
+    np.testing.assert_allclose(allocated['profit'], payout - sum(stakes.values()))
+    np.testing.assert_allclose(allocated['profit'], 2.5, err_msg="Even stakes of 50 pay 102.5 on every result.")
@@ -0,0 +1,61 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler of the stub API servers, answering in JSON and without logging."""
+
+    protocol_version = "HTTP/1.1"
+
+    def send_json(self, payload, status=200, headers=None):
+        """
+        Sends a response with `payload` encoded as JSON, or an empty body if `payload` is None.
+
+        Args:
+            payload (object): JSON-serializable body of the response, None for no body.
+            status (int, optional): HTTP status code. Defaults to 200.
+            headers (dict, optional): Further response headers.
+        """
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def start_stub_server():
+    """
+    Starts local HTTP servers answering GET requests with a given function and stops them after the test.
+
+    The returned factory takes the `do_GET` function, which is called with the handler and answers through
+    `send_json`, and keyword arguments set as attributes of the server. Every server has a `lock` for the state the
+    handler threads share and its base `url`.
+    """
+    servers = []
+
+    def _start(do_get, **attributes):
+        handler = type("StubHandler", (_StubHandler,), {"do_GET": do_get})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.lock = threading.Lock()
+        server.url = f"http://127.0.0.1:{server.server_address[1]}"
+        for name, value in attributes.items():
+            setattr(server, name, value)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield _start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,27 @@
+import pandas as pd
+from arbitrage_analysis.data_management.odds_history import OddsHistoryStore
+from arbitrage_analysis.data_management.snapshot_delta import write_quote_changes
+from arbitrage_analysis.data_management.task_append_odds_history import append_quote_changes
+
+
+def _quotes(rows):
+    df = pd.DataFrame(rows, columns=['match_id', 'bookmaker', 'market', 'line', 'outcome', 'price', 'last_update'])
+    return df.astype({'line': float})
+
+
+def test_append_quote_changes_from_change_logs(tmp_path):
+    """Checks that the change logs of both providers reach the history once, however often they are appended."""
+    the_odds_api = _quotes([['0012', 'Pinnacle', 'h2h', None, 'home', 2.10, '2024-03-03T20:00:00Z']])
+    rapid_api = _quotes([['0012', 'Unibet', 'totals', 2.5, 'over', 1.90, None]])
+    changelog_paths = [tmp_path / "changes_the_odds_api.csv", tmp_path / "changes_rapid_api.csv"]
+    write_quote_changes(the_odds_api.iloc[0:0], the_odds_api, changelog_paths[0], "2024-03-03T20:00:00Z")
+    write_quote_changes(rapid_api.iloc[0:0], rapid_api, changelog_paths[1], "2024-03-03T19:55:00Z")
+
+    assert append_quote_changes(changelog_paths, tmp_path / "history.sqlite") == 2
+    assert append_quote_changes(changelog_paths, tmp_path / "history.sqlite") == 0, "Reruns should add nothing."
+
+    history = OddsHistoryStore(tmp_path / "history.sqlite")
+    latest = history.latest_quotes()
+    history.close()
+    assert latest['match_id'].tolist() == ['0012', '0012'], "Match IDs should be read back as strings."
+    assert sorted(latest['price']) == [1.90, 2.10]
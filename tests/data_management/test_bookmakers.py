@@ -0,0 +1,32 @@
+import pandas as pd
+from arbitrage_analysis.data_management.bookmakers import BookmakerRegistry, keep_freshest_quotes
+
+
+def test_bookmaker_registry_unifies_providers():
+    """Checks that titles of The Odds API and codes of the Rapid API map to the same canonical ID."""
+    registry = BookmakerRegistry()
+    titles = pd.Series(['Pinnacle', 'William Hill', '888sport', 'LiveScore Bet (EU)', 'Nordic Bet', None])
+    codes = pd.Series(['pinnacle', 'williamhill', 'sport888', 'livescorebet', 'nordicbet', None])
+
+    assert registry.canonicalize(titles).tolist()[:5] == registry.canonicalize(codes).tolist()[:5]
+    assert registry.canonical('unibet.fr') != registry.canonical('Unibet'), "Regional variants should stay apart."
+
+    registry.register('Bet 365 (UK)', 'bet365')
+    assert registry.canonical('bet365 (uk)') == 'bet365'
+
+
+def test_keep_freshest_quotes():
+    """Ensures duplicates collapse to the most recently updated quote while the row order is kept."""
+    df = pd.DataFrame({
+        'event_id': ['e1', 'e1', 'e2', 'e1', 'e2'],
+        'bookmaker': ['pinnacle', 'unibet', 'pinnacle', 'pinnacle', 'pinnacle'],
+        'home_win_odds': [2.10, 2.05, 1.80, 2.15, 1.85],
+        'last_update': ['2024-03-03T20:16:40Z', '2024-03-03T20:10:00Z', None, '2024-03-03T20:03:29Z',
+                        '2024-03-03T19:00:00Z'],
+    }, index=[3, 3, 4, 5, 6])
+
+    result = keep_freshest_quotes(df, ['event_id', 'bookmaker'])
+
+    assert result['home_win_odds'].tolist() == [2.10, 2.05, 1.85]
+    assert result.index.tolist() == [3, 3, 6]
+    assert len(keep_freshest_quotes(df.drop(columns='last_update'), ['event_id', 'bookmaker'])) == 3
@@ -0,0 +1,56 @@
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+from arbitrage_analysis.config import SRC
+from arbitrage_analysis.data_management.crawl_odds import crawl_rapid_api, crawl_the_odds_api
+from arbitrage_analysis.data_management.http_client import RequestBudget
+from arbitrage_analysis.data_management.retrieve_data_rapid_api import extract_matchid_bookie_pairs
+
+
+def _serve_provider(handler):
+    """Answers The Odds API odds requests and the RapidAPI matches and odds requests with fake data."""
+    parsed = urlparse(handler.path)
+    query = parse_qs(parsed.query)
+    if parsed.path.startswith("/sports/"):
+        sport_key = parsed.path.split("/")[2]
+        payload = [{"id": f"{sport_key}_{i}", "sport_key": sport_key} for i in range(2)]
+    elif parsed.path == "/matches":
+        competition = query["competition"][0]
+        payload = {str(i): {"matchid": f"{competition}_{i}", "bookie": "bet365"} for i in range(20)}
+    else:
+        payload = {"0.matchid": query["matchid"][0]}
+    handler.send_json(payload)
+
+
+@pytest.fixture
+def stub_url(start_stub_server):
+    return start_stub_server(_serve_provider).url
+
+
+def test_crawl_the_odds_api_respects_budget(stub_url, tmp_path):
+    """Checks that every sport gets its own shard and that sports beyond the request budget are reported."""
+    sport_keys = [f"sport_{i}" for i in range(6)]
+    manifest = crawl_the_odds_api(sport_keys, "dummy_key", "eu", "h2h", tmp_path, budget=RequestBudget(4),
+                                  base_url=stub_url)
+
+    assert set(manifest['shard']) == set(sport_keys), "The manifest should list every sport key."
+    assert (manifest['status'] == 'ok').sum() == 4, "Only as many sports as the budget allows should be fetched."
+    assert (manifest['status'] == 'budget exhausted').sum() == 2, "Skipped sports should be reported."
+    shard = pd.read_csv(tmp_path / manifest.loc[manifest['status'] == 'ok', 'file'].iloc[0])
+    assert len(shard) == 2, "A shard should contain all events of its sport."
+
+
+def test_crawl_rapid_api_discovers_all_matches(stub_url, tmp_path):
+    """Ensures that odds are fetched for every discovered match instead of only the first 15."""
+    competitions = [("soccer", "italy", "serie-a"), ("soccer", "spain", "la-liga")]
+    manifest = crawl_rapid_api(competitions, "dummy_key", tmp_path, base_url=stub_url)
+
+    assert manifest['rows'].tolist() == [20, 20], "All 20 matches of each competition should be crawled."
+    assert (tmp_path / "manifest.csv").exists(), "The manifest should be written next to the shards."
+
+
+def test_extract_matchid_bookie_pairs_reads_all_matches():
+    """Verifies that all matches of the stored matches response are extracted."""
+    pairs = extract_matchid_bookie_pairs(SRC / "data" / "df_matches_rapid_api.csv")
+    assert len(pairs) == 16, "All 16 matches in the stored response should be extracted."
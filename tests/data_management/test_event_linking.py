@@ -0,0 +1,44 @@
+import pandas as pd
+from arbitrage_analysis.data_management.event_linking import link_events
+
+reference = pd.DataFrame({
+    'bookmaker': ['Pinnacle', 'Unibet', 'Pinnacle'],
+    'home_team': ['Napoli', 'Napoli', 'Napoli'],
+    'away_team': ['Juventus', 'Juventus', 'Juventus'],
+    'commence_time': ['2024-03-03T19:45:50Z', '2024-03-03T19:45:50Z', '2024-05-12T18:45:00Z'],
+})
+
+
+def test_link_events_by_kickoff_window():
+    """Checks that repeated pairings are told apart by kickoff and events outside the tolerance stay unmatched."""
+    other = pd.DataFrame({
+        'bookie': ['admiralbet', 'interwetten', 'zebet'],
+        'home_team': ['Napoli', 'Napoli', 'Napoli'],
+        'away_team': ['Juventus', 'Juventus', 'Juventus'],
+        'commence_time': ['2024-05-12T18:50:00Z', '2024-03-03T19:45:00Z', '2024-08-25T18:45:00Z'],
+    }, index=[10, 11, 12])
+
+    reference_linked, other_linked, unmatched = link_events(reference, other)
+
+    assert reference_linked['event_id'].nunique() == 2, "The same pairing on two dates should be two events."
+    assert other_linked.index.tolist() == [10, 11, 12], "The rows of the linked table should keep their index."
+    assert other_linked.loc[10, 'event_id'] == reference_linked.loc[2, 'event_id']
+    assert other_linked.loc[11, 'event_id'] == reference_linked.loc[0, 'event_id']
+    assert other_linked.loc[11, 'commence_time'] == '2024-03-03T19:45:50Z', "Linked rows take the reference time."
+    assert other_linked.loc[12, 'event_id'] not in set(reference_linked['event_id'])
+    assert unmatched[['home_team', 'away_team']].values.tolist() == [['Napoli', 'Juventus']]
+    assert unmatched.loc[0, 'kickoff'] == pd.Timestamp('2024-08-25T18:45:00Z')
+
+
+def test_link_events_without_kickoff():
+    """Ensures events without a kickoff are linked only when the reference has a single event of their pairing."""
+    other = pd.DataFrame({'home_team': ['Napoli', 'Inter Milan'], 'away_team': ['Juventus', 'Genoa']})
+    single = reference.iloc[:2]
+
+    _, other_linked, unmatched = link_events(single, other)
+    assert other_linked.loc[0, 'commence_time'] == '2024-03-03T19:45:50Z'
+    assert pd.isna(other_linked.loc[1, 'event_id']) and len(unmatched) == 1
+
+    _, other_linked, unmatched = link_events(reference, other)
+    assert other_linked['event_id'].isna().all(), "A pairing played twice cannot be linked without a kickoff."
+    assert len(unmatched) == 2
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+from arbitrage_analysis.data_management.task_retrieve_odds_rapid_api import (
+    MAX_PRICE,
+    extract_markets_rapid_api,
+    parse_market_field,
+    rapid_api_columns,
+)
+
+
+@pytest.mark.parametrize("field, expected", [
+    ("home", ("h2h", np.nan, "home")),
+    ("total_under_25", ("totals", 2.5, "under")),
+    ("hand10_1", ("handicap", 1.0, "home")),
+    ("hand02_X", ("handicap", -2.0, "draw")),
+    ("hand_asian_minus_025_2", ("asian_handicap", -0.25, "away")),
+    ("hand_asian_plus_1_1", ("asian_handicap", 1.0, "home")),
+    ("double_chance_2X", ("double_chance", np.nan, "X2")),
+    ("correct_score_2_1", ("correct_score", np.nan, "2:1")),
+    ("bookie", None),
+])
+def test_parse_market_field(field, expected):
+    result = parse_market_field(field)
+    if expected is None:
+        assert result is None
+    else:
+        assert result[0] == expected[0] and result[2] == expected[2]
+        np.testing.assert_equal(result[1], expected[1])
+
+
+def _write_dump(tmp_path):
+    df = pd.DataFrame({
+        '0.matchid': ['m1', 'm2'], '0.bookie': ['bet365', 'bet365'],
+        '0.home': [2.0, 1.5], '0.total_over_25': [1.9, np.nan], '0.b_score_y': [1.8, 1.7],
+        '1.matchid': ['m1', np.nan], '1.bookie': ['unibet', np.nan],
+        '1.home': [2.1, np.nan], '1.match_url': ['https://unibet', np.nan],
+    })
+    src_file = tmp_path / "odds.csv"
+    df.to_csv(src_file, index=False)
+    return src_file
+
+
+def test_extract_markets_rapid_api(tmp_path):
+    """Checks that every quoted market of every entry ends up in the compact long table."""
+    result_df = extract_markets_rapid_api(_write_dump(tmp_path))
+
+    assert list(result_df.columns) == ['match_id', 'bookmaker', 'market', 'line', 'outcome', 'price']
+    assert len(result_df) == 6, "Every non-missing price should become one quote."
+    assert result_df['price'].dtype == np.float32 and result_df['line'].dtype == np.float32
+    assert isinstance(result_df['market'].dtype, pd.CategoricalDtype)
+    totals = result_df[result_df['market'] == 'totals']
+    assert totals[['match_id', 'bookmaker', 'line', 'outcome']].astype(object).values.tolist() == [
+        ['m1', 'bet365', 2.5, 'over']
+    ]
+
+
+def test_rapid_api_columns():
+    select = rapid_api_columns(['matchid'], markets=['totals'])
+
+    assert [column for column in ['0.matchid', '0.home', '3.total_over_25', '3.bookie'] if select(column)] == [
+        '0.matchid', '3.total_over_25'
+    ]
+
+
+@pytest.mark.parametrize("chunksize", [None, 1])
+def test_extract_markets_rapid_api_projects_markets(tmp_path, chunksize):
+    """Checks that only the requested markets are extracted, whether the dump is read at once or in chunks."""
+    result_df = extract_markets_rapid_api(_write_dump(tmp_path), markets=['h2h'], chunksize=chunksize)
+
+    assert result_df['market'].astype(str).unique().tolist() == ['h2h']
+    assert sorted(result_df['price'].tolist()) == pytest.approx([1.5, 2.0, 2.1])
+    assert isinstance(result_df['bookmaker'].dtype, pd.CategoricalDtype)
+
+
+def test_extract_markets_rapid_api_pyarrow_engine(tmp_path):
+    pytest.importorskip("pyarrow")
+    src_file = _write_dump(tmp_path)
+
+    result_df = extract_markets_rapid_api(src_file, chunksize=1, engine='pyarrow')
+
+    pd.testing.assert_frame_equal(result_df, extract_markets_rapid_api(src_file, chunksize=1))
+
+
+def test_extract_markets_rapid_api_drops_scraped_ids(tmp_path):
+    """Ensures an ID scraped into a price field, as in the double chance fields of the dump, is no quote."""
+    df = pd.DataFrame({
+        '0.matchid': ['m1'], '0.bookie': ['bet3000'],
+        '0.double_chance_1X': [421234567890.0], '0.double_chance_12': [1.3], '0.home': [1001.0],
+    })
+    src_file = tmp_path / "odds.csv"
+    df.to_csv(src_file, index=False)
+
+    result_df = extract_markets_rapid_api(src_file)
+
+    assert result_df['outcome'].astype(str).tolist() == ['12', 'home']
+    assert (result_df['price'] <= MAX_PRICE).all()
@@ -0,0 +1,53 @@
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from arbitrage_analysis.data_management.http_client import TokenBucket
+from arbitrage_analysis.data_management.retrieve_data_rapid_api import get_odds_for_matchid_bookie_pairs
+
+
+def _serve_odds(handler):
+    """Serves fake odds, sleeping before every answer and failing the first attempt of every match with a 429."""
+    matchid = parse_qs(urlparse(handler.path).query)["matchid"][0]
+    server = handler.server
+    with server.lock:
+        server.attempts[matchid] = server.attempts.get(matchid, 0) + 1
+        first_attempt = server.attempts[matchid] == 1
+    time.sleep(server.latency)
+    if first_attempt and matchid in server.failing:
+        handler.send_json({}, status=429, headers={"Retry-After": "0"})
+    else:
+        handler.send_json({"0.matchid": matchid, "0.home": 2.0})
+
+
+@pytest.fixture
+def stub_server(start_stub_server):
+    return start_stub_server(_serve_odds, latency=0.2, failing={"id2", "id5"}, attempts={})
+
+
+def test_get_odds_for_matchid_bookie_pairs_concurrent(stub_server):
+    """Checks that concurrent fetching retries rate-limited matches, keeps the input order and overlaps the latency."""
+    pairs = [{"match_id": f"id{i}", "bookies": "bet365,unibet"} for i in range(8)]
+
+    start = time.perf_counter()
+    df_odds = get_odds_for_matchid_bookie_pairs(pairs, "dummy_key", max_workers=8, requests_per_second=None,
+                                                base_url=stub_server.url)
+    elapsed = time.perf_counter() - start
+
+    assert df_odds["0.matchid"].tolist() == [pair["match_id"] for pair in pairs], "Output must keep the input order."
+    assert stub_server.attempts["id2"] == 2, "Rate-limited requests should be retried."
+    assert elapsed < 8 * stub_server.latency, "Requests should run concurrently instead of one after another."
+
+
+def test_token_bucket_limits_rate():
+    """Verifies that the token bucket allows an initial burst and then waits for refills."""
+    now = [0.0]
+
+    def _sleep(seconds):
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=_sleep)
+    waits = [bucket.acquire() for _ in range(4)]
+
+    assert waits[:2] == [0.0, 0.0], "The first requests should use the burst capacity."
+    assert now[0] == pytest.approx(1.0), "Two further requests at 2 per second should take one second."
@@ -27,13 +27,15 @@ def test_standardize_team_names_and_merge(tmp_path):
     df_the_odds_api_path = tmp_path / "df_the_odds_api.pkl"
     df_rapid_api_path = tmp_path / "df_rapid_api.pkl"
     output_path = tmp_path / "merged.pkl"
+    learned_aliases_path = tmp_path / "learned_aliases.csv"
 
     # Save mock DataFrames as pickle files
     df_the_odds_api.to_pickle(df_the_odds_api_path)
     df_rapid_api.to_pickle(df_rapid_api_path)
 
     # Call the function under test
-    standardize_team_names_and_merge(df_the_odds_api_path, df_rapid_api_path, output_path)
+    standardize_team_names_and_merge(df_the_odds_api_path, df_rapid_api_path, output_path,
+                                     learned_aliases_path=learned_aliases_path)
 
     # Load the output DataFrame
     merged_df = pd.read_pickle(output_path)
@@ -42,4 +44,5 @@ def test_standardize_team_names_and_merge(tmp_path):
     assert len(merged_df) == len(df_the_odds_api) + len(df_rapid_api), "Merged DataFrame should contain all rows from both inputs"
     assert all(column in merged_df.columns for column in df_the_odds_api.columns), "Merged DataFrame should contain all columns"
     assert merged_df['home_team'].isin(['Napoli', 'Inter Milan']).all(), "Team names should be standardized"
-
+    learned_aliases = pd.read_csv(learned_aliases_path)
+    assert learned_aliases['alias'].tolist() == ['inter milano', 'juventus turin'], "Fuzzy matches should be listed"
@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+from arbitrage_analysis.data_management.odds_history import OddsHistoryStore
+from arbitrage_analysis.data_management.snapshot_delta import ingest_snapshot
+
+
+def _quotes(rows):
+    df = pd.DataFrame(rows, columns=['match_id', 'bookmaker', 'market', 'line', 'outcome', 'price', 'last_update'])
+    return df.astype({'line': float})
+
+
+snapshots = {
+    "2024-03-03T20:00:00Z": _quotes([
+        ['m1', 'Pinnacle', 'h2h', None, 'home', 2.10, '2024-03-03T20:00:00Z'],
+        ['m1', 'Unibet', 'totals', 2.5, 'over', 1.90, '2024-03-03T20:00:00Z'],
+        ['m2', 'Pinnacle', 'h2h', None, 'home', 1.80, '2024-03-03T20:00:00Z'],
+    ]),
+    "2024-03-03T20:05:00Z": _quotes([
+        ['m1', 'Pinnacle', 'h2h', None, 'home', 2.15, '2024-03-03T20:05:00Z'],
+        ['m2', 'Pinnacle', 'h2h', None, 'home', 1.80, '2024-03-03T20:00:00Z'],
+    ]),
+    "2024-03-03T20:10:00Z": _quotes([
+        ['m1', 'Pinnacle', 'h2h', None, 'home', 2.20, '2024-03-03T20:10:00Z'],
+        ['m2', 'Pinnacle', 'h2h', None, 'home', 1.75, '2024-03-03T20:10:00Z'],
+    ]),
+}
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = OddsHistoryStore(tmp_path / "history.sqlite", batch_size=2)
+    for captured_at, quotes in snapshots.items():
+        ingest_snapshot(quotes, tmp_path / "state.pkl", tmp_path / "changes.csv", captured_at=captured_at,
+                        history=store)
+    yield store
+    store.close()
+
+
+def test_latest_quotes_as_of(history):
+    """Checks that the quotes on offer at a past time are rebuilt, without quotes deleted by then."""
+    latest = history.latest_quotes(as_of="2024-03-03T20:07:00Z")
+
+    assert latest[['match_id', 'bookmaker', 'market', 'outcome', 'price']].values.tolist() == [
+        ['m1', 'Pinnacle', 'h2h', 'home', 2.15],
+        ['m2', 'Pinnacle', 'h2h', 'home', 1.80],
+    ]
+    assert history.latest_quotes(as_of="2024-03-03T20:00:00Z", market='totals')['line'].tolist() == [2.5]
+    assert history.latest_quotes(match_id='m2')['price'].tolist() == [1.75]
+
+
+def test_match_quotes_in_window(history):
+    changes = history.match_quotes('m1', start="2024-03-03T20:01:00Z", end="2024-03-03T20:10:00Z")
+
+    assert changes['change'].tolist() == ['update', 'delete', 'update']
+    assert changes['captured_at'].is_monotonic_increasing
+    assert str(changes['captured_at'].dt.tz) == 'UTC'
+
+
+def test_snapshot_times_and_batching(history):
+    assert len(history.snapshot_times()) == 3
+    assert len(history.match_quotes('m1')) == 5, "Rows inserted in several batches should all be stored."
+
+
+def test_repeated_snapshots_are_stored_once(tmp_path):
+    """Ensures a snapshot ingested again, e.g. by a rerun, does not duplicate the history, also for h2h quotes."""
+    store = OddsHistoryStore(tmp_path / "history.sqlite")
+    quotes = snapshots["2024-03-03T20:05:00Z"]
+    changes = ingest_snapshot(quotes, tmp_path / "state.pkl", tmp_path / "changes.csv", history=store)
+    rerun = ingest_snapshot(quotes, tmp_path / "state_rerun.pkl", tmp_path / "changes_rerun.csv", history=store)
+
+    assert (changes['captured_at'] == pd.Timestamp("2024-03-03T20:05:00Z")).all(), "The snapshot sets the time."
+    pd.testing.assert_frame_equal(rerun, changes)
+    assert store.append(changes) == 0
+    assert len(store.changes()) == 2
+    store.close()
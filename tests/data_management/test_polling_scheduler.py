@@ -0,0 +1,90 @@
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from arbitrage_analysis.data_management.polling_scheduler import (PollingScheduler, rapid_api_match_fetcher,
+                                                                  refresh_interval)
+
+
+class _FakeClock:
+    """Clock whose time only moves when the scheduler sleeps."""
+
+    def __init__(self, start):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _serve_odds(handler):
+    """Serves fake odds, counts the requests per match and rate limits the matches in `rate_limited` with a 429."""
+    matchid = parse_qs(urlparse(handler.path).query)["matchid"][0]
+    with handler.server.lock:
+        handler.server.requests[matchid] = handler.server.requests.get(matchid, 0) + 1
+    if matchid in handler.server.rate_limited:
+        handler.send_json({}, status=429, headers={"Retry-After": "0"})
+    else:
+        handler.send_json({"0.matchid": matchid, "0.home": 2.0})
+
+
+@pytest.fixture
+def stub_server(start_stub_server):
+    return start_stub_server(_serve_odds, requests={}, rate_limited=set())
+
+
+def test_refresh_interval_tiers():
+    """Checks that the refresh interval grows with the time to kickoff and stops after the match."""
+    now = 0
+    assert refresh_interval(30 * 60, now) == 10
+    assert refresh_interval(3 * 24 * 60 * 60, now) == 60 * 60
+    assert refresh_interval(-30 * 60, now) == 10, "Live matches should be polled at the shortest interval."
+    assert refresh_interval(-3 * 60 * 60, now) is None, "Finished matches should not be polled."
+
+
+def test_scheduler_spends_budget_on_imminent_matches():
+    """Simulates one hour under a tight budget and checks that the imminent match receives most refreshes."""
+    clock = _FakeClock(start=1_000_000.0)
+    fetched = []
+    scheduler = PollingScheduler(fetch=lambda key: key, requests_per_minute=6, on_result=lambda key, _: fetched.append(key),
+                                 clock=clock.time, sleep=clock.sleep)
+    scheduler.add("imminent", clock.now + 20 * 60)
+    scheduler.add("tomorrow", clock.now + 30 * 60 * 60)
+    scheduler.add("next_week", clock.now + 7 * 24 * 60 * 60)
+
+    scheduler.run(duration=60 * 60)
+
+    counts = scheduler.fetch_counts
+    assert len(fetched) <= 6 * 60 + 1, "The scheduler must not exceed the requests-per-minute budget."
+    assert counts["imminent"] > 10 * counts["tomorrow"], "The imminent match should receive most of the quota."
+    assert counts["next_week"] == 1, "Matches days away should only be refreshed hourly."
+    assert fetched[0] == "imminent", "The match closest to kickoff should be refreshed first."
+    assert clock.now == pytest.approx(1_000_000.0 + 60 * 60, abs=1)
+
+
+@pytest.mark.parametrize("rate_limited", [set(), {f"id{i}" for i in range(0, 40, 2)}])
+def test_scheduler_keeps_budget_against_stub_server(stub_server, rate_limited):
+    """
+    Polls a local server in real time and checks that the requests it receives stay within the budget, also when
+    the server answers with 429 and a retry would cost a request the scheduler took no token for.
+    """
+    stub_server.rate_limited = rate_limited
+    requests_per_minute = 600
+    duration = 1.5
+    bookies_by_match = {f"id{i}": "bet365,unibet" for i in range(40)}
+    fetch = rapid_api_match_fetcher("dummy_key", bookies_by_match, base_url=stub_server.url)
+    scheduler = PollingScheduler(fetch=fetch, requests_per_minute=requests_per_minute)
+    for match_id in bookies_by_match:
+        scheduler.add(match_id, time.time() + 20 * 60)
+
+    scheduler.run(duration=duration)
+
+    received = sum(stub_server.requests.values())
+    tokens_spent = sum(scheduler.fetch_counts.values())
+    assert received <= tokens_spent, "Every request should be covered by a token of the scheduler."
+    assert received == tokens_spent, "Every refresh should send exactly one request."
+    assert received <= requests_per_minute / 60 * duration + 1, "The server must not see more than the budget."
+    assert received >= requests_per_minute / 60 * duration / 2, "The budget should be used while refreshes are due."
+    assert max(stub_server.requests.values()) == 1, "Each due match should be refreshed once before any repeats."
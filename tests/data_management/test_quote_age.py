@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+from arbitrage_analysis.data_management.quote_age import fresh_quotes, quote_ages
+
+
+def test_quote_ages():
+    """Checks that ages are taken from the newest quote or a given time, with the oldest leg deciding."""
+    updates = pd.DataFrame({
+        'last_update_home': ['2024-03-03T20:00:00Z', '2024-03-03T20:10:00Z', None],
+        'last_update_away': ['2024-03-03T20:05:00Z', '2024-03-03T20:08:00Z', '2024-03-03T20:09:00Z'],
+    })
+
+    np.testing.assert_array_equal(quote_ages(updates['last_update_home']), [600, 0, np.nan])
+    np.testing.assert_array_equal(quote_ages(updates['last_update_home'], as_of='2024-03-03T20:30:00Z'),
+                                  [1800, 1200, np.nan])
+    np.testing.assert_array_equal(quote_ages(updates), [600, 120, np.nan])
+
+
+def test_fresh_quotes():
+    """Ensures quotes older than the maximum age or without an update time are dropped."""
+    df = pd.DataFrame({
+        'price': [2.0, 2.1, 2.2, 2.3],
+        'last_update': ['2024-03-03T19:00:00Z', '2024-03-03T19:55:00Z', '2024-03-03 20:00:00', None],
+    })
+
+    assert fresh_quotes(df, 10 * 60)['price'].tolist() == [2.1, 2.2], "Naive times should be taken as UTC."
+    assert fresh_quotes(df, 35 * 60, as_of='2024-03-03T20:30:00Z')['price'].tolist() == [2.1, 2.2]
+    assert fresh_quotes(df, 10 * 60, as_of='2024-03-03T20:30:00Z').empty
+    assert len(fresh_quotes(df, None)) == 4, "Without a maximum age all quotes should be kept."
+    assert len(fresh_quotes(df.drop(columns='last_update'), 60)) == 4
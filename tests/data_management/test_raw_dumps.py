@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+from arbitrage_analysis.data_management.raw_dumps import (previous_dump_path, read_header, read_raw_dump,
+                                                          replace_dump)
+
+
+@pytest.fixture
+def dump_file(tmp_path):
+    df = pd.DataFrame({
+        'id': [f'e{i}' for i in range(5)],
+        'home_team': ["Nott'm Forest", 'Team C', None, 'Team E', 'Team F'],
+        'price': [1.5, 2.0, None, 3.5, 4.0],
+        'unused': ['x'] * 5,
+    })
+    src_file = tmp_path / "dump.csv"
+    df.to_csv(src_file, index=False)
+    return src_file
+
+
+def test_read_header(dump_file):
+    assert read_header(dump_file) == ['id', 'home_team', 'price', 'unused']
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_read_raw_dump_projects_columns(dump_file, engine):
+    """Checks that only the requested columns are read, selected by name or by a function."""
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+
+    by_name = read_raw_dump(dump_file, columns=['id', 'price'], engine=engine)
+    by_function = read_raw_dump(dump_file, columns=lambda column: column != 'unused', engine=engine)
+
+    assert list(by_name.columns) == ['id', 'price']
+    assert list(by_function.columns) == ['id', 'home_team', 'price']
+    assert by_function['price'].isna().tolist() == [False, False, True, False, False]
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_read_raw_dump_in_chunks(dump_file, engine):
+    """Checks that chunks hold at most `chunksize` rows and add up to the whole file with the declared types."""
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    dtype = {'id': str, 'home_team': str, 'price': float}
+
+    chunks = list(read_raw_dump(dump_file, columns=list(dtype), dtype=dtype, chunksize=2, engine=engine))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    df = pd.concat(chunks, ignore_index=True)
+    assert df['id'].tolist() == ['e0', 'e1', 'e2', 'e3', 'e4']
+    assert df['home_team'].isna().tolist() == [False, False, True, False, False]
+    assert df['price'].dtype == float
+
+
+def test_replace_dump_keeps_the_previous_dump(tmp_path):
+    """Checks that a new dump moves the one it replaces to the previous dump, overwriting an older one."""
+    src_file = tmp_path / "df_odds.csv"
+    for price in [1.5, 1.6, 1.7]:
+        replace_dump(pd.DataFrame({'price': [price]}), src_file)
+
+    assert previous_dump_path(src_file).name == "df_odds_previous.csv"
+    assert pd.read_csv(src_file)['price'].tolist() == [1.7]
+    assert pd.read_csv(previous_dump_path(src_file))['price'].tolist() == [1.6]
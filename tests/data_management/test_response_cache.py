@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+import requests
+from arbitrage_analysis.data_management.response_cache import ResponseCache, cache_key
+from arbitrage_analysis.data_management.retrieve_data_the_odds_api import get_sports_the_odds_api
+
+
+# ETag of the sports list served by the stub
+SPORTS_ETAG = '"sports-v1"'
+
+
+def _serve_sports(handler):
+    """Serves a fixed sports list with an ETag and answers matching conditional requests with 304."""
+    handler.server.requests.append(handler.headers.get("If-None-Match"))
+    if handler.headers.get("If-None-Match") == SPORTS_ETAG:
+        handler.send_json(None, status=304, headers={"x-requests-remaining": "97"})
+    else:
+        handler.send_json([{"key": "soccer_italy_serie_a"}], headers={"ETag": SPORTS_ETAG,
+                                                                       "x-requests-remaining": "98"})
+
+
+@pytest.fixture
+def stub_server(start_stub_server):
+    return start_stub_server(_serve_sports, requests=[])
+
+
+def test_cache_hit_revalidation_and_offline_replay(stub_server, tmp_path):
+    """Checks fresh hits, ETag revalidation after expiry, quota accounting and offline replay from disk."""
+    base_url = stub_server.url
+    now = [0.0]
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttls={"sports": 100}, clock=lambda: now[0])
+
+    first = get_sports_the_odds_api("secret", base_url=base_url, cache=cache)
+    second = get_sports_the_odds_api("secret", base_url=base_url, cache=cache)
+    now[0] = 200.0
+    third = get_sports_the_odds_api("secret", base_url=base_url, cache=cache)
+
+    assert first == second == third, "Cached responses should equal the original response."
+    assert stub_server.requests == [None, '"sports-v1"'], "Only the miss and the revalidation should reach the API."
+    report = cache.report()
+    assert (report["hits"], report["misses"], report["revalidated"]) == (1, 1, 1)
+    assert report["x-requests-remaining"] == "97", "The latest quota header should be recorded."
+    assert cache.save_report(tmp_path / "report.csv") == report
+    assert pd.read_csv(tmp_path / "report.csv", dtype=str).iloc[0].to_dict() == {key: str(value) for key, value in
+                                                                                 report.items()}
+    cache.close()
+
+    offline_cache = ResponseCache(tmp_path / "cache.sqlite", offline=True, clock=lambda: 10_000.0)
+    replayed = get_sports_the_odds_api("other_key", base_url=base_url, cache=offline_cache)
+    missing = get_sports_the_odds_api("other_key", base_url=f"{base_url}/v5", cache=offline_cache)
+
+    assert replayed == first, "Offline mode should replay cached responses regardless of their age."
+    assert isinstance(missing, str), "Offline mode should not reach the network for uncached requests."
+    assert len(stub_server.requests) == 2, "Offline mode must not send any request."
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Verifies that the cache keeps at most `max_entries` responses and evicts the least recently used one."""
+    now = [0.0]
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_entries=2, clock=lambda: now[0])
+    for i in range(3):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"[]"
+        now[0] += 1
+        cache.store(cache_key("http://api/odds", {"id": i}), "odds", response)
+        if i == 1:
+            now[0] += 1
+            cache.lookup(cache_key("http://api/odds", {"id": 0}), "odds")
+
+    assert cache.lookup(cache_key("http://api/odds", {"id": 0}), "odds")[0] is not None
+    assert cache.lookup(cache_key("http://api/odds", {"id": 1}), "odds")[0] is None, "Entry 1 was used least recently."
+
+
+def test_cache_key_drops_credentials():
+    assert cache_key("http://api/sports", {"apiKey": "secret", "all": "true"}) == "http://api/sports?all=true"
@@ -1,13 +1,15 @@
 import pandas as pd
 import pytest
-from arbitrage_analysis.data_management.task_retrieve_odds_rapid_api import extract_odds_rapid_api
+from arbitrage_analysis.data_management.task_retrieve_odds_rapid_api import (MAX_PRICE, extract_odds_rapid_api,
+                                                                             reshape_rapid_api_long)
 
-def _mock_read_csv(file_path):
+def _mock_read_csv(file_path, **kwargs):
     """
     Simulates reading a CSV file and returns a DataFrame with mock odds data for testing purposes.
 
     Args:
         file_path (str): The file path for the CSV file to be read. This parameter is ignored in this mock function.
+        **kwargs: Parser options such as `usecols`. They are ignored in this mock function.
 
     Returns:
         pd.DataFrame: A DataFrame containing simulated odds data for multiple matches.
@@ -43,3 +45,33 @@ def test_extract_odds_with_mock(mock_df):
     assert list(result_df.columns) == expected_columns, "DataFrame should have the expected column names."
     assert result_df.isna().sum().sum() == 0, "DataFrame should not contain NaN values."
 
+
+def test_reshape_rapid_api_long_reads_every_entry():
+    """Checks that all entries are reshaped, including those beyond index 166 and entries lacking some fields."""
+    data = {}
+    for i in (0, 1, 170):
+        data.update({f'{i}.home_team': [f'Home{i}', None], f'{i}.home': [1.5 + i, None]})
+    data['171.home_team'] = ['Home171', 'Home171']
+    df = pd.DataFrame(data)
+
+    result_df = reshape_rapid_api_long(df, ['home_team', 'home'])
+
+    assert result_df.index.tolist() == [0, 1, 2, 3, 340, 341, 342, 343], "Rows should be ordered by entry."
+    assert result_df.loc[340, 'home_team'] == 'Home170', "Entries beyond index 166 should be kept."
+    assert result_df.loc[342, 'home'] != result_df.loc[342, 'home'], "Missing fields should be NaN."
+    assert result_df['home'].dtype == float, "Odds should keep a numeric dtype."
+
+
+def test_extract_odds_drops_scraped_ids(tmp_path):
+    """Ensures a match whose 1X2 fields hold an ID scraped in place of a price is left out."""
+    df = pd.DataFrame({
+        '0.away_team': ['Empoli', 'Genoa'], '0.home_team': ['AC Milan', 'Inter Milan'],
+        '0.away': [8.5, 15.0], '0.home': [1.47, 421234567890.0], '0.draw': [5.1, 6.4], '0.bookie': ['1xbet', '1xbet'],
+    })
+    src_file = tmp_path / "odds.csv"
+    df.to_csv(src_file, index=False)
+
+    result_df = extract_odds_rapid_api(src_file)
+
+    assert result_df['home_team'].tolist() == ['AC Milan']
+    assert (result_df[['home', 'draw', 'away']] <= MAX_PRICE).all().all()
@@ -1,6 +1,10 @@
 import pytest
 import pandas as pd
-from arbitrage_analysis.data_management.task_retrieve_odds_the_odds_api import extract_odds_the_odds_api
+from arbitrage_analysis.data_management.task_retrieve_odds_the_odds_api import (
+    extract_odds_the_odds_api,
+    extract_quotes_the_odds_api,
+    h2h_odds_table,
+)
 
 def test_extract_odds_the_odds_api():
     """Ensures that odds data is correctly extracted from JSON and converted to a DataFrame with the expected format and values."""
@@ -42,3 +46,69 @@ def test_extract_odds_the_odds_api():
 
     pd.testing.assert_frame_equal(result_df.sort_index(axis=1), expected_df.sort_index(axis=1), check_dtype=False)
 
+
+
+EVENTS = [
+    {
+        "id": "e1", "sport_key": "soccer_epl", "commence_time": "2024-03-03T14:00:00Z",
+        "home_team": "Nott'm Forest", "away_team": "Team B",
+        "bookmakers": [
+            {
+                "title": "Bookmaker1", "last_update": "2024-03-01T10:00:00Z",
+                "markets": [
+                    {"key": "h2h", "last_update": "2024-03-01T09:59:00Z", "outcomes": [
+                        {"name": "Nott'm Forest", "price": 2.1},
+                        {"name": "Team B", "price": 3.5},
+                        {"name": "Draw", "price": 3.0},
+                    ]},
+                    {"key": "totals", "outcomes": [
+                        {"name": "Over", "price": 1.9, "point": 2.5},
+                        {"name": "Under", "price": 1.95, "point": 2.5},
+                    ]},
+                ],
+            },
+        ],
+    },
+    {
+        "id": "e2", "sport_key": "soccer_epl", "commence_time": "2024-03-04T14:00:00Z",
+        "home_team": "Team C", "away_team": "Team D",
+        "bookmakers": [
+            {"title": "Bookmaker2", "last_update": "2024-03-01T11:00:00Z", "markets": [
+                {"key": "h2h", "outcomes": [
+                    {"name": "Team C", "price": 1.5},
+                    {"name": "Draw", "price": 4.0},
+                    {"name": "Team D", "price": 6.0},
+                ]},
+            ]},
+        ],
+    },
+]
+
+def test_extract_quotes_the_odds_api_covers_all_markets():
+    """Ensures that every outcome of every market becomes one quote with provider-independent outcome labels."""
+    quotes = extract_quotes_the_odds_api(EVENTS)
+
+    assert len(quotes) == 8
+    assert quotes['market'].tolist() == ['h2h'] * 3 + ['totals'] * 2 + ['h2h'] * 3
+    assert quotes['outcome'].tolist() == ['home', 'away', 'draw', 'over', 'under', 'home', 'draw', 'away']
+    assert quotes['line'].isna().sum() == 6
+    assert quotes.loc[quotes['market'] == 'totals', 'line'].tolist() == [2.5, 2.5]
+    assert quotes['last_update'].tolist()[:4] == ['2024-03-01T09:59:00Z'] * 3 + ['2024-03-01T10:00:00Z']
+
+def test_extract_quotes_the_odds_api_parses_saved_dataframe():
+    """Ensures that bookmakers saved as Python literals, including team names with apostrophes, are parsed."""
+    df_events = pd.DataFrame(EVENTS)
+    df_events['bookmakers'] = df_events['bookmakers'].astype(str)
+
+    pd.testing.assert_frame_equal(extract_quotes_the_odds_api(df_events), extract_quotes_the_odds_api(EVENTS))
+
+def test_h2h_odds_table():
+    """Ensures that the head-to-head quotes are widened to one row per event and bookmaker."""
+    result_df = h2h_odds_table(extract_quotes_the_odds_api(EVENTS))
+
+    assert result_df.columns.tolist() == [
+        'bookmaker', 'home_team', 'away_team', 'commence_time', 'home_win_odds', 'draw_odds', 'away_win_odds'
+    ]
+    assert result_df['home_team'].tolist() == ["Nott'm Forest", 'Team C']
+    assert result_df[['home_win_odds', 'draw_odds', 'away_win_odds']].values.tolist() == [[2.1, 3.0, 3.5],
+                                                                                          [1.5, 4.0, 6.0]]
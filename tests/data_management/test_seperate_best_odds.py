@@ -1,6 +1,6 @@
 import pandas as pd
 import pytest
-from arbitrage_analysis.data_management.task_seperate_best_odds import find_best_odds
+from arbitrage_analysis.data_management.task_seperate_best_odds import best_prices, find_best_odds, select_best_odds
 
 @pytest.fixture
 def sample_data(tmp_path):
@@ -33,4 +33,44 @@ def test_find_best_odds(sample_data):
         "bookie_away": ["1xBet"]
     }
     expected_df = pd.DataFrame(expected_data)
-    pd.testing.assert_frame_equal(result_df.reset_index(drop=True), expected_df.reset_index(drop=True))
\ No newline at end of file
+    pd.testing.assert_frame_equal(result_df.reset_index(drop=True), expected_df.reset_index(drop=True))
+
+def test_best_prices_any_number_of_outcomes():
+    """Checks that the best quote is selected per match, market, line and outcome for 2-way and 3-way markets."""
+    quotes = pd.DataFrame({
+        'match_id': ['m1'] * 9,
+        'bookmaker': ['a', 'b', 'c', 'a', 'b', 'c', 'a', 'b', 'a'],
+        'market': ['h2h'] * 6 + ['totals'] * 3,
+        'line': [None] * 6 + [2.5, 2.5, 3.5],
+        'outcome': ['home', 'home', 'home', 'draw', 'away', 'away', 'over', 'over', 'over'],
+        'price': [2.10, 2.20, 2.20, 3.40, 3.90, None, 1.95, 1.90, 2.60],
+    })
+
+    result = best_prices(quotes)
+    h2h = result[result['market'] == 'h2h'].set_index('outcome')
+    totals = result[result['market'] == 'totals'].set_index('line')
+
+    assert len(result) == 5, "There should be one row per market, line and outcome."
+    assert h2h.loc['home', 'bookmaker'] == 'b', "Ties should go to the first quote."
+    assert h2h.loc['away', 'price'] == 3.90, "Missing prices should be ignored."
+    assert totals.loc[2.5, 'bookmaker'] == 'a'
+    assert totals.loc[3.5, 'price'] == 2.60
+
+def test_select_best_odds_by_event():
+    """Checks that repeated pairings of a season stay separate matches and keep their event IDs."""
+    df = pd.DataFrame({
+        'event_id': ['e1', 'e1', 'e2', 'e2'],
+        'bookmaker': ['a', 'b', 'a', 'b'],
+        'home_team': ['AC Milan'] * 4,
+        'away_team': ['Empoli'] * 4,
+        'commence_time': ['2024-03-10T14:00:00Z'] * 2 + ['2024-05-12T14:00:00Z'] * 2,
+        'home_win_odds': [1.40, 1.45, 1.60, 1.55],
+        'draw_odds': [5.00, 4.80, 4.00, 4.10],
+        'away_win_odds': [7.50, 7.00, 5.50, 5.80],
+    })
+
+    result = select_best_odds(df)
+
+    assert result['event_id'].tolist() == ['e1', 'e2'], "Both meetings of the pairing should be kept."
+    assert result['best_odds_home'].tolist() == [1.45, 1.60]
+    assert result['bookie_away'].tolist() == ['a', 'b']
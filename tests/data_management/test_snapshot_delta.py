@@ -0,0 +1,62 @@
+import pandas as pd
+from arbitrage_analysis.data_management.snapshot_delta import (diff_quote_snapshots, ingest_snapshot, snapshot_time,
+                                                              write_quote_changes)
+
+
+def _quotes(rows):
+    df = pd.DataFrame(rows, columns=['match_id', 'bookmaker', 'market', 'line', 'outcome', 'price', 'last_update'])
+    return df.astype({'line': float})
+
+
+previous = _quotes([
+    ['m1', 'Pinnacle', 'h2h', None, 'home', 2.10, '2024-03-03T20:00:00Z'],
+    ['m1', 'Pinnacle', 'h2h', None, 'away', 3.50, '2024-03-03T20:00:00Z'],
+    ['m1', 'Unibet', 'totals', 2.5, 'over', 1.90, '2024-03-03T20:00:00Z'],
+])
+
+current = _quotes([
+    ['m1', 'Pinnacle', 'h2h', None, 'home', 2.15, '2024-03-03T20:05:00Z'],
+    ['m1', 'Pinnacle', 'h2h', None, 'away', 3.50, '2024-03-03T20:00:00Z'],
+    ['m2', 'Pinnacle', 'h2h', None, 'home', 1.80, '2024-03-03T20:05:00Z'],
+])
+
+
+def test_diff_quote_snapshots():
+    """Checks that only inserted, updated and removed quotes end up in the change log."""
+    changes = diff_quote_snapshots(previous, current).set_index(['match_id', 'bookmaker', 'market', 'outcome'])
+
+    assert len(changes) == 3, "The unchanged quote should not be part of the change log."
+    assert changes.loc[('m1', 'Pinnacle', 'h2h', 'home'), 'change'] == 'update'
+    assert changes.loc[('m1', 'Pinnacle', 'h2h', 'home'), 'price'] == 2.15, "Updates should carry the new price."
+    assert changes.loc[('m2', 'Pinnacle', 'h2h', 'home'), 'change'] == 'insert'
+    assert changes.loc[('m1', 'Unibet', 'totals', 'over'), 'change'] == 'delete'
+    assert changes.loc[('m1', 'Unibet', 'totals', 'over'), 'line'] == 2.5, "Deletes should carry the last values."
+
+
+def test_ingest_snapshot_appends_only_changes(tmp_path):
+    """Ensures repeated ingestion appends the full first snapshot once and afterwards only the differences."""
+    state_path = tmp_path / "state.pkl"
+    changelog_path = tmp_path / "changes.csv"
+
+    ingest_snapshot(previous, state_path, changelog_path, captured_at="2024-03-03T20:00:00Z")
+    ingest_snapshot(current, state_path, changelog_path, captured_at="2024-03-03T20:05:00Z")
+    unchanged = ingest_snapshot(current, state_path, changelog_path, captured_at="2024-03-03T20:10:00Z")
+
+    changelog = pd.read_csv(changelog_path)
+    assert unchanged.empty, "Ingesting an identical snapshot should produce no changes."
+    assert changelog['change'].value_counts().to_dict() == {'insert': 4, 'update': 1, 'delete': 1}
+
+
+def test_write_quote_changes_depends_only_on_the_snapshots(tmp_path):
+    """Ensures the change log of two snapshots is the same however often it is written."""
+    changelog_path = tmp_path / "changes.csv"
+    captured_at = snapshot_time(current['last_update'])
+
+    write_quote_changes(previous, current, changelog_path, captured_at)
+    first = changelog_path.read_text()
+    write_quote_changes(previous, current, changelog_path, captured_at)
+
+    assert changelog_path.read_text() == first, "Rerunning should not append to the change log."
+    changelog = pd.read_csv(changelog_path)
+    assert changelog['change'].value_counts().to_dict() == {'update': 1, 'insert': 1, 'delete': 1}
+    assert (pd.to_datetime(changelog['captured_at']) == pd.Timestamp('2024-03-03T20:05:00Z')).all()
@@ -0,0 +1,45 @@
+import pandas as pd
+from arbitrage_analysis.data_management.team_names import TeamNameResolver, normalize_team_name
+
+TEAMS = ['AC Milan', 'Atalanta BC', 'Inter Milan', 'Juventus', 'Napoli', 'Sassuolo', 'Torino']
+
+
+def test_normalize_team_name():
+    """Checks that case, accents, whitespace, club tokens and founding years do not change the key."""
+    assert normalize_team_name('Ssc Napoli') == normalize_team_name('Napoli') == 'napoli'
+    assert normalize_team_name('Us Sassuolo ') == 'sassuolo'
+    assert normalize_team_name('  Atlético   Madrid') == 'atletico madrid'
+    assert normalize_team_name('Us Salernitana 1919') == 'salernitana'
+    assert normalize_team_name('FC') == 'fc', "A name made only of club tokens should be kept."
+
+
+def test_resolve_series_exact_and_fuzzy():
+    """Ensures names are resolved by key or by an unambiguous fuzzy match, and unmatched names are kept."""
+    resolver = TeamNameResolver(TEAMS)
+    names = pd.Series(['Ssc Napoli', 'Inter Milano', 'Juventus Turin', 'Atalanta Bergamasca ', 'Fc Torino',
+                       'Ac Milan', 'Udinese Calcio', None])
+
+    resolved = resolver.resolve_series(names)
+
+    assert resolved.tolist()[:6] == ['Napoli', 'Inter Milan', 'Juventus', 'Atalanta BC', 'Torino', 'AC Milan']
+    assert resolved[6] == 'Udinese Calcio' and pd.isna(resolved[7])
+    assert resolver.unresolved == {'Udinese Calcio'}
+
+    ambiguous = TeamNameResolver(['Real Madrid', 'Real Sociedad'])
+    assert ambiguous.resolve('Real') is None, "A name matching several teams equally well should stay unresolved."
+
+
+def test_learned_aliases_are_persisted(tmp_path):
+    """Checks that fuzzy matches are written to the alias file and resolved by key in the next run."""
+    aliases_path = tmp_path / "aliases.csv"
+    resolver = TeamNameResolver(TEAMS, aliases_path=aliases_path)
+    resolver.resolve('Inter Milano')
+    resolver.save()
+
+    aliases = pd.read_csv(aliases_path)
+    assert aliases[['alias', 'team', 'method']].values.tolist() == [['inter milano', 'Inter Milan', 'fuzzy']]
+
+    # With a threshold no fuzzy match can reach, only the persisted alias resolves the name
+    reloaded = TeamNameResolver(TEAMS, aliases_path=aliases_path, threshold=2)
+    assert reloaded.resolve('Inter  Milano') == 'Inter Milan'
+    assert reloaded.resolve('Juventus Turin') is None
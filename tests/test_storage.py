@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from arbitrage_analysis.storage import TABLE_MANIFEST, load_table, save_table, table_path
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def odds():
+    return pd.DataFrame({
+        'bookmaker': ['888sport', 'Pinnacle', 'bet365', 'unibet'],
+        'sport_key': ['soccer_italy_serie_a', 'soccer_epl', 'soccer_italy_serie_a', None],
+        'commence_time': ['2024-03-04T19:45:00Z', '2024-03-03T14:00:00Z', '2024-03-03T19:45:00Z', None],
+        'home_win_odds': [2.3, 1.25, 2.35, 1.9],
+        'market': pd.Categorical(['h2h', 'h2h', 'totals', 'h2h']),
+        'price': np.array([1.5, 2.0, 3.5, 4.0], dtype=np.float32),
+    })
+
+
+def test_table_path():
+    assert table_path("all_odds_merged", "parquet").parts[-2:] == ("all_odds_merged.parquet", TABLE_MANIFEST)
+    assert table_path("all_odds_merged", "pickle").name == "all_odds_merged.pkl"
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_save_and_load_table_round_trip(tmp_path, odds, suffix):
+    """Checks that a partitioned table comes back with its row order, columns and types."""
+    path = tmp_path / f"odds{suffix}" / TABLE_MANIFEST
+    save_table(odds, path)
+
+    partitions = sorted(p.relative_to(path.parent).as_posix() for p in path.parent.glob("*=*/*=*"))
+    assert partitions == [
+        "sport_key=__HIVE_DEFAULT_PARTITION__/commence_date=__HIVE_DEFAULT_PARTITION__",
+        "sport_key=soccer_epl/commence_date=2024-03-03",
+        "sport_key=soccer_italy_serie_a/commence_date=2024-03-03",
+        "sport_key=soccer_italy_serie_a/commence_date=2024-03-04",
+    ]
+    pd.testing.assert_frame_equal(load_table(path), odds)
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_load_table_prunes_columns_and_partitions(tmp_path, odds, suffix):
+    path = tmp_path / f"odds{suffix}"
+    save_table(odds, path)
+
+    result_df = load_table(path, columns=['bookmaker', 'price'],
+                           filters=[('sport_key', '==', 'soccer_italy_serie_a'), ('commence_date', '>=', '2024-03-04')])
+
+    assert result_df.columns.tolist() == ['bookmaker', 'price']
+    assert result_df['bookmaker'].tolist() == ['888sport']
+
+
+def test_save_table_replaces_previous_partitions(tmp_path, odds):
+    path = tmp_path / "odds.parquet"
+    save_table(odds, path)
+    save_table(odds.iloc[:1], path)
+
+    assert load_table(path)['bookmaker'].tolist() == ['888sport']
+    assert len(list(path.glob("*=*"))) == 1
+
+
+def test_save_and_load_empty_table(tmp_path, odds):
+    path = tmp_path / "odds.parquet"
+    save_table(odds.iloc[0:0], path)
+
+    assert load_table(path).columns.tolist() == odds.columns.tolist()
+
+
+def test_pickle_tables(tmp_path, odds):
+    """Checks that paths with another suffix keep using pickle files."""
+    path = tmp_path / "odds.pkl"
+    save_table(odds, path)
+
+    pd.testing.assert_frame_equal(load_table(path, columns=['bookmaker']), odds[['bookmaker']])
+    with pytest.raises(ValueError, match="Filters"):
+        load_table(path, filters=[('sport_key', '==', 'soccer_epl')])